@@ -0,0 +1,326 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+مقياس أداء ودقة محلل الإشارات
+يبني مجموعة رسائل من سجل الإشارات ورسائل الاختبارات، ويقيس سرعة كل مرحلة
+ودقة النتائج مقارنة بالنتائج المتوقعة، ويحفظ النتائج في ملف JSON للمقارنة
+"""
+
+import sys
+import os
+import io
+import ast
+import json
+import time
+import hashlib
+import argparse
+import contextlib
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# إصلاح مشكلة الترميز في Windows
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+
+from signal_parser import SignalParser
+
+HISTORY_FILE = 'data/signals_history.json'
+EXPECTED_FILE = 'data/parser_expected.json'
+RESULTS_FILE = 'data/parser_benchmark.json'
+
+# ملفات الاختبار التي تحتوي رسائل بصيغة {'message': """..."""}
+TEST_FILES = [
+    'test_parser.py', 'test_fixes.py', 'test_new_pattern.py',
+    'test_pending_orders.py', 'test_close_price.py'
+]
+
+# الحقول التي تُقارن مع النتائج المتوقعة
+FIELDS = ['symbol', 'action', 'order_type', 'entry_price', 'entry_price_range', 'take_profits', 'stop_loss']
+
+# التراجع المسموح قبل اعتبار النتيجة فشلاً
+MAX_THROUGHPUT_DROP = 0.25
+MAX_ACCURACY_DROP = 0.0
+
+
+def message_id(message: str) -> str:
+    """معرف ثابت للرسالة"""
+    return hashlib.sha1(message.encode('utf-8')).hexdigest()[:16]
+
+
+def _messages_from_test_file(file_path: str) -> List[str]:
+    """استخراج نصوص الرسائل من ملف اختبار بدون تشغيله"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+
+    messages = []
+    for node in ast.walk(tree):
+        # {'message': """..."""}
+        if isinstance(node, ast.Dict):
+            for key, value in zip(node.keys, node.values):
+                if (isinstance(key, ast.Constant) and key.value == 'message'
+                        and isinstance(value, ast.Constant) and isinstance(value.value, str)):
+                    messages.append(value.value)
+        # message = """...""" أو test_message_1 = """..."""
+        elif isinstance(node, ast.Assign) and isinstance(node.value, ast.Constant):
+            names = [target.id for target in node.targets if isinstance(target, ast.Name)]
+            if any('message' in name for name in names) and isinstance(node.value.value, str):
+                messages.append(node.value.value)
+    return messages
+
+
+def build_corpus() -> List[Dict]:
+    """بناء مجموعة الرسائل (بدون تكرار) مع مصدر كل رسالة"""
+    corpus = []
+    seen = set()
+
+    def add(message: str, source: str):
+        if not message or not message.strip():
+            return
+        key = message_id(message)
+        if key in seen:
+            return
+        seen.add(key)
+        corpus.append({'id': key, 'source': source, 'message': message})
+
+    if os.path.exists(HISTORY_FILE):
+        with open(HISTORY_FILE, 'r', encoding='utf-8') as f:
+            for item in json.load(f):
+                add(item.get('raw_message'), HISTORY_FILE)
+
+    for file_path in TEST_FILES:
+        if os.path.exists(file_path):
+            for message in _messages_from_test_file(file_path):
+                add(message, file_path)
+
+    return corpus
+
+
+def signal_fields(signal) -> Optional[Dict]:
+    """حقول الإشارة القابلة للمقارنة"""
+    if signal is None:
+        return None
+    return {
+        'symbol': signal.symbol,
+        'action': signal.action,
+        'order_type': signal.order_type,
+        'entry_price': signal.entry_price,
+        'entry_price_range': list(signal.entry_price_range) if signal.entry_price_range else None,
+        'take_profits': list(signal.take_profits),
+        'stop_loss': signal.stop_loss
+    }
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def _latency_stats(samples_ns: List[int]) -> Dict:
+    samples_us = [s / 1000 for s in samples_ns]
+    return {
+        'p50_us': round(percentile(samples_us, 50), 2),
+        'p99_us': round(percentile(samples_us, 99), 2),
+        'mean_us': round(sum(samples_us) / len(samples_us), 2) if samples_us else 0.0
+    }
+
+
+def measure_stages(parser: SignalParser, corpus: List[Dict], repeat: int) -> Dict:
+    """قياس زمن كل مرحلة من مراحل الاستخراج لكل رسالة"""
+    stages = {name: [] for name in ['tokenize', 'symbol', 'action', 'entry', 'take_profits', 'stop_loss']}
+    clock = time.perf_counter_ns
+
+    for _ in range(repeat):
+        for item in corpus:
+            start = clock()
+            tokens = parser.tokenize(item['message'])
+            stages['tokenize'].append(clock() - start)
+
+            start = clock()
+            symbol = parser.extract_symbol(tokens) or ""
+            stages['symbol'].append(clock() - start)
+
+            start = clock()
+            parser.extract_action(tokens)
+            stages['action'].append(clock() - start)
+
+            # كل مرحلة تبدأ بدون أسعار محسوبة مسبقاً
+            for stage, extractor in (('entry', parser.extract_entry_price),
+                                     ('take_profits', parser.extract_take_profits),
+                                     ('stop_loss', parser.extract_stop_loss)):
+                tokens._valid_prices.clear()
+                start = clock()
+                extractor(tokens, symbol)
+                stages[stage].append(clock() - start)
+
+    return {stage: _latency_stats(samples) for stage, samples in stages.items()}
+
+
+def measure_parse(parser: SignalParser, corpus: List[Dict], repeat: int):
+    """قياس زمن التحليل الكامل وجمع النتائج"""
+    samples = []
+    outputs = {}
+    clock = time.perf_counter_ns
+
+    start_total = time.perf_counter()
+    for _ in range(repeat):
+        for item in corpus:
+            start = clock()
+            signal = parser.parse(item['message'])
+            samples.append(clock() - start)
+            outputs[item['id']] = signal_fields(signal)
+    elapsed = time.perf_counter() - start_total
+
+    stats = _latency_stats(samples)
+    stats['messages_per_second'] = round(len(samples) / elapsed, 1) if elapsed > 0 else 0.0
+    return stats, outputs
+
+
+def check_accuracy(outputs: Dict, expected: Dict) -> Dict:
+    """مقارنة النتائج مع النتائج المتوقعة (لكل رسالة ولكل حقل)"""
+    labeled = [key for key in outputs if key in expected]
+    exact = 0
+    field_hits = {name: 0 for name in FIELDS}
+    mismatches = []
+
+    for key in labeled:
+        actual, wanted = outputs[key], expected[key]
+        if actual == wanted:
+            exact += 1
+            for name in FIELDS:
+                field_hits[name] += 1
+            continue
+
+        mismatches.append(key)
+        for name in FIELDS:
+            if (actual or {}).get(name) == (wanted or {}).get(name):
+                field_hits[name] += 1
+
+    total = len(labeled)
+    return {
+        'labeled': total,
+        'unlabeled': len(outputs) - total,
+        'exact_match': round(exact / total, 4) if total else 0.0,
+        'fields': {name: round(hits / total, 4) if total else 0.0 for name, hits in field_hits.items()},
+        'mismatches': mismatches
+    }
+
+
+def compare_with_previous(results: Dict, previous: Dict) -> List[str]:
+    """اكتشاف التراجع في السرعة أو الدقة مقارنة بآخر تشغيل"""
+    problems = []
+
+    old_rate = previous.get('parse', {}).get('messages_per_second', 0)
+    new_rate = results['parse']['messages_per_second']
+    if old_rate and new_rate < old_rate * (1 - MAX_THROUGHPUT_DROP):
+        problems.append(f"تراجع السرعة: {old_rate} ← {new_rate} رسالة/ث")
+
+    old_acc = previous.get('accuracy', {}).get('exact_match')
+    new_acc = results['accuracy']['exact_match']
+    if old_acc is not None and new_acc < old_acc - MAX_ACCURACY_DROP:
+        problems.append(f"تراجع الدقة: {old_acc} ← {new_acc}")
+
+    return problems
+
+
+def run_benchmark(repeat: int = 3, update_expected: bool = False,
+                  output_file: str = RESULTS_FILE, baseline_file: Optional[str] = None) -> int:
+    """تشغيل المقياس الكامل"""
+    corpus = build_corpus()
+    if not corpus:
+        print("❌ لا توجد رسائل للقياس")
+        return 1
+
+    # محلل بدون ذاكرة مؤقتة أو قوالب لقياس المسار العام
+    parser = SignalParser(price_ranges_file=None)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        stages = measure_stages(parser, corpus, repeat)
+        parse_stats, outputs = measure_parse(parser, corpus, repeat)
+
+    if update_expected:
+        os.makedirs(os.path.dirname(EXPECTED_FILE) or '.', exist_ok=True)
+        with open(EXPECTED_FILE, 'w', encoding='utf-8') as f:
+            json.dump(outputs, f, indent=4, ensure_ascii=False)
+        print(f"✅ تم تحديث النتائج المتوقعة: {EXPECTED_FILE} ({len(outputs)} رسالة)")
+
+    expected = {}
+    if os.path.exists(EXPECTED_FILE):
+        with open(EXPECTED_FILE, 'r', encoding='utf-8') as f:
+            expected = json.load(f)
+
+    results = {
+        'timestamp': datetime.now().isoformat(),
+        'python': sys.version.split()[0],
+        'corpus': {
+            'messages': len(corpus),
+            'parsed': sum(1 for value in outputs.values() if value),
+            'sources': sorted({item['source'] for item in corpus})
+        },
+        'repeat': repeat,
+        'parse': parse_stats,
+        'stages': stages,
+        'prefilter': parser.get_prefilter_stats(),
+        'accuracy': check_accuracy(outputs, expected)
+    }
+
+    baseline_file = baseline_file or output_file
+    previous = None
+    if os.path.exists(baseline_file):
+        try:
+            with open(baseline_file, 'r', encoding='utf-8') as f:
+                previous = json.load(f)
+        except Exception:
+            previous = None
+
+    problems = compare_with_previous(results, previous) if previous else []
+    results['regressions'] = problems
+
+    os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=4, ensure_ascii=False)
+
+    # طباعة الملخص
+    print("=" * 60)
+    print("📊 مقياس محلل الإشارات")
+    print("=" * 60)
+    print(f"الرسائل: {results['corpus']['messages']} | المحللة: {results['corpus']['parsed']}")
+    print(f"السرعة: {parse_stats['messages_per_second']} رسالة/ث "
+          f"(p50 {parse_stats['p50_us']}µs | p99 {parse_stats['p99_us']}µs)")
+    for stage, stats in stages.items():
+        print(f"   {stage:<13} p50 {stats['p50_us']:>8}µs | p99 {stats['p99_us']:>8}µs")
+    prefilter = results['prefilter']
+    print(f"الرفض المبكر: {prefilter['rejected']}/{prefilter['checked']} {prefilter['reasons']}")
+    accuracy = results['accuracy']
+    print(f"الدقة: {accuracy['exact_match'] * 100:.1f}% من {accuracy['labeled']} رسالة معلّمة")
+    if accuracy['mismatches']:
+        print(f"   ⚠️ {len(accuracy['mismatches'])} رسالة تختلف عن النتائج المتوقعة")
+    print(f"📂 النتائج: {output_file}")
+
+    if problems:
+        print("\n❌ تراجع مقارنة بآخر تشغيل:")
+        for problem in problems:
+            print(f"   - {problem}")
+        return 1
+
+    print("✅ لا يوجد تراجع")
+    return 0
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='مقياس أداء ودقة محلل الإشارات')
+    arg_parser.add_argument('--repeat', type=int, default=3, help='عدد مرات تكرار المجموعة')
+    arg_parser.add_argument('--output', default=RESULTS_FILE, help='ملف النتائج (JSON)')
+    arg_parser.add_argument('--baseline', default=None, help='ملف نتائج سابق للمقارنة (الافتراضي: ملف النتائج)')
+    arg_parser.add_argument('--update-expected', action='store_true',
+                            help='اعتماد النتائج الحالية كنتائج متوقعة')
+    args = arg_parser.parse_args()
+
+    return run_benchmark(args.repeat, args.update_expected, args.output, args.baseline)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
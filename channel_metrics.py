@@ -0,0 +1,168 @@
+"""
+إحصائيات الأداء لكل قناة
+عدد الرسائل في الدقيقة، نسبة نجاح التحليل، أسباب الرفض المبكر، توزيع زمن التحليل
+ونتائج التنفيذ - لاكتشاف القنوات الكثيرة الرسائل التي لا تنتج إشارات
+"""
+
+import time
+from bisect import bisect_left
+from collections import Counter, OrderedDict, deque
+from typing import Dict, List, Optional
+
+# حدود فئات زمن التحليل (ميلي ثانية) - الفئة الأخيرة لما فوق آخر حد
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100)
+_BUCKET_LABELS = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+
+
+class ChannelStats:
+    """إحصائيات قناة واحدة في الذاكرة"""
+
+    RATE_WINDOW = 60.0  # نافذة حساب الرسائل في الدقيقة (ثانية)
+
+    def __init__(self, channel_id: int, name: str = None):
+        self.channel_id = channel_id
+        self.name = name
+        self.messages = 0
+        self.parsed = 0            # رسائل أنتجت إشارة واحدة على الأقل
+        self.signals = 0
+        self.rejected = Counter()  # أسباب الرفض المبكر (prefilter)
+        self.parse_ms_total = 0.0
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.outcomes = Counter()  # نتائج تمرير/تنفيذ الإشارات
+        self.last_message = None
+        self._recent = deque()     # أوقات الرسائل خلال نافذة المعدل
+
+    def record_message(self, now: float, parse_seconds: float, signals: int, rejected: Optional[str]):
+        self.messages += 1
+        self.last_message = now
+        if signals:
+            self.parsed += 1
+            self.signals += signals
+        if rejected:
+            self.rejected[rejected] += 1
+
+        parse_ms = parse_seconds * 1000
+        self.parse_ms_total += parse_ms
+        self.latency_buckets[bisect_left(LATENCY_BUCKETS_MS, parse_ms)] += 1
+
+        self._recent.append(now)
+        self._trim(now)
+
+    def _trim(self, now: float):
+        limit = now - self.RATE_WINDOW
+        recent = self._recent
+        while recent and recent[0] <= limit:
+            recent.popleft()
+
+    def messages_per_minute(self, now: float) -> float:
+        self._trim(now)
+        return len(self._recent) * 60.0 / self.RATE_WINDOW
+
+    def to_dict(self, now: float) -> Dict:
+        rejected = sum(self.rejected.values())
+        return {
+            'channel_id': self.channel_id,
+            'name': self.name,
+            'messages': self.messages,
+            'messages_per_minute': round(self.messages_per_minute(now), 2),
+            'parsed': self.parsed,
+            'signals': self.signals,
+            'parse_success_ratio': round(self.parsed / self.messages, 4) if self.messages else 0.0,
+            'prefilter_rejected': rejected,
+            'prefilter_reasons': dict(self.rejected),
+            'avg_parse_ms': round(self.parse_ms_total / self.messages, 3) if self.messages else 0.0,
+            'parse_ms_total': round(self.parse_ms_total, 3),
+            'parse_latency_histogram': dict(zip(_BUCKET_LABELS, self.latency_buckets)),
+            'outcomes': dict(self.outcomes),
+            'seconds_since_last_message': round(now - self.last_message, 1) if self.last_message else None
+        }
+
+
+class ChannelMetrics:
+    """
+    سجل الإحصائيات لجميع القنوات
+
+    مرحلة الاستقبال تستدعي record_message لكل رسالة و record_outcome لكل إشارة.
+    نتائج التنفيذ في MT5 تُسجل عبر record_signal_outcome بكائن الإشارة نفسه
+    (الإشارة تُربط بقناتها عند التحليل بـ bind_signal)
+    """
+
+    def __init__(self, max_bound_signals: int = 1000):
+        self._channels: Dict[int, ChannelStats] = {}
+        # id(الإشارة) -> (الإشارة، رقم القناة) - الإشارة محفوظة حتى لا يُعاد استخدام id
+        # لكائن آخر (محدود الحجم، الأقدم يُحذف أولاً)
+        self._signal_channels: 'OrderedDict[int, tuple]' = OrderedDict()
+        self.max_bound_signals = max_bound_signals
+
+    def _get(self, channel_id: int, name: str = None) -> ChannelStats:
+        stats = self._channels.get(channel_id)
+        if stats is None:
+            stats = self._channels[channel_id] = ChannelStats(channel_id, name)
+        elif name:
+            stats.name = name
+        return stats
+
+    def record_message(self, channel_id: int, name: str, parse_seconds: float,
+                       signals: int = 0, rejected: Optional[str] = None, now: float = None):
+        """
+        تسجيل رسالة محللة
+
+        Args:
+            channel_id: رقم القناة
+            name: اسم القناة
+            parse_seconds: زمن التحليل
+            signals: عدد الإشارات المستخرجة
+            rejected: سبب الرفض المبكر (إن رُفضت)
+        """
+        self._get(channel_id, name).record_message(
+            time.time() if now is None else now, parse_seconds, signals, rejected
+        )
+
+    def record_outcome(self, channel_id: int, outcome: str, count: int = 1):
+        """تسجيل نتيجة لإشارات القناة (dispatched, duplicate, stale, cancelled, error...)"""
+        if count:
+            self._get(channel_id).outcomes[outcome] += count
+
+    def bind_signal(self, signal, channel_id: int):
+        """ربط كائن إشارة بقناتها لتسجيل نتيجة تنفيذها لاحقاً"""
+        key = id(signal)
+        self._signal_channels[key] = (signal, channel_id)
+        self._signal_channels.move_to_end(key)
+        if len(self._signal_channels) > self.max_bound_signals:
+            self._signal_channels.popitem(last=False)
+
+    def record_signal_outcome(self, signal, outcome: str) -> bool:
+        """تسجيل نتيجة تنفيذ إشارة (executed, rejected, error...) لقناتها"""
+        bound = self._signal_channels.get(id(signal))
+        if bound is None or bound[0] is not signal:
+            return False
+        self.record_outcome(bound[1], outcome)
+        return True
+
+    def get_channel(self, channel_id: int) -> Optional[Dict]:
+        """إحصائيات قناة واحدة"""
+        stats = self._channels.get(channel_id)
+        return stats.to_dict(time.time()) if stats else None
+
+    def get_stats(self) -> List[Dict]:
+        """إحصائيات جميع القنوات (الأكثر استهلاكاً لزمن التحليل أولاً)"""
+        now = time.time()
+        channels = [stats.to_dict(now) for stats in self._channels.values()]
+        channels.sort(key=lambda ch: ch['parse_ms_total'], reverse=True)
+        return channels
+
+    def noisy_channels(self, min_messages: int = 50, max_success_ratio: float = 0.01) -> List[Dict]:
+        """القنوات التي أرسلت رسائل كثيرة دون إشارات تقريباً (مرشحة للتعطيل)"""
+        return [
+            ch for ch in self.get_stats()
+            if ch['messages'] >= min_messages and ch['parse_success_ratio'] <= max_success_ratio
+        ]
+
+    def snapshot(self) -> Dict:
+        """نسخة قابلة للحفظ في JSON"""
+        return {'updated_at': time.time(), 'channels': self.get_stats()}
+
+    def reset(self):
+        """مسح جميع الإحصائيات"""
+        self._channels.clear()
+        self._signal_channels.clear()
@@ -19,7 +19,11 @@ class Config:
     CHANNELS_FILE = 'data/channels.json'
     SIGNALS_FILE = 'data/signals.json'
     PATTERNS_FILE = 'data/patterns.json'
+    PRICE_RANGES_FILE = 'data/price_ranges.json'
+    SYMBOLS_INFO_FILE = 'data/symbols_info.json'
     SETTINGS_FILE = 'data/settings.json'
+    DIALOGS_CACHE_FILE = 'data/dialogs_cache.json'
+    CHANNEL_METRICS_FILE = 'data/channel_metrics.json'
 
     # Default Settings
     DEFAULT_SETTINGS = {
@@ -8,7 +8,7 @@
 import os
 import json
 from cryptography.fernet import Fernet
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 
 class CredentialManager:
@@ -146,6 +146,45 @@ class CredentialManager:
 
         return self.encrypt_credentials(credentials)
 
+    def save_telegram_account(self, name: str, api_id: str, api_hash: str, phone: str) -> bool:
+        """
+        حفظ حساب Telegram إضافي بشكل مشفر (يُستبدل الحساب بنفس الاسم)
+
+        Args:
+            name: اسم الحساب
+            api_id: API ID
+            api_hash: API Hash
+            phone: رقم الهاتف
+
+        Returns:
+            True إذا نجح الحفظ
+        """
+        credentials = self.decrypt_credentials() or {}
+
+        accounts = [acc for acc in credentials.get('telegram_accounts', []) if acc.get('name') != name]
+        accounts.append({
+            'name': name,
+            'api_id': api_id,
+            'api_hash': api_hash,
+            'phone': phone
+        })
+        credentials['telegram_accounts'] = accounts
+
+        return self.encrypt_credentials(credentials)
+
+    def remove_telegram_account(self, name: str) -> bool:
+        """حذف حساب Telegram إضافي"""
+        credentials = self.decrypt_credentials() or {}
+        credentials['telegram_accounts'] = [
+            acc for acc in credentials.get('telegram_accounts', []) if acc.get('name') != name
+        ]
+        return self.encrypt_credentials(credentials)
+
+    def get_telegram_accounts(self) -> List[Dict]:
+        """الحصول على حسابات Telegram الإضافية المحفوظة"""
+        credentials = self.decrypt_credentials()
+        return credentials.get('telegram_accounts', []) if credentials else []
+
     def get_telegram_credentials(self) -> Optional[Dict]:
         """الحصول على بيانات Telegram المحفوظة"""
         credentials = self.decrypt_credentials()
@@ -0,0 +1,30 @@
+"""
+أدوات الملفات المشتركة
+"""
+
+import json
+import os
+import tempfile
+
+
+def atomic_write_json(path: str, data, indent: int = 4):
+    """
+    كتابة JSON بشكل ذري: ملف مؤقت ثم إعادة تسمية
+
+    انقطاع البرنامج أثناء الكتابة لا يترك الملف مقطوعاً،
+    إما النسخة القديمة كاملة أو الجديدة كاملة. الملف المؤقت باسم فريد
+    في نفس المجلد، فكتابتان متزامنتان لنفس الملف لا تتداخلان.
+    """
+    directory, name = os.path.split(path)
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=directory or '.', prefix=f"{name}.",
+                                     suffix='.tmp', delete=False) as f:
+        tmp_file = f.name
+        try:
+            json.dump(data, f, indent=indent, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        except BaseException:
+            f.close()
+            os.remove(tmp_file)
+            raise
+    os.replace(tmp_file, path)
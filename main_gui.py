@@ -9,7 +9,7 @@ import re
 import traceback
 from datetime import datetime
 from config import Config
-from telegram_client import TelegramSignalClient
+from telegram_client import TelegramSignalClient, DEFAULT_ACCOUNT
 from mt5_manager import MT5Manager
 from signal_parser import Signal
 from encryption import CredentialManager
@@ -144,6 +144,9 @@ class TelegramMT5GUI:
 
         # البيانات
         self.received_signals = []
+        # id(الإشارة) -> (كائن الإشارة الحي، سجله في received_signals) لتحديث السجل عند تغيّر الإشارة
+        self._signal_records = {}
+        self.max_signal_records = 500
         self.signals_file = 'data/signals_history.json'
 
         # قائمة للرسائل المرفوضة (لتتبع الرسائل غير المفيدة)
@@ -152,6 +155,8 @@ class TelegramMT5GUI:
         # نظام إدارة الصفقات المعلقة
         self.pending_trades = []  # قائمة الصفقات التي فشل تنفيذها
         self.max_retry_attempts = 3  # عدد محاولات إعادة التنفيذ
+        # إعادة المحاولة المجدولة لكل إشارة (حتى لا ينتظر عامل التنفيذ بداخلها)
+        self._retry_handles = {}
 
         # تحميل بيانات الاعتماد المحفوظة
         self.load_saved_credentials()
@@ -487,7 +492,14 @@ class TelegramMT5GUI:
             command=self.connect_telegram, font=("Arial", 13),
             height=40, width=200
         )
-        self.telegram_connect_btn.pack(pady=20)
+        self.telegram_connect_btn.pack(pady=(20, 5))
+
+        # حسابات Telegram إضافية تغذي نفس خط المعالجة
+        ctk.CTkButton(
+            telegram_frame, text="➕ إضافة حساب Telegram",
+            command=self.show_add_telegram_account, font=("Arial", 13),
+            height=32, width=200, fg_color="#555555", hover_color="#444444"
+        ).pack(pady=(5, 20))
 
         # إعدادات MT5
         mt5_frame = ctk.CTkFrame(self.tab_settings)
@@ -784,6 +796,12 @@ class TelegramMT5GUI:
             self.telegram_client = TelegramSignalClient(api_id, api_hash, phone)
             self.telegram_client.set_signal_callback(self.on_signal_received)
             self.telegram_client.set_message_callback(self.on_message_received)
+            self.telegram_client.set_amendment_callback(self.on_signal_amended)
+            # الحسابات الإضافية المحفوظة تتصل مع الحساب الرئيسي وتغذي نفس خط المعالجة
+            for account in self.credential_manager.get_telegram_accounts():
+                await self.telegram_client.add_account(
+                    account['name'], account['api_id'], account['api_hash'], account['phone']
+                )
             success = await self.telegram_client.start()
 
             if success:
@@ -797,6 +815,78 @@ class TelegramMT5GUI:
 
         asyncio.run_coroutine_threadsafe(do_connect(), self.loop)
 
+    def show_add_telegram_account(self):
+        """نافذة إضافة حساب Telegram إضافي (قنواته تُحدد بحقل account في القناة)"""
+        account_window = ctk.CTkToplevel(self.root)
+        account_window.title("إضافة حساب Telegram")
+        account_window.geometry("460x520")
+
+        saved = [account['name'] for account in self.credential_manager.get_telegram_accounts()]
+        ctk.CTkLabel(
+            account_window,
+            text=f"الحسابات المحفوظة: {', '.join(saved) if saved else 'لا يوجد'}",
+            font=("Arial", 12)
+        ).pack(pady=(20, 10))
+
+        entries = {}
+        for key, label, placeholder in (
+            ('name', "اسم الحساب:", "مثال: second"),
+            ('api_id', "API ID:", "أدخل API ID"),
+            ('api_hash', "API Hash:", "أدخل API Hash"),
+            ('phone', "رقم الهاتف:", "+1234567890"),
+        ):
+            ctk.CTkLabel(account_window, text=label, font=("Arial", 13)).pack(anchor="w", padx=20, pady=(10, 0))
+            entries[key] = ctk.CTkEntry(account_window, width=400, placeholder_text=placeholder)
+            entries[key].pack(padx=20, pady=5)
+
+        ctk.CTkButton(
+            account_window, text="حفظ واتصال",
+            command=lambda: self.add_telegram_account(
+                *(entries[key].get().strip() for key in ('name', 'api_id', 'api_hash', 'phone')),
+                window=account_window
+            ),
+            font=("Arial", 13), height=40, width=200
+        ).pack(pady=20)
+
+    def add_telegram_account(self, name: str, api_id: str, api_hash: str, phone: str, window=None) -> bool:
+        """
+        حفظ حساب Telegram إضافي بشكل مشفر واتصاله فوراً إذا كان التليجرام متصلاً
+
+        الحساب المحفوظ يتصل تلقائياً مع كل اتصال بالتليجرام (انظر connect_telegram)
+        """
+        if not all([name, api_id, api_hash, phone]):
+            self.show_toast("يرجى ملء جميع حقول الحساب", "error")
+            return False
+
+        # الاسم يُستخدم في اسم ملف الجلسة
+        if name == DEFAULT_ACCOUNT or not re.fullmatch(r'[\w-]+', name):
+            self.show_toast("اسم الحساب غير صالح (أحرف وأرقام فقط، وليس main)", "error")
+            return False
+
+        if not self.credential_manager.save_telegram_account(name, api_id, api_hash, phone):
+            self.show_toast("فشل حفظ الحساب", "error")
+            return False
+
+        if window is not None:
+            window.destroy()
+
+        if not self.telegram_client or not self.telegram_client.is_connected:
+            self.show_toast(f"تم حفظ الحساب {name} - سيتصل عند الاتصال بالتليجرام", "success")
+            return True
+
+        self.show_toast(f"جاري اتصال الحساب {name}...", "info", 2000)
+
+        async def do_add():
+            success = await self.telegram_client.add_account(name, api_id, api_hash, phone)
+            if success:
+                self.root.after(0, lambda: self.show_toast(f"تم اتصال الحساب {name}", "success"))
+                self.root.after(0, self.refresh_channels)
+            else:
+                self.root.after(0, lambda: self.show_toast(f"فشل اتصال الحساب {name}", "error"))
+
+        asyncio.run_coroutine_threadsafe(do_add(), self.loop)
+        return True
+
     def connect_mt5(self):
         """الاتصال بـ MT5"""
         login = self.mt5_login_entry.get().strip()
@@ -1296,8 +1386,11 @@ class TelegramMT5GUI:
     async def on_signal_received(self, signal: Signal):
         """معالجة الإشارة المستلمة - محسّنة مع نظام إعادة المحاولة"""
         # حفظ الإشارة
-        signal_dict = signal.__dict__
+        signal_dict = signal.to_dict()
         self.received_signals.append(signal_dict)
+        self._signal_records[id(signal)] = (signal, signal_dict)
+        if len(self._signal_records) > self.max_signal_records:
+            self._signal_records.pop(next(iter(self._signal_records)))
         self.save_signals()
 
         # حفظ في التقرير اليومي
@@ -1326,11 +1419,16 @@ class TelegramMT5GUI:
         """تنفيذ الصفقة مع نظام إعادة المحاولة الذكي"""
         from datetime import datetime
 
+        # الإشارة أُلغيت من القناة أثناء انتظار إعادة المحاولة
+        if signal.status == 'cancelled':
+            print(f"⏭️ إلغاء إعادة المحاولة - الإشارة {signal.symbol} ملغاة")
+            return
+
         try:
             lot_size = float(self.lot_size_entry.get() or 0.01)
 
-            # محاولة التنفيذ الفورية
-            result = self.mt5_manager.execute_signal(signal, lot_size)
+            # محاولة التنفيذ الفورية (في thread MT5 - الاستقبال والتحليل يستمران أثناء الانتظار)
+            result = await self.mt5_manager.execute_signal_async(signal, lot_size)
 
             if result['success']:
                 # ===== نجح التنفيذ =====
@@ -1338,6 +1436,9 @@ class TelegramMT5GUI:
                 symbol_display = f"{signal.symbol} ({actual_symbol})" if actual_symbol != signal.symbol else signal.symbol
 
                 print(f"✅ تم تنفيذ الصفقة: {symbol_display} {signal.action} - Ticket: {result.get('ticket')}")
+                self._record_execution_outcome(signal, 'executed')
+                signal.status = 'executed'
+                self._refresh_signal_record(signal)
 
                 # حفظ الصفقة في التقرير اليومي
                 trade_data = {
@@ -1363,6 +1464,7 @@ class TelegramMT5GUI:
                 error_code = result.get('error_code', 0)
                 
                 print(f"❌ فشل تنفيذ الصفقة (محاولة {retry_count + 1}/{self.max_retry_attempts}): {error_msg}")
+                self._record_execution_outcome(signal, 'failed')
 
                 # ===== معالجة حالات خاصة =====
                 # حالة 1: التداول التلقائي معطل (10027)
@@ -1430,8 +1532,7 @@ class TelegramMT5GUI:
                         ))
                         
                         # إعادة المحاولة بعد 60 ثانية
-                        await asyncio.sleep(60)
-                        await self._execute_trade_with_retry(signal, signal_dict, retry_count + 1)
+                        self._schedule_retry(signal, signal_dict, retry_count + 1, 60)
                     return
                 
                 # ===== حالات عامة - إعادة محاولة عادية =====
@@ -1462,10 +1563,11 @@ class TelegramMT5GUI:
                     ))
 
                     # إعادة المحاولة بعد 10 ثوان
-                    await asyncio.sleep(10)
-                    await self._execute_trade_with_retry(signal, signal_dict, retry_count + 1)
+                    self._schedule_retry(signal, signal_dict, retry_count + 1, 10)
                 else:
                     # ===== فشل نهائي =====
+                    signal.status = 'failed'
+                    self._refresh_signal_record(signal)
                     self.root.after(0, lambda: self.show_toast(
                         f"❌ فشل تنفيذ صفقة {signal.symbol} بعد {self.max_retry_attempts} محاولات",
                         "error", 5000
@@ -1478,8 +1580,74 @@ class TelegramMT5GUI:
         except Exception as e:
             error_msg = f"خطأ في تنفيذ الصفقة: {str(e)}"
             print(f"❌ {error_msg}")
+            self._record_execution_outcome(signal, 'error')
             self.root.after(0, lambda: self.show_toast(error_msg, "error", 4000))
 
+    def _schedule_retry(self, signal: Signal, signal_dict: dict, retry_count: int, delay: float):
+        """
+        جدولة إعادة محاولة الصفقة بعد delay ثانية
+
+        الانتظار لا يتم داخل عامل التنفيذ: المؤقت يُطلق مهمة مستقلة عند انتهائه،
+        فالإشارات التالية وأوامر الإلغاء/الإغلاق لا تنتظر خلف صفقة فاشلة
+        """
+        self._cancel_retry(signal)
+        loop = asyncio.get_event_loop()
+
+        def fire():
+            self._retry_handles.pop(id(signal), None)
+            asyncio.ensure_future(self._execute_trade_with_retry(signal, signal_dict, retry_count))
+
+        self._retry_handles[id(signal)] = loop.call_later(delay, fire)
+
+    def _cancel_retry(self, signal: Signal):
+        """إلغاء إعادة المحاولة المجدولة للإشارة (إن وجدت)"""
+        handle = self._retry_handles.pop(id(signal), None)
+        if handle is not None:
+            handle.cancel()
+
+    def _refresh_signal_record(self, signal: Signal):
+        """تحديث سجل الإشارة (العرض والملف) بعد تغيّر كائنها الحي: الحالة أو SL/TP"""
+        entry = self._signal_records.get(id(signal))
+        # التحقق من الهوية: id قد يُعاد استخدامه بعد حذف كائن قديم
+        if entry is None or entry[0] is not signal:
+            return
+        entry[1].update(signal.to_dict())
+        self.save_signals()
+        self.root.after(0, self.refresh_signals)
+
+    def _record_execution_outcome(self, signal: Signal, outcome: str):
+        """تسجيل نتيجة التنفيذ في إحصائيات قناة الإشارة"""
+        if self.telegram_client:
+            self.telegram_client.record_execution_outcome(signal, outcome)
+
+    async def on_signal_amended(self, amendment):
+        """معالجة تعديل أو إلغاء إشارة سابقة (رسالة معدّلة/محذوفة أو رد عليها في القناة)"""
+        signal = amendment.signal
+
+        # إشارة لم تُنفذ بعد وما زالت في قائمة الانتظار
+        if amendment.kind in ('cancel', 'deleted'):
+            self._cancel_retry(signal)
+            self.pending_trades = [t for t in self.pending_trades if t['signal'] is not signal]
+
+        result = await self.mt5_manager.apply_signal_amendment_async(amendment)
+        self._refresh_signal_record(signal)
+
+        if amendment.kind == 'modify':
+            changes = ', '.join(amendment.changes)
+            msg = f"✏️ تعديل إشارة {signal.symbol}: {changes}"
+        elif amendment.kind == 'move_sl':
+            target = 'نقطة الدخول' if amendment.value is None else amendment.value
+            msg = f"📌 تحريك SL لصفقة {signal.symbol} إلى {target}"
+        elif amendment.kind == 'close':
+            msg = f"✂️ إغلاق {int((amendment.value or 1.0) * 100)}% من صفقة {signal.symbol}"
+        else:
+            msg = f"🗑️ إلغاء إشارة {signal.symbol}"
+
+        if result.get('tickets'):
+            msg += f" - الصفقات: {', '.join(str(t) for t in result['tickets'])}"
+        toast_type = "info" if result.get('success') else "warning"
+        self.root.after(0, lambda: self.show_toast(msg, toast_type, 4000))
+
     async def on_message_received(self, message_data: dict, signal: Signal = None):
         """معالجة جميع الرسائل الواردة (ناجحة أو فاشلة)"""
         # إضافة الرسالة للواجهة
@@ -1717,7 +1885,8 @@ class TelegramMT5GUI:
                     signal = pending['signal']
                     signal_dict = pending['signal_dict']
                     
-                    # إعادة تعيين العداد
+                    # إعادة تعيين العداد (وإلغاء المحاولة المجدولة حتى لا تُنفذ مرتين)
+                    self._cancel_retry(signal)
                     await self._execute_trade_with_retry(signal, signal_dict, 0)
                     retried += 1
                     
@@ -2235,7 +2404,7 @@ class TelegramMT5GUI:
         ctk.CTkButton(
             buttons_frame,
             text="تحديث",
-            command=lambda: self.load_all_channels(channels_scroll, channels_window),
+            command=lambda: self.load_all_channels(channels_scroll, channels_window, force_refresh=True),
             width=80
         ).pack(side="right", padx=5)
 
@@ -2305,8 +2474,8 @@ class TelegramMT5GUI:
         # تحميل القنوات
         self.load_all_channels(channels_scroll, channels_window)
 
-    def load_all_channels(self, scroll_frame, channels_window):
-        """تحميل جميع القنوات في الإطار"""
+    def load_all_channels(self, scroll_frame, channels_window, force_refresh: bool = False):
+        """تحميل جميع القنوات في الإطار (من الذاكرة المؤقتة ما لم يُطلب التحديث)"""
         # مسح المحتوى الحالي
         for widget in scroll_frame.winfo_children():
             widget.destroy()
@@ -2325,7 +2494,7 @@ class TelegramMT5GUI:
 
         # تحميل القنوات في thread منفصل
         async def do_load():
-            channels = await self.telegram_client.get_all_joined_channels()
+            channels = await self.telegram_client.get_all_joined_channels(force_refresh=force_refresh)
 
             # تحديث الواجهة
             self.root.after(0, lambda: self.display_all_channels(scroll_frame, channels))
@@ -0,0 +1,138 @@
+"""
+مصادر الرسائل لعميل Telegram
+المصدر يولّد أحداثاً بنفس شكل أحداث Telethon ويمررها لمعالج الرسائل،
+مما يسمح بتشغيل خط المعالجة كاملاً (استقبال -> تحليل -> callbacks) بدون حساب Telegram
+"""
+
+import asyncio
+import json
+from abc import ABC, abstractmethod
+import time
+import zlib
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+
+class ReplayMessage:
+    """رسالة بنفس الخصائص التي يستخدمها المعالج من رسالة Telethon"""
+
+    __slots__ = ('id', 'message', 'date', 'reply_to_msg_id')
+
+    def __init__(self, message_id: int, text: str, date: datetime = None, reply_to_msg_id: int = None):
+        self.id = message_id
+        self.message = text
+        self.date = date or datetime.now(timezone.utc)
+        self.reply_to_msg_id = reply_to_msg_id
+
+
+class ReplayEvent:
+    """حدث رسالة جديدة (event.chat_id + event.message)"""
+
+    __slots__ = ('chat_id', 'message')
+
+    def __init__(self, chat_id: int, message: ReplayMessage):
+        self.chat_id = chat_id
+        self.message = message
+
+
+class MessageSource(ABC):
+    """
+    واجهة مصدر الرسائل
+
+    المصدر يعرّف القنوات التي يرسل منها (channels) ويستدعي المعالج لكل حدث
+    """
+
+    def __init__(self):
+        self.channels: List[Dict] = []
+        self.sent = 0
+        self._stopped = False
+
+    @abstractmethod
+    async def run(self, handler: Callable[[object], Awaitable]):
+        """تشغيل المصدر حتى انتهاء الرسائل أو الإيقاف"""
+
+    def stop(self):
+        """إيقاف المصدر قبل انتهاء الرسائل"""
+        self._stopped = True
+
+
+class FileReplaySource(MessageSource):
+    """
+    إعادة تشغيل رسائل مسجلة من ملف JSON
+
+    الملف قائمة من النصوص أو من القواميس (raw_message أو message_text،
+    و channel_name اختيارياً) مثل data/signals_history.json. كل قناة في الملف
+    تحصل على معرف ثابت خاص بها حتى تعمل قوالب القنوات كما في التشغيل الحقيقي.
+    """
+
+    BASE_CHANNEL_ID = 9000000000
+
+    def __init__(self, file_path: str = 'data/signals_history.json', rate: Optional[float] = None,
+                 repeat: int = 1, limit: Optional[int] = None, default_channel: str = 'Replay'):
+        """
+        Args:
+            file_path: ملف الرسائل
+            rate: عدد الرسائل في الثانية (None = بأقصى سرعة)
+            repeat: عدد مرات تكرار الملف
+            limit: أقصى عدد رسائل من الملف
+            default_channel: اسم القناة للرسائل بدون channel_name
+        """
+        super().__init__()
+        self.file_path = file_path
+        self.rate = rate
+        self.repeat = max(1, repeat)
+        self.records = self._load(file_path, limit, default_channel)
+
+        # قناة لكل اسم (معرف ثابت من الاسم)
+        channel_ids = {}
+        for _, channel_name in self.records:
+            if channel_name not in channel_ids:
+                channel_ids[channel_name] = self.BASE_CHANNEL_ID + zlib.crc32(channel_name.encode('utf-8')) % 1000000
+        self._channel_ids = channel_ids
+        self.channels = [
+            {'id': channel_id, 'name': name, 'status': 'active', 'signal_count': 0, 'last_signal': None}
+            for name, channel_id in channel_ids.items()
+        ]
+
+    @staticmethod
+    def _load(file_path: str, limit: Optional[int], default_channel: str) -> List[tuple]:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        records = []
+        for item in data:
+            if isinstance(item, str):
+                text, channel_name = item, default_channel
+            else:
+                text = item.get('raw_message') or item.get('message_text')
+                channel_name = item.get('channel_name') or default_channel
+            if text:
+                records.append((text, channel_name))
+            if limit and len(records) >= limit:
+                break
+        return records
+
+    async def run(self, handler: Callable[[object], Awaitable]):
+        """إرسال الرسائل كأحداث بالمعدل المحدد"""
+        interval = 1.0 / self.rate if self.rate else 0.0
+        start = time.perf_counter()
+        message_id = 0
+
+        for _ in range(self.repeat):
+            for text, channel_name in self.records:
+                if self._stopped:
+                    return
+
+                if interval:
+                    # جدولة ثابتة حتى لا يتراكم التأخير
+                    delay = start + message_id * interval - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                elif message_id % 100 == 0:
+                    # بأقصى سرعة: إفساح المجال لعمال خط المعالجة
+                    await asyncio.sleep(0)
+
+                message_id += 1
+                chat_id = int(f"-100{self._channel_ids[channel_name]}")
+                await handler(ReplayEvent(chat_id, ReplayMessage(message_id, text)))
+                self.sent += 1
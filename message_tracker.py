@@ -0,0 +1,268 @@
+"""
+تتبع رسائل الإشارات حسب (القناة، رقم الرسالة)
+يسمح بتطبيق تعديل أو حذف الرسالة على الإشارة الأصلية بدلاً من فتح صفقة جديدة،
+وتحويل الردود على رسالة الإشارة (تحريك SL، إغلاق النصف...) إلى أوامر على صفقتها
+"""
+
+import re
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from signal_parser import Signal
+
+
+# الحقول التي يمكن تعديلها على صفقة قائمة (SL/TP أو سعر أمر معلق)
+AMENDABLE_FIELDS = ('entry_price', 'entry_price_range', 'take_profits', 'stop_loss')
+
+# كلمات إلغاء الإشارة في الرسائل المعدّلة
+_CANCEL_RE = re.compile(
+    r'\b(?:CANCEL(?:L?ED)?|VOID|DELETED?|IGNORE\s+(?:THIS|SIGNAL))\b|ملغ[يىاة]|إلغاء|الغاء|تم\s+الإلغاء',
+    re.IGNORECASE
+)
+
+
+# ===== أوامر الردود على رسالة الإشارة =====
+_SL_WORD = r'(?:SL|S/L|STOP\s*LOSS|STOP|ستوب|الستوب|وقف\s*الخسارة)'
+_SL_TO = r'\s*(?:TO|AT|@|=|:|ON|الى|إلى|على|عند)?\s*'
+
+# تحريك SL لنقطة الدخول: صيغة أمر فقط ("SL to BE"، "move to entry")، فكلمة BE وحدها
+# لا تكفي حتى لا تطابق تعليقات مثل "TP2 WILL BE HIT" أو "BE READY"
+_BE_WORD = (r'(?:(?-i:\bBE\b)|\bB/E\b|\bBREAK\s*-?\s*EVEN\b|\bENTRY\b|\bOPEN\b|'
+            r'سعر\s*الدخول|نقطة\s*الدخول|الدخول)')
+_MOVE_WORD = r'(?:\b(?:MOVE|SET|PUT|SHIFT)\b|حرك|حرّك|انقل|ضع)'
+_BREAKEVEN_RE = re.compile(
+    _SL_WORD + _SL_TO + _BE_WORD + '|' + _MOVE_WORD + r'\s*(?:' + _SL_WORD + r')?' + _SL_TO + _BE_WORD,
+    re.IGNORECASE
+)
+_SL_TO_TP_RE = re.compile(_SL_WORD + _SL_TO + r'TP\s*(\d)', re.IGNORECASE)
+_SL_TO_PRICE_RE = re.compile(_SL_WORD + _SL_TO + r'(\d+(?:\.\d+)?)', re.IGNORECASE)
+
+_CLOSE_WORD = r'(?:\bCLOSE\b|\bEXIT\b|اغلاق|إغلاق|اغلق|أغلق|اقفل|أقفل|سكّر|سكر)'
+_CLOSE_PARTIAL_RE = re.compile(
+    _CLOSE_WORD + r'\s*(?:(?P<half>HALF|PARTIAL(?:LY)?|(?:ال)?نصف|جزئي)|(?P<percent>\d{1,2})\s*%)|'
+    r'\b(?:TAKE|SECURE)\s*(?:PARTIAL|HALF)\b',
+    re.IGNORECASE
+)
+# الإغلاق الكامل: صيغة صريحة ("close now"، "close all"، "اغلق الصفقة") أو رسالة من
+# كلمة الإغلاق وحدها - "Close to TP1" أو "price is close to TP" ليست أمراً
+_CLOSE_ALL_RE = re.compile(
+    _CLOSE_WORD + r'\s+(?:ALL|NOW|IT|(?:THE\s+)?TRADES?|(?:THE\s+)?POSITIONS?|'
+    r'الصفق(?:ة|ات)|الكل|الآن|الان|جميع|كامل)(?!\w)|'
+    r'\A[^\w]*' + _CLOSE_WORD + r'[^\w]*\Z',
+    re.IGNORECASE
+)
+
+
+def parse_reply_command(message_text: str, signal: Signal) -> List[Tuple[str, Optional[float]]]:
+    """
+    استخراج الأوامر من رد على رسالة إشارة
+
+    Args:
+        message_text: نص الرد
+        signal: الإشارة الأصلية (لحل TP1/TP2...)
+
+    Returns:
+        قائمة (الأمر، القيمة):
+            - ('move_sl', None): تحريك SL لنقطة الدخول
+            - ('move_sl', سعر): تحريك SL لسعر محدد
+            - ('close', نسبة): إغلاق نسبة من الصفقة (1.0 = الكل)
+    """
+    if not message_text:
+        return []
+
+    commands = []
+
+    match = _SL_TO_TP_RE.search(message_text)
+    if match:
+        index = int(match.group(1)) - 1
+        if 0 <= index < len(signal.take_profits):
+            commands.append(('move_sl', float(signal.take_profits[index])))
+    elif _BREAKEVEN_RE.search(message_text):
+        commands.append(('move_sl', None))
+    else:
+        match = _SL_TO_PRICE_RE.search(message_text)
+        if match:
+            commands.append(('move_sl', float(match.group(1))))
+
+    match = _CLOSE_PARTIAL_RE.search(message_text)
+    if match:
+        percent = match.group('percent')
+        commands.append(('close', int(percent) / 100 if percent else 0.5))
+    elif _CLOSE_ALL_RE.search(message_text):
+        commands.append(('close', 1.0))
+
+    return commands
+
+
+def is_cancel_message(message_text: str) -> bool:
+    """هل النص يعلن إلغاء الإشارة"""
+    return bool(message_text) and _CANCEL_RE.search(message_text) is not None
+
+
+def diff_signals(old: Signal, new: Signal) -> Dict[str, Tuple]:
+    """
+    مقارنة إشارتين في الحقول القابلة للتعديل
+
+    Returns:
+        {اسم الحقل: (القيمة القديمة, القيمة الجديدة)} للحقول المختلفة فقط
+    """
+    changes = {}
+    for name in AMENDABLE_FIELDS:
+        old_value = getattr(old, name)
+        new_value = getattr(new, name)
+        if old_value != new_value:
+            changes[name] = (old_value, new_value)
+    return changes
+
+
+@dataclass
+class SignalAmendment:
+    """
+    تعديل على إشارة سبق استلامها
+
+    kind:
+        - modify: تغيّرت قيم SL/TP/الدخول (signal حُدّثت بالقيم الجديدة)
+        - cancel: الرسالة عُدّلت لتعلن الإلغاء
+        - deleted: الرسالة حُذفت من القناة
+        - move_sl: رد على الإشارة بتحريك SL (value = السعر أو None لنقطة الدخول)
+        - close: رد على الإشارة بالإغلاق (value = النسبة المغلقة من الحجم)
+    """
+    kind: str
+    channel_id: int
+    message_id: int
+    signal: Signal
+    changes: Dict[str, Tuple] = field(default_factory=dict)
+    value: Optional[float] = None
+
+
+class MessageTracker:
+    """
+    فهرس الرسائل لكل قناة: رقم الرسالة -> الإشارات المستخرجة منها
+
+    الفهرس محدود الحجم لكل قناة (الأقدم يُحذف أولاً)، والإشارات المخزنة هي
+    نفس الكائنات التي مُررت للتنفيذ حتى يصل التعديل للصفقة المرتبطة بها
+    """
+
+    def __init__(self, max_messages_per_channel: int = 500):
+        self.max_messages_per_channel = max_messages_per_channel
+        self._channels: Dict[int, 'OrderedDict[int, List[Signal]]'] = {}
+        # المجموعات العادية (أرقام رسائلها مشتركة مع المحادثات الخاصة للحساب)
+        self._basic_groups = set()
+
+    def track(self, channel_id: int, message_id: int, signals: List[Signal], basic_group: bool = False):
+        """
+        تسجيل إشارات رسالة
+
+        Args:
+            basic_group: الرسالة من مجموعة عادية (وليس قناة أو مجموعة خارقة)
+        """
+        if not signals or message_id is None:
+            return
+        if basic_group:
+            self._basic_groups.add(channel_id)
+        messages = self._channels.setdefault(channel_id, OrderedDict())
+        messages[message_id] = list(signals)
+        messages.move_to_end(message_id)
+        if len(messages) > self.max_messages_per_channel:
+            messages.popitem(last=False)
+
+    def get_signals(self, channel_id: int, message_id: int) -> Optional[List[Signal]]:
+        """إشارات رسالة مسجلة (None إذا لم تكن مسجلة)"""
+        messages = self._channels.get(channel_id)
+        if messages is None:
+            return None
+        return messages.get(message_id)
+
+    def forget(self, channel_id: Optional[int], message_id: int) -> Tuple[Optional[int], Optional[List[Signal]]]:
+        """
+        إزالة رسالة من الفهرس
+
+        Telegram لا يرسل رقم المحادثة مع الحذف في المجموعات العادية والمحادثات
+        الخاصة، وعندها يتم البحث في المجموعات العادية فقط: أرقام رسائل القنوات
+        مستقلة، فنفس الرقم في محادثة خاصة لا علاقة له برسالة القناة
+
+        Returns:
+            (رقم القناة, الإشارات) أو (None, None)
+        """
+        if channel_id is not None:
+            messages = self._channels.get(channel_id)
+            signals = messages.pop(message_id, None) if messages else None
+            return (channel_id, signals) if signals else (None, None)
+
+        for cid in self._basic_groups:
+            messages = self._channels.get(cid)
+            signals = messages.pop(message_id, None) if messages else None
+            if signals:
+                return cid, signals
+        return None, None
+
+    def amend(self, channel_id: int, message_id: int, message_text: str,
+              new_signals: List[Signal]) -> Optional[List[SignalAmendment]]:
+        """
+        مقارنة رسالة معدّلة مع إشاراتها المسجلة
+
+        الإشارة الجديدة تُطابق مع القديمة حسب (الرمز، نوع الصفقة)، ويتم تحديث
+        كائن الإشارة القديم بالقيم الجديدة في مكانه
+
+        Returns:
+            قائمة التعديلات (قد تكون فارغة) أو None إذا لم تكن الرسالة مسجلة
+        """
+        old_signals = self.get_signals(channel_id, message_id)
+        if old_signals is None:
+            return None
+
+        if is_cancel_message(message_text):
+            self.forget(channel_id, message_id)
+            amendments = []
+            for signal in old_signals:
+                signal.status = 'cancelled'
+                amendments.append(SignalAmendment('cancel', channel_id, message_id, signal))
+            return amendments
+
+        by_key = {(s.symbol, s.action): s for s in new_signals}
+        amendments = []
+        for signal in old_signals:
+            new = by_key.get((signal.symbol, signal.action))
+            if new is None:
+                continue
+            changes = diff_signals(signal, new)
+            if not changes:
+                continue
+            for name, (_, value) in changes.items():
+                setattr(signal, name, value)
+            signal.raw_message = new.raw_message
+            amendments.append(SignalAmendment('modify', channel_id, message_id, signal, changes))
+        return amendments
+
+    def delete(self, channel_id: Optional[int], message_id: int) -> List[SignalAmendment]:
+        """تسجيل حذف رسالة وإرجاع تعديلات الحذف لإشاراتها"""
+        channel_id, signals = self.forget(channel_id, message_id)
+        if not signals:
+            return []
+        amendments = []
+        for signal in signals:
+            signal.status = 'cancelled'
+            amendments.append(SignalAmendment('deleted', channel_id, message_id, signal))
+        return amendments
+
+    def reply(self, channel_id: int, reply_to_id: int, message_text: str) -> Optional[List[SignalAmendment]]:
+        """
+        تحويل رد على رسالة إشارة إلى أوامر على إشاراتها
+
+        Returns:
+            قائمة الأوامر (قد تكون فارغة) أو None إذا لم يكن الرد على رسالة مسجلة
+        """
+        signals = self.get_signals(channel_id, reply_to_id)
+        if signals is None:
+            return None
+
+        commands = []
+        for signal in signals:
+            for kind, value in parse_reply_command(message_text, signal):
+                commands.append(SignalAmendment(kind, channel_id, reply_to_id, signal, value=value))
+        return commands
+
+    def get_stats(self) -> Dict:
+        """عدد الرسائل المسجلة لكل قناة"""
+        return {channel_id: len(messages) for channel_id, messages in self._channels.items()}
@@ -0,0 +1,101 @@
+"""
+منفذ عمليات MT5 في thread مخصص
+مكتبة MetaTrader5 متزامنة (order_send و symbol_info_tick قد تنتظر المنصة)، لذلك
+تُنفذ عمليات التداول بالتسلسل في thread واحد، وحلقة asyncio تنتظر النتيجة
+كـ future دون أن تتوقف عن استقبال وتحليل الرسائل
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict
+
+
+class MT5Executor:
+    """
+    thread واحد يملك استدعاءات MT5
+
+    - submit: وضع استدعاء في الطابور وإرجاع concurrent Future
+    - run: واجهة async (await) لنفس الاستدعاء
+    - call: استدعاء متزامن من thread آخر (أو مباشر إذا كنا داخل thread MT5)
+    """
+
+    def __init__(self, name: str = 'mt5'):
+        self.name = name
+        self._thread_id = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name,
+                                            initializer=self._init_thread)
+        self._lock = threading.Lock()
+        self.stats = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'wait_ms_total': 0.0,
+            'run_ms_total': 0.0,
+            'max_run_ms': 0.0
+        }
+
+    def _init_thread(self):
+        self._thread_id = threading.get_ident()
+
+    def in_executor_thread(self) -> bool:
+        """هل الاستدعاء الحالي داخل thread MT5"""
+        return threading.get_ident() == self._thread_id
+
+    def _timed(self, fn: Callable, submitted_at: float, args, kwargs):
+        """تنفيذ الاستدعاء وتسجيل زمن الانتظار والتنفيذ"""
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            with self._lock:
+                self.stats['failed'] += 1
+            raise
+        finally:
+            finished = time.perf_counter()
+            run_ms = (finished - started) * 1000
+            with self._lock:
+                self.stats['completed'] += 1
+                self.stats['wait_ms_total'] += (started - submitted_at) * 1000
+                self.stats['run_ms_total'] += run_ms
+                self.stats['max_run_ms'] = max(self.stats['max_run_ms'], run_ms)
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """وضع استدعاء في طابور thread MT5"""
+        with self._lock:
+            self.stats['submitted'] += 1
+        return self._executor.submit(self._timed, fn, time.perf_counter(), args, kwargs)
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """تنفيذ استدعاء في thread MT5 وانتظار نتيجته دون إيقاف حلقة الأحداث"""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def call(self, fn: Callable, *args, **kwargs):
+        """
+        تنفيذ استدعاء في thread MT5 وانتظار نتيجته (من thread عادي)
+
+        من داخل thread MT5 يُنفذ مباشرة، لأن الانتظار على نفس الطابور يسبب توقفاً دائماً
+        """
+        if self.in_executor_thread():
+            return fn(*args, **kwargs)
+        return self.submit(fn, *args, **kwargs).result()
+
+    def shutdown(self, wait: bool = False):
+        """إيقاف thread MT5 (الاستدعاءات المعلقة تُنفذ إذا wait=True)"""
+        self._executor.shutdown(wait=wait)
+
+    def get_stats(self) -> Dict:
+        """إحصائيات الطابور: المعلق، ومتوسط زمن الانتظار والتنفيذ"""
+        with self._lock:
+            stats = dict(self.stats)
+        completed = stats['completed']
+        return {
+            'submitted': stats['submitted'],
+            'completed': completed,
+            'failed': stats['failed'],
+            'pending': stats['submitted'] - completed,
+            'avg_wait_ms': round(stats['wait_ms_total'] / completed, 3) if completed else 0.0,
+            'avg_run_ms': round(stats['run_ms_total'] / completed, 3) if completed else 0.0,
+            'max_run_ms': round(stats['max_run_ms'], 3)
+        }
@@ -4,7 +4,10 @@ from datetime import datetime
 import time
 import json
 import os
+from config import Config
 from signal_parser import Signal
+from mt5_executor import MT5Executor
+from tick_cache import TickCache
 from threading import Thread, Lock
 
 try:
@@ -12,13 +15,78 @@ try:
 except ImportError:
     MT5AutoConnector = None
 
+
+# أخطاء order_send التي تعني أن خصائص الرمز المحفوظة في القالب قد تغيّرت
+TEMPLATE_INVALIDATING_RETCODES = frozenset({10014, 10016, 10017, 10018, 10023, 10030})
+
+
+class OrderTemplate:
+    """
+    بيانات الأمر المحسوبة مسبقاً لرمز واحد
+
+    اسم الرمز الفعلي في المنصة وخصائص الحجم والأرقام و Stop Level ونوع التعبئة
+    والحقول الثابتة للطلب، حتى لا يحتاج التنفيذ إلا لسعر لحظي (tick) وتعبئة
+    السعر و SL/TP والحجم
+    """
+
+    __slots__ = ('symbol', 'actual_symbol', 'symbol_info', 'fingerprint', 'created_at',
+                 'digits', 'point', 'stops_level', 'min_distance',
+                 'volume_min', 'volume_max', 'volume_step',
+                 'trade_allowed', 'trade_expert', 'type_filling', 'request_base')
+
+    def __init__(self, symbol: str, actual_symbol: str, symbol_info, fingerprint: Tuple, created_at: float):
+        self.symbol = symbol
+        self.actual_symbol = actual_symbol
+        self.symbol_info = symbol_info
+        self.fingerprint = fingerprint
+        self.created_at = created_at
+
+        self.digits = symbol_info.digits
+        self.point = symbol_info.point
+        self.stops_level = symbol_info.trade_stops_level
+        self.min_distance = self.stops_level * self.point
+        self.volume_min = symbol_info.volume_min
+        self.volume_max = symbol_info.volume_max
+        self.volume_step = symbol_info.volume_step
+        self.trade_allowed = symbol_info.trade_allowed
+        self.trade_expert = getattr(symbol_info, 'trade_expert', True)
+
+        # نوع التعبئة المدعوم من الرمز (للأوامر المعلقة)
+        filling_mode = symbol_info.filling_mode
+        if filling_mode & 1:  # ORDER_FILLING_FOK
+            self.type_filling = mt5.ORDER_FILLING_FOK
+        elif filling_mode & 2:  # ORDER_FILLING_IOC
+            self.type_filling = mt5.ORDER_FILLING_IOC
+        else:  # ORDER_FILLING_RETURN (default)
+            self.type_filling = mt5.ORDER_FILLING_RETURN
+
+        # الحقول الثابتة لطلب التداول
+        self.request_base = {
+            "symbol": actual_symbol,  # استخدام الرمز الفعلي من المنصة
+            "deviation": 20,
+            "magic": 234000,
+            "type_time": mt5.ORDER_TIME_GTC,
+        }
+
+
 class MT5Manager:
     def __init__(self):
         self.is_connected = False
         self.account_info = None
         self.active_positions = {}
         self.trade_history = []
+        self._live_signals: Dict[int, Signal] = {}  # كائنات الإشارات الحية لكل تذكرة
+        self._signal_tickets: Dict[int, List[int]] = {}  # id(الإشارة) -> التذاكر المرتبطة بها
         self.lock = Lock()
+        # thread واحد لعمليات التداول (الأوامر، التعديلات، Trailing Stop) - انظر *_async
+        self.executor = MT5Executor()
+        # الأسعار اللحظية المشتركة بين التحقق والتنفيذ والإغلاق (أقصى عمر 100ms)
+        # ويغذيها poller خلفي لرموز الصفقات المفتوحة ورموز tick_watchlist
+        self.tick_cache = TickCache(mt5.symbol_info_tick, max_age=0.1)
+        self.tick_poll_interval = 0.08
+        self.tick_watchlist = set()
+        self.tick_poller_thread = None
+        self.tick_poller_active = False
         self.trailing_thread = None
         self.trailing_active = False
         self.trades_file = 'data/trades.json'
@@ -29,9 +97,14 @@ class MT5Manager:
 
         # ذاكرة تخزين مؤقت لأسماء الرموز (لتسريع البحث)
         self.symbol_cache = {}
+
+        # قوالب الأوامر لكل رمز (تُحدّث بعد order_template_ttl ثانية أو عند تغيّر خصائص الرمز)
+        self._order_templates: Dict[str, OrderTemplate] = {}
+        self.order_template_ttl = 300.0
+        self.template_stats = {'hits': 0, 'built': 0, 'revalidated': 0, 'invalidated': 0}
         
         # ملف حفظ خصائص الرموز
-        self.symbols_info_file = 'data/symbols_info.json'
+        self.symbols_info_file = Config.SYMBOLS_INFO_FILE
 
     def connect(self, login: int, password: str, server: str) -> bool:
         """الاتصال بـ MT5"""
@@ -77,8 +150,9 @@ class MT5Manager:
             print(f"   الرصيد: {self.account_info.balance} USD")
             print(f"   الرافعة: 1:{self.account_info.leverage}")
 
-            # بدء نظام Trailing Stop
+            # بدء نظام Trailing Stop وتحديث الأسعار في الخلفية
             self.start_trailing_stop()
+            self.start_tick_poller()
 
             return True
 
@@ -91,8 +165,11 @@ class MT5Manager:
         self.trailing_active = False
         if self.trailing_thread:
             self.trailing_thread.join(timeout=5)
+        self.stop_tick_poller()
 
-        mt5.shutdown()
+        # بعد انتهاء أي أمر قيد التنفيذ في thread MT5
+        self.executor.call(mt5.shutdown)
+        self.tick_cache.invalidate()
         self.is_connected = False
         print("⚠️ تم قطع الاتصال بـ MT5")
 
@@ -196,8 +273,9 @@ class MT5Manager:
                     print(f"   الرصيد: {account_data['balance']} {account_data['currency']}")
                     print(f"   الرافعة: 1:{account_data['leverage']}")
 
-                    # بدء نظام Trailing Stop
+                    # بدء نظام Trailing Stop وتحديث الأسعار في الخلفية
                     self.start_trailing_stop()
+                    self.start_tick_poller()
 
                     return True
                 else:
@@ -216,6 +294,10 @@ class MT5Manager:
             return False
 
     def get_available_symbols(self, search_term: str = "") -> List[str]:
+        """قائمة الرموز المتاحة (تُقرأ في thread MT5)"""
+        return self.executor.call(self._get_available_symbols, search_term)
+
+    def _get_available_symbols(self, search_term: str = "") -> List[str]:
         """
         الحصول على قائمة الرموز المتاحة في المنصة
         يمكن تصفية النتائج باستخدام search_term
@@ -242,8 +324,88 @@ class MT5Manager:
     def clear_symbol_cache(self):
         """مسح ذاكرة التخزين المؤقت للرموز"""
         self.symbol_cache.clear()
+        self._order_templates.clear()
         print("✅ تم مسح ذاكرة الرموز المؤقتة")
 
+    @staticmethod
+    def _symbol_fingerprint(symbol_info) -> Tuple:
+        """بصمة خصائص الرمز التي يعتمد عليها قالب الأمر (وظهوره في Market Watch)"""
+        return (
+            symbol_info.digits, symbol_info.point, symbol_info.trade_stops_level,
+            symbol_info.volume_min, symbol_info.volume_max, symbol_info.volume_step,
+            symbol_info.filling_mode, symbol_info.trade_allowed,
+            getattr(symbol_info, 'trade_expert', True), getattr(symbol_info, 'trade_mode', None),
+            getattr(symbol_info, 'visible', True)
+        )
+
+    def get_order_template(self, symbol: str, refresh: bool = False) -> Optional[OrderTemplate]:
+        """
+        قالب الأمر للرمز من الذاكرة، أو بناؤه من خصائص الرمز في المنصة
+
+        بعد انتهاء الصلاحية تُقارن بصمة خصائص الرمز: إذا لم تتغير يُمدد القالب كما هو
+
+        Args:
+            symbol: الرمز كما في الإشارة
+            refresh: تجاهل الصلاحية وإعادة قراءة خصائص الرمز
+
+        Returns:
+            OrderTemplate أو None إذا لم يوجد الرمز
+        """
+        template = self._order_templates.get(symbol)
+        now = time.monotonic()
+        if template is not None and not refresh and now - template.created_at < self.order_template_ttl:
+            self.template_stats['hits'] += 1
+            return template
+
+        actual_symbol = self.find_symbol_in_platform(symbol)
+        symbol_info = mt5.symbol_info(actual_symbol) if actual_symbol else None
+        if symbol_info is None:
+            self._order_templates.pop(symbol, None)
+            return None
+
+        fingerprint = self._symbol_fingerprint(symbol_info)
+        if template is not None and template.actual_symbol == actual_symbol and template.fingerprint == fingerprint:
+            template.created_at = now
+            template.symbol_info = symbol_info
+            self.template_stats['revalidated'] += 1
+            return template
+
+        # تفعيل الرمز في Market Watch عند بناء القالب (أو بعد إخفائه - visible جزء من البصمة)
+        if not symbol_info.visible:
+            if mt5.symbol_select(actual_symbol, True):
+                fingerprint = fingerprint[:-1] + (True,)
+            else:
+                print(f"⚠️ فشل تفعيل الرمز {actual_symbol} في Market Watch")
+
+        template = OrderTemplate(symbol, actual_symbol, symbol_info, fingerprint, now)
+        self._order_templates[symbol] = template
+        self.template_stats['built'] += 1
+        return template
+
+    def invalidate_order_template(self, symbol: Optional[str] = None):
+        """حذف قالب رمز (أو جميع القوالب) ليُعاد بناؤه في التنفيذ القادم"""
+        if symbol is None:
+            self._order_templates.clear()
+        elif self._order_templates.pop(symbol, None) is not None:
+            self.template_stats['invalidated'] += 1
+
+    def refresh_order_templates(self, max_age: Optional[float] = None):
+        """
+        تحديث القوالب القريبة من انتهاء صلاحيتها (خارج مسار التنفيذ)
+
+        Args:
+            max_age: عمر القالب الذي يُحدّث بعده (الافتراضي: 80% من الصلاحية)
+        """
+        max_age = self.order_template_ttl * 0.8 if max_age is None else max_age
+        now = time.monotonic()
+        for symbol, template in list(self._order_templates.items()):
+            if now - template.created_at >= max_age:
+                self.get_order_template(symbol, refresh=True)
+
+    def warm_order_templates(self, symbols: List[str]) -> int:
+        """بناء قوالب الرموز مسبقاً (مثلاً بعد الاتصال) - يعيد عدد القوالب الجاهزة"""
+        return sum(1 for symbol in symbols if self.get_order_template(symbol) is not None)
+
     def find_symbol_in_platform(self, base_symbol: str) -> Optional[str]:
         """
         البحث الذكي عن الرمز في المنصة مع مراعاة اللواحق والبادئات
@@ -317,6 +479,8 @@ class MT5Manager:
                                   take_profit: Optional[float], order_type: str = "MARKET") -> Dict:
         """
         التحقق الشامل من شروط التداول قبل تنفيذ الصفقة
+
+        خصائص الرمز تُقرأ من قالب الأمر (get_order_template)، والسعر اللحظي فقط يُطلب من المنصة
         
         Returns:
             Dict مع 'valid': bool و 'errors': List[str] و 'warnings': List[str]
@@ -325,54 +489,70 @@ class MT5Manager:
         warnings = []
         
         try:
-            # 1. التحقق من وجود الرمز
-            actual_symbol = self.find_symbol_in_platform(symbol)
-            if not actual_symbol:
+            # 1. التحقق من وجود الرمز وخصائصه (من قالب الأمر)
+            template = self.get_order_template(symbol)
+            if template is None:
                 errors.append(f"❌ الرمز {symbol} غير موجود في المنصة")
                 return {'valid': False, 'errors': errors, 'warnings': warnings}
-            
-            # 2. الحصول على معلومات الرمز
-            symbol_info = mt5.symbol_info(actual_symbol)
-            if symbol_info is None:
-                errors.append(f"❌ فشل الحصول على معلومات الرمز {actual_symbol}")
+
+            # 2. الحصول على السعر الحالي (من ذاكرة الأسعار إذا كان حديثاً)
+            tick = self.tick_cache.get(template.actual_symbol)
+            if tick is None:
+                # الرمز قد أُخفي من Market Watch: إعادة تفعيله، والقالب يُبنى من جديد في المرة القادمة
+                self.invalidate_order_template(symbol)
+                if mt5.symbol_select(template.actual_symbol, True):
+                    tick = self.tick_cache.get(template.actual_symbol)
+            if tick is None:
+                errors.append(f"❌ فشل الحصول على السعر الحالي للرمز {template.actual_symbol}")
                 return {'valid': False, 'errors': errors, 'warnings': warnings}
-            
+
+            return self.check_trade_conditions(template, tick, action, lot_size, entry_price,
+                                               stop_loss, take_profit, order_type)
+
+        except Exception as e:
+            errors.append(f"❌ خطأ في التحقق: {str(e)}")
+            return {'valid': False, 'errors': errors, 'warnings': warnings}
+
+    def check_trade_conditions(self, template: OrderTemplate, tick, action: str, lot_size: float,
+                               entry_price: Optional[float], stop_loss: Optional[float],
+                               take_profit: Optional[float], order_type: str = "MARKET") -> Dict:
+        """التحقق من شروط التداول بخصائص القالب وسعر لحظي (بدون استدعاءات للمنصة)"""
+        errors = []
+        warnings = []
+        actual_symbol = template.actual_symbol
+        symbol_info = template.symbol_info
+
+        try:
             # 3. التحقق من أن التداول مسموح
-            if not symbol_info.trade_allowed:
+            if not template.trade_allowed:
                 errors.append(f"❌ التداول غير مسموح على الرمز {actual_symbol}")
                 errors.append("   السبب المحتمل: السوق مغلق أو الرمز معطل")
             
             # 4. التحقق من التداول عبر الخبراء
-            if hasattr(symbol_info, 'trade_expert') and not symbol_info.trade_expert:
+            if not template.trade_expert:
                 errors.append(f"❌ التداول عبر الخبراء غير مسموح على {actual_symbol}")
                 errors.append("   يجب تفعيل 'Allow Algo Trading' في إعدادات الرمز")
             
             # 5. التحقق من حجم الصفقة
-            if lot_size < symbol_info.volume_min:
-                errors.append(f"❌ حجم الصفقة ({lot_size}) أقل من الحد الأدنى ({symbol_info.volume_min})")
-            elif lot_size > symbol_info.volume_max:
-                errors.append(f"❌ حجم الصفقة ({lot_size}) أكبر من الحد الأقصى ({symbol_info.volume_max})")
+            if lot_size < template.volume_min:
+                errors.append(f"❌ حجم الصفقة ({lot_size}) أقل من الحد الأدنى ({template.volume_min})")
+            elif lot_size > template.volume_max:
+                errors.append(f"❌ حجم الصفقة ({lot_size}) أكبر من الحد الأقصى ({template.volume_max})")
             
             # التحقق من خطوة الحجم
-            step = symbol_info.volume_step
+            step = template.volume_step
             remainder = round((lot_size / step) - int(lot_size / step), 10)
             if remainder > 0.0001:  # هامش صغير للخطأ العشري
                 correct_size = round(lot_size / step) * step
                 warnings.append(f"⚠️ حجم الصفقة يجب أن يكون من مضاعفات {step}")
                 warnings.append(f"   القيمة المقترحة: {correct_size}")
             
-            # 6. الحصول على السعر الحالي
-            tick = mt5.symbol_info_tick(actual_symbol)
-            if tick is None:
-                errors.append(f"❌ فشل الحصول على السعر الحالي للرمز {actual_symbol}")
-                return {'valid': False, 'errors': errors, 'warnings': warnings}
-            
+            # 6. السعر الحالي
             current_price = tick.ask if action == 'BUY' else tick.bid
             
             # 7. التحقق من Stop Level (المسافة الدنيا للـ SL/TP)
-            stops_level = symbol_info.trade_stops_level
-            point = symbol_info.point
-            min_distance = stops_level * point
+            stops_level = template.stops_level
+            min_distance = template.min_distance
             
             if stops_level > 0:
                 # تحديد سعر المرجع
@@ -418,14 +598,10 @@ class MT5Manager:
                     errors.append(f"❌ TP في صفقة SELL يجب أن يكون أقل من Entry")
                     errors.append(f"   Entry: {entry_price}, TP: {take_profit}")
             
-            # 9. التحقق من الرؤية
-            if not symbol_info.visible:
-                warnings.append(f"⚠️ الرمز {actual_symbol} غير مرئي في Market Watch")
-                warnings.append("   سيتم تفعيله تلقائياً")
-            
-            # 10. معلومات إضافية
-            if symbol_info.spread > 100:
-                warnings.append(f"⚠️ السبريد مرتفع: {symbol_info.spread} نقطة")
+            # 9. معلومات إضافية (السبريد من السعر اللحظي)
+            spread = round((tick.ask - tick.bid) / template.point) if template.point else 0
+            if spread > 100:
+                warnings.append(f"⚠️ السبريد مرتفع: {spread} نقطة")
             
             # النتيجة النهائية
             is_valid = len(errors) == 0
@@ -456,7 +632,9 @@ class MT5Manager:
                 'symbol_info': symbol_info,
                 'actual_symbol': actual_symbol,
                 'current_price': current_price,
-                'min_distance': min_distance
+                'min_distance': min_distance,
+                'template': template,
+                'tick': tick
             }
             
         except Exception as e:
@@ -511,14 +689,9 @@ class MT5Manager:
                 error_msg = "فشل التحقق من شروط التداول:\n" + "\n".join(validation['errors'])
                 return {'success': False, 'error': error_msg, 'validation_errors': validation['errors']}
             
-            # استخدام البيانات من التحقق
-            actual_symbol = validation['actual_symbol']
-            symbol_info = validation['symbol_info']
-            
-            # تفعيل الرمز إذا لم يكن مرئياً
-            if not symbol_info.visible:
-                if not mt5.symbol_select(actual_symbol, True):
-                    return {'success': False, 'error': f'فشل تفعيل الرمز {actual_symbol}'}
+            # استخدام البيانات من التحقق (الرمز مفعّل في Market Watch عند بناء القالب)
+            template = validation['template']
+            actual_symbol = template.actual_symbol
 
             # ===== 4. تحديد نوع الأمر =====
             order_type = mt5.ORDER_TYPE_BUY if signal.action == 'BUY' else mt5.ORDER_TYPE_SELL
@@ -530,31 +703,26 @@ class MT5Manager:
                 # استخدام متوسط النطاق
                 entry_price = sum(signal.entry_price_range) / 2
             else:
-                # استخدام السعر الحالي
-                if signal.action == 'BUY':
-                    entry_price = mt5.symbol_info_tick(actual_symbol).ask
-                else:
-                    entry_price = mt5.symbol_info_tick(actual_symbol).bid
+                # استخدام السعر الحالي (نفس السعر اللحظي المستخدم في التحقق)
+                entry_price = validation['current_price']
 
             # ===== 6. إعداد طلب التداول =====
             # تنظيف التعليق لتجنب محارف غير صالحة
             comment = f"Signal {signal.symbol}"
             comment = comment.encode('ascii', 'ignore').decode('ascii')[:31]  # MT5 يقبل max 31 حرف
             
-            request = {
-                "action": mt5.TRADE_ACTION_DEAL,
-                "symbol": actual_symbol,  # استخدام الرمز الفعلي من المنصة
-                "volume": lot_size,
-                "type": order_type,
-                "price": entry_price,
-                "sl": signal.stop_loss,
-                "tp": signal.take_profits[0] if signal.take_profits else 0,  # أول TP
-                "deviation": 20,
-                "magic": 234000,
-                "comment": comment,
-                "type_time": mt5.ORDER_TIME_GTC,
-                "type_filling": mt5.ORDER_FILLING_IOC,
-            }
+            # الحقول الثابتة من القالب + قيم الإشارة
+            request = dict(
+                template.request_base,
+                action=mt5.TRADE_ACTION_DEAL,
+                volume=lot_size,
+                type=order_type,
+                price=entry_price,
+                sl=signal.stop_loss,
+                tp=signal.take_profits[0] if signal.take_profits else 0,  # أول TP
+                comment=comment,
+                type_filling=mt5.ORDER_FILLING_IOC,
+            )
 
             # ===== 7. إرسال الطلب =====
             result = mt5.order_send(request)
@@ -563,6 +731,9 @@ class MT5Manager:
                 return {'success': False, 'error': 'فشل إرسال الطلب'}
 
             if result.retcode != mt5.TRADE_RETCODE_DONE:
+                # خصائص الرمز قد تغيرت: إعادة بناء القالب في المحاولة القادمة
+                if result.retcode in TEMPLATE_INVALIDATING_RETCODES:
+                    self.invalidate_order_template(signal.symbol)
                 # التعامل الذكي مع أخطاء محددة
                 error_msg = self._get_error_message(result.retcode, result.comment)
                 return {
@@ -575,7 +746,7 @@ class MT5Manager:
             # حفظ معلومات الصفقة
             trade_info = {
                 'ticket': result.order,
-                'signal': signal.__dict__,
+                'signal': signal.to_dict(),
                 'opened_at': datetime.now().isoformat(),
                 'entry_price': result.price,
                 'lot_size': lot_size,
@@ -585,6 +756,7 @@ class MT5Manager:
 
             with self.lock:
                 self.active_positions[result.order] = trade_info
+                self._track_signal(result.order, signal)
                 self.save_trades()
 
             # عرض رسالة نجاح مع الاسم الفعلي إذا كان مختلفاً
@@ -643,15 +815,10 @@ class MT5Manager:
                 error_msg = "فشل التحقق من شروط التداول:\n" + "\n".join(validation['errors'])
                 return {'success': False, 'error': error_msg, 'validation_errors': validation['errors']}
             
-            # استخدام البيانات من التحقق
-            actual_symbol = validation['actual_symbol']
-            symbol_info = validation['symbol_info']
+            # استخدام البيانات من التحقق (الرمز مفعّل في Market Watch عند بناء القالب)
+            template = validation['template']
+            actual_symbol = template.actual_symbol
             current_price = validation['current_price']
-            
-            # تفعيل الرمز إذا لم يكن مرئياً
-            if not symbol_info.visible:
-                if not mt5.symbol_select(actual_symbol, True):
-                    return {'success': False, 'error': f'فشل تفعيل الرمز {actual_symbol}'}
 
             # ===== 4. تحديد نوع الأمر المعلق =====
             order_type_map = {
@@ -670,7 +837,7 @@ class MT5Manager:
             
             # ===== 6. التحقق من منطقية السعر للأمر المعلق =====
             # حساب الفرق المسموح به (0.1% من السعر أو 20 نقطة، أيهما أكبر)
-            price_tolerance = max(entry_price * 0.001, symbol_info.point * 20)
+            price_tolerance = max(entry_price * 0.001, template.point * 20)
             
             # التحقق من أن السعر منطقي لنوع الأمر (مع هامش تسامح)
             if signal.order_type == 'BUY_LIMIT':
@@ -698,7 +865,7 @@ class MT5Manager:
             
             # معلومات Stop Level
             if validation['min_distance'] > 0:
-                print(f"   Stop Level: {symbol_info.trade_stops_level} نقطة ({validation['min_distance']:.5f})")
+                print(f"   Stop Level: {template.stops_level} نقطة ({validation['min_distance']:.5f})")
 
             # ===== 7. إعداد طلب الأمر المعلق =====
             # تنظيف التعليق لتجنب محارف غير صالحة
@@ -707,29 +874,18 @@ class MT5Manager:
             comment = f"Pending {signal.order_type} {signal.symbol}"
             comment = comment.encode('ascii', 'ignore').decode('ascii')[:31]  # MT5 يقبل max 31 حرف
             
-            # تحديد نوع التعبئة المناسب
-            filling_type = symbol_info.filling_mode
-            if filling_type & 1:  # ORDER_FILLING_FOK
-                type_filling = mt5.ORDER_FILLING_FOK
-            elif filling_type & 2:  # ORDER_FILLING_IOC
-                type_filling = mt5.ORDER_FILLING_IOC
-            else:  # ORDER_FILLING_RETURN (default)
-                type_filling = mt5.ORDER_FILLING_RETURN
-            
-            request = {
-                "action": mt5.TRADE_ACTION_PENDING,
-                "symbol": actual_symbol,
-                "volume": lot_size,
-                "type": order_type,
-                "price": entry_price,
-                "sl": signal.stop_loss,
-                "tp": signal.take_profits[0] if signal.take_profits else 0,
-                "deviation": 20,
-                "magic": 234000,
-                "comment": comment,
-                "type_time": mt5.ORDER_TIME_GTC,
-                "type_filling": type_filling,
-            }
+            # نوع التعبئة المناسب للرمز محسوب في القالب
+            request = dict(
+                template.request_base,
+                action=mt5.TRADE_ACTION_PENDING,
+                volume=lot_size,
+                type=order_type,
+                price=entry_price,
+                sl=signal.stop_loss,
+                tp=signal.take_profits[0] if signal.take_profits else 0,
+                comment=comment,
+                type_filling=template.type_filling,
+            )
 
             # ===== 8. إرسال الطلب =====
             result = mt5.order_send(request)
@@ -741,6 +897,8 @@ class MT5Manager:
                 return {'success': False, 'error': error_msg}
 
             if result.retcode != mt5.TRADE_RETCODE_DONE:
+                if result.retcode in TEMPLATE_INVALIDATING_RETCODES:
+                    self.invalidate_order_template(signal.symbol)
                 error_msg = self._get_error_message(result.retcode, result.comment)
                 print(f"❌ رمز الخطأ: {result.retcode} - {error_msg}")
                 print(f"   التعليق: {result.comment}")
@@ -754,7 +912,7 @@ class MT5Manager:
             # ===== 9. حفظ معلومات الأمر المعلق =====
             order_info = {
                 'ticket': result.order,
-                'signal': signal.__dict__,
+                'signal': signal.to_dict(),
                 'placed_at': datetime.now().isoformat(),
                 'entry_price': entry_price,
                 'lot_size': lot_size,
@@ -764,6 +922,7 @@ class MT5Manager:
 
             with self.lock:
                 self.active_positions[result.order] = order_info
+                self._track_signal(result.order, signal)
                 self.save_trades()
 
             # عرض رسالة نجاح
@@ -806,8 +965,12 @@ class MT5Manager:
                     # نسخة من المراكز للعمل عليها
                     positions = dict(self.active_positions)
 
+                # التعديل يمر عبر thread MT5 بالتسلسل مع الأوامر الجديدة
                 for ticket, trade_info in positions.items():
-                    self._update_trailing_stop(ticket, trade_info)
+                    self.executor.call(self._update_trailing_stop, ticket, trade_info)
+
+                # تحديث قوالب الأوامر القديمة هنا بدلاً من مسار تنفيذ الإشارة
+                self.executor.call(self.refresh_order_templates)
 
                 time.sleep(2)  # فحص كل 2 ثانية
 
@@ -815,6 +978,43 @@ class MT5Manager:
                 print(f"❌ خطأ في Trailing Stop: {str(e)}")
                 time.sleep(5)
 
+    def start_tick_poller(self):
+        """بدء تحديث الأسعار في الخلفية (tick_poll_interval = 0 لتعطيله)"""
+        if not self.tick_poller_active and self.tick_poll_interval > 0:
+            self.tick_poller_active = True
+            self.tick_poller_thread = Thread(target=self._tick_poller_worker, daemon=True)
+            self.tick_poller_thread.start()
+
+    def stop_tick_poller(self):
+        """إيقاف تحديث الأسعار في الخلفية"""
+        self.tick_poller_active = False
+        if self.tick_poller_thread:
+            self.tick_poller_thread.join(timeout=2)
+            self.tick_poller_thread = None
+
+    def _poll_symbols(self) -> List[str]:
+        """رموز المنصة التي تُحدّث أسعارها: الصفقات المفتوحة + tick_watchlist"""
+        with self.lock:
+            base_symbols = {info['signal']['symbol'] for info in self.active_positions.values()
+                            if info.get('signal')}
+        symbols = set(self.tick_watchlist)
+        for symbol in base_symbols:
+            template = self._order_templates.get(symbol)
+            symbols.add(template.actual_symbol if template else self.symbol_cache.get(symbol, symbol))
+        return sorted(symbols)
+
+    def _tick_poller_worker(self):
+        """عامل تحديث الأسعار - الجلب نفسه يمر عبر thread MT5"""
+        while self.tick_poller_active:
+            try:
+                if self.is_connected:
+                    symbols = self._poll_symbols()
+                    if symbols:
+                        self.executor.call(self.tick_cache.refresh, symbols)
+            except Exception as e:
+                print(f"⚠️ خطأ في تحديث الأسعار: {str(e)}")
+            time.sleep(self.tick_poll_interval)
+
     def _update_trailing_stop(self, ticket: int, trade_info: Dict):
         """تحديث Trailing Stop لصفقة معينة"""
         try:
@@ -831,11 +1031,17 @@ class MT5Manager:
                         # نقل إلى السجل
                         self.trade_history.append(self.active_positions[ticket])
                         del self.active_positions[ticket]
+                        self._untrack_signal(ticket)
                         self.save_trades()
                 return
 
             position = position[0]
-            signal = Signal(**trade_info['signal'])
+
+            # استخدام كائن الإشارة الحي بدلاً من إعادة بنائه في كل دورة
+            signal = self._live_signals.get(ticket)
+            if signal is None:
+                signal = Signal.from_dict(trade_info['signal'])
+                self._track_signal(ticket, signal)
 
             # الحصول على السعر الحالي
             current_price = position.price_current
@@ -978,7 +1184,254 @@ class MT5Manager:
             print(f"❌ خطأ في تعديل الصفقة: {str(e)}")
             return False
 
+    def _track_signal(self, ticket: int, signal: Signal):
+        """ربط التذكرة بكائن الإشارة الحي (في الاتجاهين)"""
+        self._live_signals[ticket] = signal
+        tickets = self._signal_tickets.setdefault(id(signal), [])
+        if ticket not in tickets:
+            tickets.append(ticket)
+
+    def _untrack_signal(self, ticket: int):
+        """فك ارتباط التذكرة بإشارتها"""
+        signal = self._live_signals.pop(ticket, None)
+        if signal is None:
+            return
+        tickets = self._signal_tickets.get(id(signal))
+        if tickets and ticket in tickets:
+            tickets.remove(ticket)
+            if not tickets:
+                del self._signal_tickets[id(signal)]
+
+    # ===== واجهة async: التنفيذ في thread MT5 دون إيقاف حلقة الأحداث =====
+
+    async def execute_signal_async(self, signal: Signal, lot_size: float = 0.01) -> Dict:
+        """execute_signal في thread MT5 (للاستدعاء من asyncio)"""
+        return await self.executor.run(self.execute_signal, signal, lot_size)
+
+    async def apply_signal_amendment_async(self, amendment) -> Dict:
+        """apply_signal_amendment في thread MT5 (للاستدعاء من asyncio)"""
+        return await self.executor.run(self.apply_signal_amendment, amendment)
+
+    async def close_position_async(self, ticket: int, fraction: float = 1.0) -> Dict:
+        """close_position في thread MT5 (للاستدعاء من asyncio)"""
+        return await self.executor.run(self.close_position, ticket, fraction)
+
+    def get_signal_tickets(self, signal: Signal) -> List[int]:
+        """التذاكر المفتوحة لكائن إشارة (بدون المرور على جميع المراكز)"""
+        tickets = self._signal_tickets.get(id(signal), [])
+        # التحقق من الهوية: id قد يُعاد استخدامه بعد حذف كائن قديم
+        return [t for t in tickets if self._live_signals.get(t) is signal]
+
+    def apply_signal_amendment(self, amendment) -> Dict:
+        """
+        تطبيق تعديل إشارة (رسالة معدّلة أو محذوفة) على صفقاتها
+
+        - modify: تعديل SL/TP للمراكز المفتوحة، وسعر الدخول أيضاً للأوامر المعلقة
+        - cancel/deleted: حذف الأوامر المعلقة فقط، المراكز المفتوحة لا تُغلق تلقائياً
+        - move_sl: تحريك SL (لنقطة الدخول أو لسعر محدد) - من رد على رسالة الإشارة
+        - close: إغلاق نسبة من المركز - من رد على رسالة الإشارة
+
+        Args:
+            amendment: SignalAmendment من message_tracker (الإشارة محدّثة بالقيم الجديدة)
+
+        Returns:
+            نتيجة العملية مع التذاكر المعدّلة
+        """
+        with self.lock:
+            tickets = self.get_signal_tickets(amendment.signal)
+
+        if not tickets:
+            return {'success': True, 'tickets': [], 'message': 'لا توجد صفقات مرتبطة بالإشارة'}
+
+        if not self.is_connected:
+            return {'success': False, 'error': 'غير متصل بـ MT5', 'tickets': tickets}
+
+        applied = []
+        skipped = []
+        for ticket in tickets:
+            if amendment.kind == 'modify':
+                done = self._amend_ticket(ticket, amendment.signal, amendment.changes)
+            elif amendment.kind == 'move_sl':
+                done = self._move_ticket_sl(ticket, amendment.value)
+            elif amendment.kind == 'close':
+                fraction = amendment.value or 1.0
+                if mt5.positions_get(ticket=ticket):
+                    done = self.close_position(ticket, fraction)['success']
+                else:
+                    # أمر معلق لم يُفعّل بعد: الإغلاق الكامل يعني حذفه
+                    done = fraction >= 1.0 and self._cancel_pending_order(ticket)
+            else:
+                done = self._cancel_pending_order(ticket)
+            (applied if done else skipped).append(ticket)
+
+        return {'success': not skipped, 'tickets': applied, 'skipped': skipped}
+
+    def _amend_ticket(self, ticket: int, signal: Signal, changes: Dict) -> bool:
+        """تعديل صفقة أو أمر معلق بقيم الإشارة الجديدة (الحقول المتغيرة فقط)"""
+        new_tp = signal.take_profits[0] if signal.take_profits else 0
+
+        position = mt5.positions_get(ticket=ticket)
+        if position:
+            position = position[0]
+            sl = signal.stop_loss if 'stop_loss' in changes else position.sl
+            tp = new_tp if 'take_profits' in changes else position.tp
+            done = self._modify_position(ticket, position.sl, sl, tp)
+        else:
+            order = mt5.orders_get(ticket=ticket)
+            if not order:
+                return False
+            order = order[0]
+            request = {
+                "action": mt5.TRADE_ACTION_MODIFY,
+                "order": ticket,
+                "symbol": order.symbol,
+                "price": signal.entry_price if 'entry_price' in changes and signal.entry_price else order.price_open,
+                "sl": signal.stop_loss if 'stop_loss' in changes else order.sl,
+                "tp": new_tp if 'take_profits' in changes else order.tp,
+                "type_time": order.type_time,
+                "magic": 234000,
+            }
+            result = mt5.order_send(request)
+            done = bool(result and result.retcode == mt5.TRADE_RETCODE_DONE)
+            if not done:
+                print(f"⚠️ فشل تعديل الأمر المعلق {ticket}: {result.comment if result else 'Unknown error'}")
+
+        if done:
+            with self.lock:
+                if ticket in self.active_positions:
+                    self.active_positions[ticket]['signal'] = signal.to_dict()
+                    self.save_trades()
+            print(f"✏️ تم تعديل الصفقة {ticket} حسب الرسالة المعدّلة: {', '.join(changes)}")
+        return done
+
+    def _move_ticket_sl(self, ticket: int, new_sl: Optional[float]) -> bool:
+        """تحريك SL لمركز مفتوح (None = نقطة الدخول)"""
+        position = mt5.positions_get(ticket=ticket)
+        if not position:
+            print(f"⚠️ لا يمكن تحريك SL - الصفقة {ticket} ليست مركزاً مفتوحاً")
+            return False
+        position = position[0]
+
+        if new_sl is None:
+            new_sl = position.price_open
+
+        if new_sl == position.sl:
+            return True
+
+        if self._modify_position(ticket, position.sl, new_sl, position.tp):
+            print(f"📌 تم تحريك SL للصفقة {ticket} من {position.sl:.5f} إلى {new_sl:.5f}")
+            return True
+        return False
+
+    def close_position(self, ticket: int, fraction: float = 1.0) -> Dict:
+        """
+        إغلاق مركز مفتوح كلياً أو جزئياً
+
+        Args:
+            ticket: رقم المركز
+            fraction: نسبة الحجم المغلقة (1.0 = إغلاق كامل)
+
+        Returns:
+            نتيجة العملية مع الحجم المغلق
+        """
+        if not self.is_connected:
+            return {'success': False, 'error': 'غير متصل بـ MT5'}
+
+        try:
+            position = mt5.positions_get(ticket=ticket)
+            if not position:
+                return {'success': False, 'error': f'الصفقة {ticket} غير موجودة'}
+            position = position[0]
+
+            symbol_info = mt5.symbol_info(position.symbol)
+            if symbol_info is None:
+                return {'success': False, 'error': f'فشل الحصول على معلومات {position.symbol}'}
+
+            # تقريب الحجم لأسفل حسب خطوة الحجم مع احترام الحد الأدنى
+            step = symbol_info.volume_step
+            volume = position.volume
+            if fraction < 1.0:
+                volume = int(position.volume * fraction / step) * step
+                volume = round(max(volume, symbol_info.volume_min), 8)
+                if volume >= position.volume:
+                    volume = position.volume
+
+            tick = self.tick_cache.get(position.symbol)
+            if tick is None:
+                return {'success': False, 'error': f'فشل الحصول على سعر {position.symbol}'}
+            if position.type == mt5.POSITION_TYPE_BUY:
+                order_type, price = mt5.ORDER_TYPE_SELL, tick.bid
+            else:
+                order_type, price = mt5.ORDER_TYPE_BUY, tick.ask
+
+            request = {
+                "action": mt5.TRADE_ACTION_DEAL,
+                "position": ticket,
+                "symbol": position.symbol,
+                "volume": volume,
+                "type": order_type,
+                "price": price,
+                "deviation": 20,
+                "magic": 234000,
+                "comment": "Close by signal reply",
+                "type_time": mt5.ORDER_TIME_GTC,
+                "type_filling": mt5.ORDER_FILLING_IOC,
+            }
+
+            result = mt5.order_send(request)
+            if result is None or result.retcode != mt5.TRADE_RETCODE_DONE:
+                error_msg = self._get_error_message(result.retcode, result.comment) if result else 'فشل إرسال الطلب'
+                print(f"⚠️ فشل إغلاق الصفقة {ticket}: {error_msg}")
+                return {'success': False, 'error': error_msg}
+
+            full_close = volume >= position.volume
+            with self.lock:
+                trade_info = self.active_positions.get(ticket)
+                if trade_info is not None:
+                    if full_close:
+                        trade_info['status'] = 'closed'
+                        trade_info['closed_at'] = datetime.now().isoformat()
+                        self.trade_history.append(self.active_positions.pop(ticket))
+                        self._untrack_signal(ticket)
+                    else:
+                        trade_info['closed_volume'] = trade_info.get('closed_volume', 0) + volume
+                    self.save_trades()
+
+            print(f"✂️ تم إغلاق {volume} لوت من الصفقة {ticket}" + (" (كاملة)" if full_close else ""))
+            return {'success': True, 'ticket': ticket, 'volume': volume, 'full_close': full_close}
+
+        except Exception as e:
+            print(f"❌ خطأ في إغلاق الصفقة: {str(e)}")
+            return {'success': False, 'error': str(e)}
+
+    def _cancel_pending_order(self, ticket: int) -> bool:
+        """حذف أمر معلق لإشارة ملغاة"""
+        order = mt5.orders_get(ticket=ticket)
+        if not order:
+            print(f"⚠️ الإشارة أُلغيت لكن الصفقة {ticket} مفتوحة بالفعل - لم يتم إغلاقها")
+            return False
+
+        result = mt5.order_send({"action": mt5.TRADE_ACTION_REMOVE, "order": ticket})
+        if not result or result.retcode != mt5.TRADE_RETCODE_DONE:
+            print(f"⚠️ فشل حذف الأمر المعلق {ticket}: {result.comment if result else 'Unknown error'}")
+            return False
+
+        with self.lock:
+            if ticket in self.active_positions:
+                self.active_positions[ticket]['status'] = 'cancelled'
+                self.active_positions[ticket]['closed_at'] = datetime.now().isoformat()
+                self.trade_history.append(self.active_positions.pop(ticket))
+            self._untrack_signal(ticket)
+            self.save_trades()
+
+        print(f"🗑️ تم حذف الأمر المعلق {ticket} (الإشارة ملغاة)")
+        return True
+
     def get_open_positions(self) -> List[Dict]:
+        """الصفقات المفتوحة (تُقرأ في thread MT5)"""
+        return self.executor.call(self._get_open_positions)
+
+    def _get_open_positions(self) -> List[Dict]:
         """الحصول على الصفقات المفتوحة"""
         try:
             positions = mt5.positions_get()
@@ -1007,6 +1460,10 @@ class MT5Manager:
             return []
 
     def get_account_info(self) -> Optional[Dict]:
+        """معلومات الحساب (تُقرأ في thread MT5)"""
+        return self.executor.call(self._get_account_info)
+
+    def _get_account_info(self) -> Optional[Dict]:
         """الحصول على معلومات الحساب"""
         if not self.is_connected:
             return None
@@ -1031,6 +1488,10 @@ class MT5Manager:
             return None
 
     def get_symbol_properties(self, symbol: str, verbose: bool = True) -> Optional[Dict]:
+        """خصائص رمز من MT5 (تُقرأ في thread MT5)"""
+        return self.executor.call(self._get_symbol_properties, symbol, verbose)
+
+    def _get_symbol_properties(self, symbol: str, verbose: bool = True) -> Optional[Dict]:
         """
         الحصول على خصائص رمز معين من MT5
         
@@ -1072,6 +1533,8 @@ class MT5Manager:
                 'digits': symbol_info.digits,
                 'trade_stops_level': symbol_info.trade_stops_level,
                 'spread': symbol_info.spread,
+                'bid': symbol_info.bid,
+                'ask': symbol_info.ask,
                 'point': symbol_info.point,
                 'tick_size': symbol_info.trade_tick_size,
                 'tick_value': symbol_info.trade_tick_value,
@@ -1178,6 +1641,10 @@ class MT5Manager:
             return False
 
     def get_all_symbols_properties(self, save_to_file: bool = True) -> Dict:
+        """خصائص جميع الرموز (تُقرأ في thread MT5)"""
+        return self.executor.call(self._get_all_symbols_properties, save_to_file)
+
+    def _get_all_symbols_properties(self, save_to_file: bool = True) -> Dict:
         """
         الحصول على خصائص جميع الرموز المتاحة
         
@@ -1202,7 +1669,7 @@ class MT5Manager:
             results = {}
             for symbol_info in all_symbols:
                 symbol_name = symbol_info.name
-                properties = self.get_symbol_properties(symbol_name, verbose=False)
+                properties = self._get_symbol_properties(symbol_name, verbose=False)
                 if properties:
                     results[symbol_name] = properties
 
@@ -1221,6 +1688,10 @@ class MT5Manager:
             return {}
 
     def get_today_statistics(self) -> Dict:
+        """إحصائيات تداول اليوم (تُقرأ في thread MT5)"""
+        return self.executor.call(self._get_today_statistics)
+
+    def _get_today_statistics(self) -> Dict:
         """إحصائيات تداول اليوم"""
         try:
             from datetime import datetime, timedelta
@@ -1291,6 +1762,8 @@ class MT5Manager:
                     data = json.load(f)
                     self.active_positions = data.get('active_positions', {})
                     self.trade_history = data.get('trade_history', [])
+                    self._live_signals = {}
+                    self._signal_tickets = {}
         except Exception as e:
             print(f"❌ خطأ في تحميل الصفقات: {str(e)}")
 
@@ -1300,5 +1773,8 @@ class MT5Manager:
             'connected': self.is_connected,
             'account': self.account_info.login if self.account_info else None,
             'balance': self.account_info.balance if self.account_info else 0,
-            'open_positions': len(self.active_positions)
+            'open_positions': len(self.active_positions),
+            'executor': self.executor.get_stats(),
+            'order_templates': dict(self.template_stats, cached=len(self._order_templates)),
+            'ticks': self.tick_cache.get_stats()
         }
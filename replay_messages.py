@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+اختبار حمل لخط معالجة الرسائل بدون حساب Telegram
+يعيد تشغيل رسائل مسجلة (مثل data/signals_history.json) كأحداث عبر
+TelegramSignalClient.message_handler -> المحلل -> callbacks، ويقيس الزمن الكلي
+من وصول الحدث حتى انتهاء callback (p50/p90/p99)
+"""
+
+import sys
+import io
+import json
+import asyncio
+import argparse
+
+# إصلاح مشكلة الترميز في Windows
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+
+from telegram_client import TelegramSignalClient
+from message_sources import FileReplaySource
+
+HISTORY_FILE = 'data/signals_history.json'
+
+
+async def replay(args) -> dict:
+    client = TelegramSignalClient('0', '', '', queue_size=args.queue_size, execution_workers=args.workers)
+    # قوالب القنوات المتعلمة أثناء الاختبار لا تُحفظ في data/patterns.json
+    client.signal_parser.patterns_file = None
+    # النسخ المعادة (--repeat) يجب أن تمر بالمسار كاملاً: منع التكرار والذاكرة
+    # المؤقتة للتحليل معطلان إلا إذا طُلبا، وإلا تُمتص النسخ وتصبح الأرقام خاطئة
+    if not args.dedup:
+        client.signal_deduplicator.window = 0
+    if not args.parse_cache:
+        client.signal_parser.cache_size = 0
+
+    counters = {'signals': 0, 'messages': 0}
+    execution_delay = args.execution_ms / 1000
+
+    async def on_signal(signal):
+        # محاكاة زمن تنفيذ الصفقة في MT5
+        if execution_delay:
+            await asyncio.sleep(execution_delay)
+        counters['signals'] += 1
+
+    async def on_message(message_data, signal=None):
+        counters['messages'] += 1
+
+    client.set_signal_callback(on_signal)
+    client.set_message_callback(on_message)
+
+    source = FileReplaySource(args.file, rate=args.rate, repeat=args.repeat, limit=args.limit)
+    print(f"▶️ إعادة تشغيل {len(source.records)} رسالة × {source.repeat} من {args.file} "
+          f"({'بأقصى سرعة' if not args.rate else f'{args.rate} رسالة/ثانية'})")
+
+    stats = await client.run_source(source, drain_timeout=args.drain_timeout)
+    stats['callbacks'] = counters
+    stats['dedup'] = client.signal_deduplicator.get_stats()
+    stats['parse_cache'] = {'enabled': bool(args.parse_cache), 'hits': client.signal_parser.cache_hits}
+    return stats
+
+
+def print_stats(stats: dict):
+    source = stats['source']
+    print("\n" + "=" * 70)
+    print(f"📨 أُرسلت {source['sent']} رسالة في {source['send_seconds']}s "
+          f"({source['messages_per_second']} رسالة/ثانية) | انتهت المعالجة بعد {source['seconds']}s")
+    print(f"   رسائل: {stats['callbacks']['messages']} | إشارات منفذة: {stats['callbacks']['signals']}")
+    dedup = stats['dedup']
+    if dedup['window']:
+        print(f"   🔁 منع التكرار مفعل: {dedup['duplicates']} إشارة مكررة لم تُنفذ")
+    if stats['parse_cache']['enabled']:
+        print(f"   💾 الذاكرة المؤقتة للتحليل مفعلة: {stats['parse_cache']['hits']} رسالة من الذاكرة")
+    if not source['drained']:
+        print("   ⚠️ لم تنتهِ المعالجة خلال المهلة")
+
+    for name, title in (('latency', 'الزمن الكلي (كل الرسائل)'), ('signal_latency', 'الزمن الكلي (الإشارات)')):
+        latency = stats[name]
+        print(f"⏱️ {title}: p50 {latency['p50_ms']}ms | p90 {latency['p90_ms']}ms | "
+              f"p99 {latency['p99_ms']}ms | max {latency['max_ms']}ms ({latency['count']})")
+
+    for name in ('parse', 'execute'):
+        stage = stats[name]
+        print(f"📊 {name}: أقصى عمق {stage['max_depth']}/{stage['capacity']} | امتلاء {stage['blocked']} "
+              f"({stage['blocked_ms']}ms) | انتظار {stage['avg_wait_ms']}ms | معالجة {stage['avg_handle_ms']}ms")
+    print("=" * 70)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='اختبار حمل خط معالجة الرسائل من ملف')
+    arg_parser.add_argument('--file', default=HISTORY_FILE, help='ملف الرسائل (JSON)')
+    arg_parser.add_argument('--rate', type=float, default=None, help='رسالة/ثانية (الافتراضي: أقصى سرعة)')
+    arg_parser.add_argument('--repeat', type=int, default=1, help='عدد مرات تكرار الملف')
+    arg_parser.add_argument('--limit', type=int, default=None, help='أقصى عدد رسائل من الملف')
+    arg_parser.add_argument('--workers', type=int, default=2, help='عدد عمال التنفيذ')
+    arg_parser.add_argument('--queue-size', type=int, default=1000, help='حجم طابور الرسائل')
+    arg_parser.add_argument('--execution-ms', type=float, default=0.0, help='زمن تنفيذ وهمي لكل إشارة')
+    arg_parser.add_argument('--dedup', action='store_true',
+                            help='تفعيل منع تكرار الإشارات (النسخ المكررة لا تُنفذ)')
+    arg_parser.add_argument('--parse-cache', action='store_true',
+                            help='تفعيل الذاكرة المؤقتة للتحليل (النسخ المكررة لا تُحلل من جديد)')
+    arg_parser.add_argument('--drain-timeout', type=float, default=60.0, help='مهلة انتهاء المعالجة')
+    arg_parser.add_argument('--output', default=None, help='حفظ الإحصائيات في ملف JSON')
+    args = arg_parser.parse_args()
+
+    stats = asyncio.run(replay(args))
+    print_stats(stats)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(stats, f, indent=4, ensure_ascii=False)
+        print(f"📂 النتائج: {args.output}")
+
+    return 0 if stats['source']['drained'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
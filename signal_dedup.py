@@ -0,0 +1,175 @@
+"""
+منع تكرار نفس الإشارة من عدة قنوات
+عدة قنوات تنسخ نفس المزوّد فتصل نفس الإشارة خلال ثوانٍ من كل قناة؛ أول نسخة فقط
+تُمرر للتنفيذ والنسخ المكررة داخل النافذة الزمنية لا تفتح صفقات إضافية
+"""
+
+import time
+from collections import OrderedDict
+from math import floor, log10
+from typing import Dict, List, Optional, Tuple
+
+from signal_parser import Signal
+
+
+# سياسات التعامل مع النسخ المكررة
+DEDUP_POLICIES = ('first_wins', 'merge')
+
+
+def round_price(price: Optional[float], significant: int = 4) -> Optional[float]:
+    """
+    تقريب السعر لعدد أرقام معنوية ثابت (3330.4 و 3330 لنفس المفتاح، 172.53 -> 172.5)
+
+    التقريب نسبي حتى يعمل نفس الإعداد للذهب والعملات والمؤشرات
+    """
+    if not price:
+        return price
+    digits = significant - 1 - int(floor(log10(abs(price))))
+    return round(price, digits)
+
+
+def signal_key(signal: Signal, significant: int = 4) -> Tuple:
+    """مفتاح الإشارة: (الرمز، نوع الصفقة، سعر الدخول المقرب، SL المقرب)"""
+    entry = signal.entry_price
+    if entry is None and signal.entry_price_range:
+        low, high = signal.entry_price_range
+        entry = (low + high) / 2
+    return (
+        signal.symbol,
+        signal.action,
+        round_price(entry, significant),
+        round_price(signal.stop_loss, significant)
+    )
+
+
+class _Entry:
+    """إشارة مسجلة في النافذة الزمنية"""
+
+    __slots__ = ('signal', 'channels', 'expires_at', 'duplicates')
+
+    def __init__(self, signal: Signal, channel_name: str, expires_at: float):
+        self.signal = signal
+        self.channels = [channel_name]
+        self.expires_at = expires_at
+        self.duplicates = 0
+
+
+class SignalDeduplicator:
+    """
+    فهرس الإشارات الأخيرة بنافذة زمنية
+
+    البحث بالمفتاح O(1)، والإدخالات مرتبة حسب وقت الانتهاء (النافذة ثابتة)
+    فيتم حذف المنتهي من بداية الفهرس فقط
+
+    السياسات:
+        - first_wins: أول نسخة تُنفذ والنسخ المكررة تُتجاهل
+        - merge: النسخ المكررة لا تُنفذ وتُضاف قناتها للإشارة الأولى
+          (signal.channel_name يصبح "قناة 1 + قناة 2")
+    """
+
+    def __init__(self, window: float = 30.0, policy: str = 'first_wins', significant: int = 4):
+        """
+        Args:
+            window: مدة النافذة بالثواني (0 = تعطيل منع التكرار)
+            policy: first_wins أو merge
+            significant: عدد الأرقام المعنوية عند مقارنة الأسعار
+        """
+        if policy not in DEDUP_POLICIES:
+            raise ValueError(f"سياسة غير معروفة: {policy} (المتاح: {', '.join(DEDUP_POLICIES)})")
+        self.window = window
+        self.policy = policy
+        self.significant = significant
+        self._entries: 'OrderedDict[Tuple, _Entry]' = OrderedDict()
+        self.stats = {'checked': 0, 'duplicates': 0, 'released': 0}
+
+    def _expire(self, now: float):
+        """حذف الإدخالات المنتهية من بداية الفهرس"""
+        entries = self._entries
+        while entries:
+            key, entry = next(iter(entries.items()))
+            if entry.expires_at > now:
+                break
+            del entries[key]
+
+    def check(self, signal: Signal, channel_name: str = None, now: float = None) -> Optional[Signal]:
+        """
+        تسجيل إشارة والتحقق من تكرارها
+
+        Returns:
+            None إذا كانت الإشارة جديدة، أو الإشارة الأولى إذا كانت مكررة
+        """
+        if not self.window:
+            return None
+
+        now = time.monotonic() if now is None else now
+        self._expire(now)
+        self.stats['checked'] += 1
+
+        channel_name = channel_name or signal.channel_name
+        key = signal_key(signal, self.significant)
+        entry = self._entries.get(key)
+
+        if entry is None:
+            self._entries[key] = _Entry(signal, channel_name, now + self.window)
+            return None
+
+        entry.duplicates += 1
+        self.stats['duplicates'] += 1
+        if self.policy == 'merge' and channel_name not in entry.channels:
+            entry.channels.append(channel_name)
+            entry.signal.channel_name = ' + '.join(entry.channels)
+        return entry.signal
+
+    def filter(self, signals: List[Signal], channel_name: str = None) -> Tuple[List[Signal], List[Tuple[Signal, Signal]]]:
+        """
+        فصل الإشارات الجديدة عن المكررة
+
+        Returns:
+            (الإشارات الجديدة, [(الإشارة المكررة, الإشارة الأولى)])
+        """
+        unique = []
+        duplicates = []
+        for signal in signals:
+            original = self.check(signal, channel_name)
+            if original is None:
+                unique.append(signal)
+            else:
+                duplicates.append((signal, original))
+        return unique, duplicates
+
+    def forget(self, signal: Signal) -> bool:
+        """
+        إزالة إشارة أُلغيت أو حُذفت رسالتها من الفهرس
+
+        حتى لا تُعتبر إعادة نشر الإشارة المصححة نسخة مكررة من الإشارة الملغاة.
+        النسخة المكررة الملغاة لا تزيل الإشارة الأولى (الفهرس يحتفظ بالأولى فقط)
+
+        Returns:
+            True إذا كانت الإشارة مسجلة وتمت إزالتها
+        """
+        key = signal_key(signal, self.significant)
+        entry = self._entries.get(key)
+        if entry is None or entry.signal is not signal:
+            # قيم الإشارة قد تكون تغيرت بتعديل الرسالة بعد تسجيلها
+            key = next((k for k, e in self._entries.items() if e.signal is signal), None)
+            if key is None:
+                return False
+        del self._entries[key]
+        self.stats['released'] += 1
+        return True
+
+    def clear(self):
+        """مسح الفهرس"""
+        self._entries.clear()
+
+    def get_stats(self) -> Dict:
+        """إحصائيات منع التكرار"""
+        self._expire(time.monotonic())
+        return {
+            'policy': self.policy,
+            'window': self.window,
+            'active': len(self._entries),
+            'checked': self.stats['checked'],
+            'duplicates': self.stats['duplicates'],
+            'released': self.stats['released']
+        }
@@ -1,9 +1,24 @@
 import re
-from typing import Optional, Dict, List, Tuple
-from dataclasses import dataclass
+import sys
+import json
+import os
+import time
+import hashlib
+from bisect import bisect_right
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Optional, Dict, List, Tuple, Iterable, Iterator, Union
+from collections import Counter
+from dataclasses import dataclass, field, replace, fields as dataclass_fields
 from datetime import datetime
+from file_utils import atomic_write_json
 
-@dataclass
+# __slots__ لتقليل الذاكرة (متاح في dataclass من Python 3.10)
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_SLOTS)
 class Signal:
     symbol: str
     action: str  # BUY or SELL
@@ -23,8 +38,278 @@ class Signal:
         if self.timestamp is None:
             self.timestamp = datetime.now().isoformat()
 
+    def to_dict(self) -> Dict:
+        """تحويل الإشارة إلى قاموس (للحفظ في JSON)"""
+        data = {name: getattr(self, name) for name in SIGNAL_FIELDS}
+        data['take_profits'] = list(self.take_profits)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Signal':
+        """إنشاء إشارة من قاموس محفوظ (الحقول غير المعروفة تُتجاهل)"""
+        values = {name: data[name] for name in SIGNAL_FIELDS if name in data}
+        if values.get('entry_price_range') is not None:
+            values['entry_price_range'] = tuple(values['entry_price_range'])
+        return cls(**values)
+
+    def to_tuple(self) -> Tuple:
+        """ترميز مضغوط بترتيب SIGNAL_FIELDS (للتخزين بدون أسماء الحقول)"""
+        return tuple(
+            tuple(value) if isinstance(value, list) else value
+            for value in (getattr(self, name) for name in SIGNAL_FIELDS)
+        )
+
+    @classmethod
+    def from_tuple(cls, values) -> 'Signal':
+        """إنشاء إشارة من الترميز المضغوط"""
+        data = dict(zip(SIGNAL_FIELDS, values))
+        if data.get('take_profits') is not None:
+            data['take_profits'] = list(data['take_profits'])
+        return cls.from_dict(data)
+
+
+# ترتيب حقول الإشارة (يُستخدم في الترميز المضغوط)
+SIGNAL_FIELDS = tuple(f.name for f in dataclass_fields(Signal))
+
+
+@dataclass
+class MessageLine:
+    """سطر واحد من الرسالة بعد التقطيع"""
+    index: int
+    text: str
+    upper: str
+    offset: int  # موضع بداية السطر في النص الكامل
+    numbers: List[float]
+    number_spans: List[Tuple[int, int]]  # مواضع الأرقام في النص الكامل
+    is_noise: bool  # نسب مئوية أو SURE/SIGNAL
+    has_tp: bool
+    has_sl: bool
+    has_entry_marker: bool  # NOW / PRICE / @
+
+
+@dataclass
+class MessageTokens:
+    """الشكل الوسيط للرسالة: يُحسب مرة واحدة وتقرأ منه جميع دوال الاستخراج"""
+    text: str
+    text_upper: str
+    lines: List[MessageLine]
+    numbers: List[float]
+    _valid_prices: Dict[Tuple[int, str], List[float]] = field(default_factory=dict, repr=False)
+    template: Optional[Dict] = field(default=None, repr=False)  # القالب المستخدم إن وجد
+
+
+@dataclass
+class ParseResult:
+    """نتيجة تحليل رسالة واحدة ضمن التحليل الجماعي"""
+    index: int
+    message: str
+    channel_name: Optional[str]
+    signal: Optional[Signal]
+    diagnostics: Optional[Dict] = None  # عند فشل التحليل فقط
+
+
+# المحلل داخل كل عملية فرعية (التحليل الجماعي المتوازي)
+_worker_parser = None
+
+
+def _init_parse_worker(parser):
+    global _worker_parser
+    _worker_parser = parser
+    # القوالب المتعلَّمة تبقى في ذاكرة العملية فقط
+    _worker_parser.patterns_file = None
+
+
+def _parse_worker(item):
+    message_text, channel_name = item
+    diagnostics = {}
+    signal = _worker_parser.parse(message_text, channel_name, diagnostics=diagnostics)
+    return signal, diagnostics
+
+
+class PriceRangeTable:
+    """جدول نطاقات الأسعار المنطقية لكل أصل
+
+    البحث O(1) بالرمز، مع نطاقات احتياطية حسب فئة الأصل للرموز غير المعروفة.
+    يمكن تحميل نطاقات إضافية من ملف JSON أو توليدها من data/symbols_info.json.
+    """
+
+    # الحد الأدنى للأصول غير المعروفة فقط (تجاهل النسب المئوية والأرقام الصغيرة)؛
+    # الرموز في الجدول يحددها نطاقها وحده (العملات 0.5-2.0، النفط 20-200...)
+    MIN_PRICE = 100
+
+    DEFAULT_RANGES = {
+        # الذهب عادة بين 1000-10000
+        'XAUUSD': (1000, 10000), 'GOLD': (1000, 10000), 'XAU': (1000, 10000),
+        # البيتكوين عادة بين 1000-200000
+        'BTCUSD': (1000, 200000), 'BTC': (1000, 200000),
+        # العملات الرئيسية عادة بين 0.5-2.0
+        'EURUSD': (0.5, 2.0), 'GBPUSD': (0.5, 2.0), 'AUDUSD': (0.5, 2.0), 'NZDUSD': (0.5, 2.0),
+        # الين الياباني بين 50-200
+        'USDJPY': (50, 200), 'EURJPY': (50, 200), 'GBPJPY': (50, 200),
+        # المؤشرات
+        'US30': (1000, 50000), 'NAS100': (1000, 50000), 'US100': (1000, 50000), 'SPX500': (1000, 50000),
+        # النفط بين 20-200
+        'OIL': (20, 200), 'USOIL': (20, 200), 'UKOIL': (20, 200), 'WTI': (20, 200), 'BRENT': (20, 200),
+    }
+
+    # نطاقات احتياطية حسب فئة الأصل
+    CLASS_RANGES = {
+        'metal_gold': (1000, 10000),
+        'crypto_btc': (1000, 200000),
+        'forex_jpy': (50, 200),
+        'other': (MIN_PRICE, float('inf')),  # أصول أخرى: نقبل أي رقم معقول من 100 فأكثر
+    }
+
+    # النطاق حول آخر سعر معروف عند التوليد من symbols_info.json (من نصفه إلى ضعفه)
+    SEED_RATIO = 0.5
+
+    def __init__(self, ranges_file: Optional[str] = None):
+        self.ranges_file = ranges_file
+        self.ranges: Dict[str, Tuple[float, float]] = dict(self.DEFAULT_RANGES)
+        self._explicit = set()  # رموز محددة يدوياً لا يغيّرها التوليد التلقائي
+        self._fallbacks: Dict[str, Tuple[float, float]] = {}
+        self.version = 0  # يزداد عند أي تعديل (لإبطال ذاكرة التحليل المؤقتة)
+
+        if ranges_file:
+            self.load(ranges_file)
+
+    @staticmethod
+    def asset_class(symbol: str) -> str:
+        """تحديد فئة الأصل لرمز غير موجود في الجدول"""
+        if 'XAU' in symbol or 'GOLD' in symbol:
+            return 'metal_gold'
+        if 'BTC' in symbol:
+            return 'crypto_btc'
+        if symbol.endswith('JPY'):
+            return 'forex_jpy'
+        return 'other'
+
+    def get_range(self, symbol: str) -> Tuple[float, float]:
+        """الحصول على النطاق (الحد الأدنى، الحد الأقصى) لرمز"""
+        bounds = self.ranges.get(symbol)
+        if bounds is None:
+            bounds = self._fallbacks.get(symbol)
+            if bounds is None:
+                bounds = self.CLASS_RANGES[self.asset_class(symbol)]
+                self._fallbacks[symbol] = bounds
+        return bounds
+
+    def set_range(self, symbol: str, low: float, high: float):
+        """تحديد نطاق رمز يدوياً"""
+        symbol = symbol.upper()
+        self.ranges[symbol] = (float(low), float(high))
+        self._explicit.add(symbol)
+        self._fallbacks.pop(symbol, None)
+        self.version += 1
+
+    def filter(self, numbers: List[float], symbol: str) -> List[float]:
+        """تصفية مجموعة أرقام دفعة واحدة حسب نطاق الرمز"""
+        if not numbers:
+            return []
+        low, high = self.get_range(symbol)
+        return [num for num in numbers if low <= num <= high]
+
+    def load(self, file_path: str) -> int:
+        """تحميل نطاقات من ملف JSON بصيغة {"SYMBOL": [low, high]}"""
+        try:
+            if not os.path.exists(file_path):
+                return 0
+            with open(file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for symbol, bounds in data.items():
+                self.set_range(symbol, bounds[0], bounds[1])
+            return len(data)
+        except Exception as e:
+            print(f"❌ خطأ في تحميل نطاقات الأسعار: {str(e)}")
+            return 0
+
+    def save(self, file_path: Optional[str] = None) -> bool:
+        """حفظ الجدول الحالي إلى ملف JSON"""
+        file_path = file_path or self.ranges_file
+        if not file_path:
+            return False
+        try:
+            os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
+            atomic_write_json(file_path, {symbol: list(bounds) for symbol, bounds in self.ranges.items()})
+            return True
+        except Exception as e:
+            print(f"❌ خطأ في حفظ نطاقات الأسعار: {str(e)}")
+            return False
+
+    def seed_from_symbols_info(self, file_path: str) -> int:
+        """توليد نطاقات من آخر الأسعار المحفوظة في data/symbols_info.json
+
+        يُستخدم سعر bid/ask المحفوظ مع خصائص الرمز؛ الرموز المحددة يدوياً لا تتغير.
+        المفتاح هو اسم الرمز في المنصة فقط - بدون توحيد، لأن رموزاً مثل BTCJPY
+        أو XAUEUR توحَّد إلى BTCUSD/XAUUSD وتستبدل نطاقها بنطاق عملة أخرى.
+        """
+        try:
+            if not os.path.exists(file_path):
+                return 0
+            with open(file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"❌ خطأ في قراءة {file_path}: {str(e)}")
+            return 0
+
+        seeded = 0
+        for name, properties in data.items():
+            price = properties.get('bid') or properties.get('ask') or properties.get('last')
+            if not price:
+                continue
+
+            key = name.upper()
+            if key in self._explicit:
+                continue
+            self.ranges[key] = (price * self.SEED_RATIO, price / self.SEED_RATIO)
+            self._fallbacks.pop(key, None)
+            seeded += 1
+
+        self.version += 1
+
+        return seeded
+
+
+def _bumps_version(method):
+    """تغليف دالة تعديل في list بحيث تزيد رقم النسخة"""
+    def wrapper(self, *args, **kwargs):
+        self.version += 1
+        return method(self, *args, **kwargs)
+    wrapper.__name__ = method.__name__
+    return wrapper
+
+
+class SymbolList(list):
+    """قائمة الرموز برقم نسخة يزداد عند أي تعديل (إضافة، حذف، تبديل، إعادة ترتيب)
+
+    محرك مطابقة الرموز وذاكرة التحليل المؤقتة يقارنان رقم النسخة بدلاً من طول
+    القائمة، فتبديل رمز بآخر أو تغيير الترتيب يكفي لإعادة البناء.
+    """
+
+    version = 0  # قيمة افتراضية أثناء استرجاع القائمة من pickle (قبل استعادة نسختها)
+
+    def __init__(self, symbols: Iterable[str] = (), version: int = 0):
+        super().__init__(symbols)
+        self.version = version
+
+    append = _bumps_version(list.append)
+    extend = _bumps_version(list.extend)
+    insert = _bumps_version(list.insert)
+    remove = _bumps_version(list.remove)
+    pop = _bumps_version(list.pop)
+    clear = _bumps_version(list.clear)
+    sort = _bumps_version(list.sort)
+    reverse = _bumps_version(list.reverse)
+    __setitem__ = _bumps_version(list.__setitem__)
+    __delitem__ = _bumps_version(list.__delitem__)
+    __iadd__ = _bumps_version(list.__iadd__)
+    __imul__ = _bumps_version(list.__imul__)
+
+
 class SignalParser:
-    def __init__(self):
+    def __init__(self, price_ranges_file: Optional[str] = 'data/price_ranges.json',
+                 symbols_info_file: Optional[str] = None, cache_size: int = 0,
+                 patterns_file: Optional[str] = None, prefilter: bool = True):
         # قائمة رموز الأصول الشائعة
         self.symbols = [
             # الذهب
@@ -46,8 +331,54 @@ class SignalParser:
             'OIL', 'USOIL', 'UKOIL', 'CRUDE', 'WTI', 'BRENT'
         ]
 
-        # أنماط مخصصة يمكن للمستخدم إضافتها
+        # أنماط مخصصة يمكن للمستخدم إضافتها (قوالب عامة لجميع القنوات)
         self.custom_patterns = []
+        self._custom_templates: Dict[Tuple, Dict] = {}
+
+        # قوالب متعلَّمة لكل قناة: {اسم القناة: {التوقيع: القالب}}
+        self.patterns_file = patterns_file
+        self.channel_templates: Dict[str, OrderedDict] = {}
+        self.template_hits = 0
+        self.template_errors = 0  # قوالب طابق توقيعها لكن لم تناسب الرسالة (أكمل المسار العام)
+        # قوالب جديدة لم تُحفظ بعد (يكتبها الحافظ الخلفي في TelegramSignalClient)
+        self.templates_dirty = False
+
+        # فلتر الرفض المبكر قبل التحليل الكامل
+        self.prefilter_enabled = prefilter
+        self.prefilter_checked = 0
+        self.prefilter_rejects = Counter()
+        if patterns_file:
+            self.load_templates(patterns_file)
+
+        # محرك مطابقة الرموز: الأولوية تتبع نسخة القائمة، والتعبير المنتظم يُبنى
+        # عند أول مطابقة بعد أي تغيير (إضافة عدة رموز متتالية = بناء واحد)
+        self._symbol_priority: Dict[str, int] = {}
+        self._priority_version = -1
+        self._symbol_regex = None
+        self._matcher_version = -1
+
+        # جدول نطاقات الأسعار (يمكن توليده من خصائص الرموز المحفوظة)
+        self.price_ranges = PriceRangeTable(price_ranges_file)
+        if symbols_info_file:
+            self.price_ranges.seed_from_symbols_info(symbols_info_file)
+
+        # ذاكرة مؤقتة LRU لنتائج التحليل (0 = معطلة)
+        self.cache_size = cache_size
+        self._cache: OrderedDict = OrderedDict()
+        self._cache_state = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @property
+    def symbols(self) -> SymbolList:
+        """قائمة رموز الأصول بترتيب الأولوية"""
+        return self._symbols
+
+    @symbols.setter
+    def symbols(self, symbols: Iterable[str]):
+        # قائمة جديدة = نسخة جديدة، حتى لا تطابق نسخة المحرك المبني من القائمة السابقة
+        previous = self.__dict__.get('_symbols')
+        self._symbols = SymbolList(symbols, previous.version + 1 if previous is not None else 0)
 
     def normalize_symbol(self, symbol: str) -> str:
         """توحيد رمز الأصل"""
@@ -64,27 +395,77 @@ class SignalParser:
 
         return symbol
 
-    def extract_symbol(self, text: str) -> Optional[str]:
-        """استخراج رمز الأصل من النص"""
-        text_upper = text.upper()
-
-        # إزالة الرموز الخاصة من النص للبحث
-        cleaned_text = re.sub(r'[#@_\-]', ' ', text_upper)
+    # أحرف تُستبدل بمسافات قبل البحث عن الرموز
+    _SYMBOL_CLEAN_RE = re.compile(r'[#@_\-]')
+    # أنماط عامة مثل XXXYYY
+    _CURRENCY_RE = re.compile(r'([A-Z]{6,7})')
 
+    def _sync_symbol_priority(self):
+        """أولوية كل رمز حسب ترتيبه في self.symbols (تُحسب من جديد فقط بعد تغيّر القائمة)"""
+        if self._priority_version == self.symbols.version:
+            return
+        self._symbol_priority = {}
         for symbol in self.symbols:
-            # البحث عن الرمز في النص (مع وبدون رموز خاصة)
-            pattern = r'\b' + re.escape(symbol) + r'\b'
-            if re.search(pattern, text_upper) or re.search(pattern, cleaned_text):
-                return self.normalize_symbol(symbol)
+            symbol = symbol.upper()
+            if symbol not in self._symbol_priority:
+                self._symbol_priority[symbol] = len(self._symbol_priority)
+        self._priority_version = self.symbols.version
 
-            # البحث عن الرمز حتى لو كان ملتصقاً بكلمات أخرى
-            # مثل: #XAUUSD_SELL أو XAUUSD_BUY
-            if symbol in text_upper or symbol in cleaned_text:
-                return self.normalize_symbol(symbol)
+    def _symbol_matcher(self):
+        """تعبير منتظم واحد يطابق جميع الرموز بترتيب الأولوية (None إذا كانت القائمة فارغة)
+
+        الترتيب داخل البدائل هو نفس ترتيب self.symbols، لذلك عند نفس الموضع
+        يُلتقط الرمز ذو الأولوية الأعلى أولاً. يُعاد بناؤه عند تغيّر نسخة القائمة فقط.
+        """
+        if self._matcher_version != self.symbols.version:
+            self._sync_symbol_priority()
+            alternation = '|'.join(re.escape(symbol) for symbol in self._symbol_priority)
+            # lookahead للسماح بالتطابقات المتداخلة (مثل XAUUSD و XAU)
+            self._symbol_regex = re.compile('(?=(' + alternation + '))') if alternation else None
+            self._matcher_version = self.symbols.version
+        return self._symbol_regex
+
+    def add_symbol(self, symbol: str) -> bool:
+        """إضافة رمز جديد لقائمة الرموز (بأقل أولوية)
+
+        الأولوية تُحدّث مباشرة، والتعبير المنتظم يُبنى مرة واحدة عند أول مطابقة
+        """
+        symbol = symbol.upper().strip()
+        self._sync_symbol_priority()
+        if not symbol or symbol in self._symbol_priority:
+            return False
+
+        self.symbols.append(symbol)
+        self._symbol_priority[symbol] = len(self._symbol_priority)
+        self._priority_version = self.symbols.version
+        return True
+
+    def extract_symbol(self, text) -> Optional[str]:
+        """استخراج رمز الأصل من النص (مسح واحد للنص)"""
+        text_upper = text.text_upper if isinstance(text, MessageTokens) else text.upper()
+
+        # يُعاد البناء إذا عُدّلت القائمة (مباشرة أو عبر add_symbol)
+        regex = self._symbol_matcher()
+
+        # البحث عن أعلى رمز أولوية في النص، حتى لو كان ملتصقاً بكلمات أخرى
+        # مثل: #XAUUSD_SELL أو XAUUSD_BUY
+        if regex is not None:
+            best_symbol = None
+            best_priority = len(self._symbol_priority)
+            for match in regex.finditer(text_upper):
+                priority = self._symbol_priority[match.group(1)]
+                if priority < best_priority:
+                    best_symbol, best_priority = match.group(1), priority
+                    if priority == 0:
+                        break
+            if best_symbol:
+                return self.normalize_symbol(best_symbol)
+
+        # إزالة الرموز الخاصة من النص للبحث
+        cleaned_text = self._SYMBOL_CLEAN_RE.sub(' ', text_upper)
 
         # محاولة إيجاد أنماط عامة مثل XXXYYY
-        currency_pattern = r'([A-Z]{6,7})'
-        matches = re.findall(currency_pattern, cleaned_text)
+        matches = self._CURRENCY_RE.findall(cleaned_text)
         if matches:
             for match in matches:
                 # تحقق أن الكلمة ليست BUY أو SELL
@@ -93,57 +474,129 @@ class SignalParser:
 
         return None
 
-    def extract_action(self, text: str) -> Tuple[Optional[str], str]:
+    # أنماط الأوامر المعلقة (مرتبة حسب الأولوية - الأطول أولاً)
+    # استخدام أنماط محددة جداً لتجنب التطابق مع SL/TP
+    _PENDING_ORDER_PATTERNS = [
+        (re.compile(r'\bBUY\s+LIMIT\b'), 'BUY', 'BUY_LIMIT'),
+        (re.compile(r'\bSELL\s+LIMIT\b'), 'SELL', 'SELL_LIMIT'),
+        (re.compile(r'\bBUY\s+STOP\b'), 'BUY', 'BUY_STOP'),
+        (re.compile(r'\bSELL\s+STOP\b'), 'SELL', 'SELL_STOP'),
+    ]
+
+    # أنماط الشراء الفوري
+    _BUY_RE = re.compile(r'\bBUY\b|\bLONG\b|\bCALL\b|\bBUYING\b|🟢|⬆️|📈|🔼')
+
+    # أنماط البيع الفوري
+    _SELL_RE = re.compile(r'\bSELL\b|\bSHORT\b|\bPUT\b|\bSELLING\b|🔴|⬇️|📉|🔽')
+
+    # نمط لاستخراج الأرقام (بما في ذلك الفاصلة العشرية)
+    _NUMBER_RE = re.compile(r'(\d+[\.,]?\d*)')
+
+    # أنماط TP المختلفة
+    _TP_KEYWORDS = (
+        'TP', 'TAKE PROFIT', 'TARGET', 'T.P', 'PROFIT',
+        'TAKE-PROFIT', 'TAKEPROFIT', 'T P', 'TP:', 'TP-',
+        'OBJETIVO', 'GOAL'  # دعم لغات أخرى
+    )
+
+    # أنماط SL المختلفة (regex واحد لتجنب التطابقات الخاطئة)
+    _SL_RE = re.compile(
+        r'\bSL\b|\bSTOP\sLOSS\b|\bSTOP\b|\bS\.L\b|\bSTOPLOSS\b'
+        r'|\bSTOP-LOSS\b|\bS\sL\b|\bSL:|\bSL-|\bSTOP:'
+    )
+
+    def tokenize(self, text: str) -> MessageTokens:
+        """تقطيع الرسالة مرة واحدة: الأسطر، نسخها الكبيرة، الأرقام ومواضعها، والكلمات المفتاحية"""
+        lines = []
+        all_numbers = []
+        offset = 0
+
+        for index, line in enumerate(text.split('\n')):
+            line_upper = line.upper()
+
+            numbers = []
+            spans = []
+            for match in self._NUMBER_RE.finditer(line):
+                try:
+                    # تحويل الفاصلة إلى نقطة
+                    numbers.append(float(match.group(1).replace(',', '')))
+                    spans.append((offset + match.start(), offset + match.end()))
+                except ValueError:
+                    continue
+
+            lines.append(MessageLine(
+                index=index,
+                text=line,
+                upper=line_upper,
+                offset=offset,
+                numbers=numbers,
+                number_spans=spans,
+                is_noise='%' in line or 'SURE' in line_upper or 'SIGNAL' in line_upper,
+                has_tp=any(pattern in line_upper for pattern in self._TP_KEYWORDS),
+                has_sl=self._SL_RE.search(line_upper) is not None,
+                has_entry_marker='NOW' in line_upper or 'PRICE' in line_upper or '@' in line,
+            ))
+            all_numbers.extend(numbers)
+            offset += len(line) + 1
+
+        return MessageTokens(
+            text=text,
+            text_upper=text.upper(),
+            lines=lines,
+            numbers=all_numbers
+        )
+
+    def _tokens(self, text) -> MessageTokens:
+        """قبول نص أو رسالة مقطّعة مسبقاً"""
+        if isinstance(text, MessageTokens):
+            return text
+        return self.tokenize(text)
+
+    def _line_valid_prices(self, tokens: MessageTokens, line: MessageLine, symbol: str) -> List[float]:
+        """الأسعار الصالحة في سطر (تُحسب مرة واحدة لكل رمز)"""
+        key = (line.index, symbol)
+        valid = tokens._valid_prices.get(key)
+        if valid is None:
+            valid = self.filter_valid_prices(line.numbers, symbol)
+            tokens._valid_prices[key] = valid
+        return valid
+
+    def _all_valid_prices(self, tokens: MessageTokens, symbol: str) -> List[float]:
+        """جميع الأسعار الصالحة في الرسالة بالترتيب"""
+        valid = []
+        for line in tokens.lines:
+            valid.extend(self._line_valid_prices(tokens, line, symbol))
+        return valid
+
+    def extract_action(self, text) -> Tuple[Optional[str], str]:
         """استخراج نوع الصفقة ونوع الأمر (شراء/بيع + فوري/معلق)
-        
+
         Returns:
             Tuple[Optional[str], str]: (action, order_type)
             - action: 'BUY' أو 'SELL'
             - order_type: 'MARKET', 'BUY_LIMIT', 'SELL_LIMIT', 'BUY_STOP', 'SELL_STOP'
         """
-        text_upper = text.upper()
-
-        # أنماط الأوامر المعلقة (مرتبة حسب الأولوية - الأطول أولاً)
-        # استخدام أنماط محددة جداً لتجنب التطابق مع SL/TP
-        if re.search(r'\bBUY\s+LIMIT\b', text_upper):
-            return 'BUY', 'BUY_LIMIT'
-        elif re.search(r'\bSELL\s+LIMIT\b', text_upper):
-            return 'SELL', 'SELL_LIMIT'
-        elif re.search(r'\bBUY\s+STOP\b', text_upper):
-            return 'BUY', 'BUY_STOP'
-        elif re.search(r'\bSELL\s+STOP\b', text_upper):
-            return 'SELL', 'SELL_STOP'
-
-        # أنماط الشراء الفوري
-        buy_patterns = [
-            r'\bBUY\b', r'\bLONG\b', r'\bCALL\b', r'\bBUYING\b',
-            r'🟢', r'⬆️', r'📈', r'🔼'
-        ]
+        text_upper = text.text_upper if isinstance(text, MessageTokens) else text.upper()
 
-        # أنماط البيع الفوري
-        sell_patterns = [
-            r'\bSELL\b', r'\bSHORT\b', r'\bPUT\b', r'\bSELLING\b',
-            r'🔴', r'⬇️', r'📉', r'🔽'
-        ]
+        for pattern, action, order_type in self._PENDING_ORDER_PATTERNS:
+            if pattern.search(text_upper):
+                return action, order_type
 
-        for pattern in buy_patterns:
-            if re.search(pattern, text_upper) or pattern in text:
-                return 'BUY', 'MARKET'
+        if self._BUY_RE.search(text_upper):
+            return 'BUY', 'MARKET'
 
-        for pattern in sell_patterns:
-            if re.search(pattern, text_upper) or pattern in text:
-                return 'SELL', 'MARKET'
+        if self._SELL_RE.search(text_upper):
+            return 'SELL', 'MARKET'
 
         return None, 'MARKET'
 
     def extract_numbers(self, text: str) -> List[float]:
         """استخراج جميع الأرقام من النص"""
-        # نمط لاستخراج الأرقام (بما في ذلك الفاصلة العشرية)
-        pattern = r'(\d+[\.,]?\d*)'
-        matches = re.findall(pattern, text)
+        if isinstance(text, MessageTokens):
+            return list(text.numbers)
 
         numbers = []
-        for match in matches:
+        for match in self._NUMBER_RE.findall(text):
             try:
                 # تحويل الفاصلة إلى نقطة
                 num = float(match.replace(',', ''))
@@ -155,59 +608,17 @@ class SignalParser:
 
     def filter_valid_prices(self, numbers: List[float], symbol: str) -> List[float]:
         """تصفية الأسعار المنطقية فقط حسب نوع الأصل"""
-        if not numbers:
-            return []
-
-        valid_prices = []
-
-        for num in numbers:
-            # تجاهل النسب المئوية والأرقام الصغيرة جداً
-            if num <= 100:
-                continue
-
-            # تصفية حسب نوع الأصل
-            if symbol in ['XAUUSD', 'GOLD', 'XAU']:
-                # الذهب عادة بين 1000-10000
-                if 1000 <= num <= 10000:
-                    valid_prices.append(num)
-            elif symbol in ['BTCUSD', 'BTC']:
-                # البيتكوين عادة بين 1000-200000
-                if 1000 <= num <= 200000:
-                    valid_prices.append(num)
-            elif symbol in ['EURUSD', 'GBPUSD', 'AUDUSD', 'NZDUSD']:
-                # العملات الرئيسية عادة بين 0.5-2.0
-                if 0.5 <= num <= 2.0:
-                    valid_prices.append(num)
-            elif symbol in ['USDJPY', 'EURJPY', 'GBPJPY']:
-                # الين الياباني بين 50-200
-                if 50 <= num <= 200:
-                    valid_prices.append(num)
-            elif symbol in ['US30', 'NAS100', 'US100', 'SPX500']:
-                # المؤشرات
-                if 1000 <= num <= 50000:
-                    valid_prices.append(num)
-            elif symbol in ['OIL', 'USOIL', 'UKOIL', 'WTI', 'BRENT']:
-                # النفط بين 20-200
-                if 20 <= num <= 200:
-                    valid_prices.append(num)
-            else:
-                # أصول أخرى: نقبل أي رقم معقول > 100
-                if num > 100:
-                    valid_prices.append(num)
+        return self.price_ranges.filter(numbers, symbol)
 
-        return valid_prices
-
-    def extract_entry_price(self, text: str, symbol: str) -> Tuple[Optional[float], Optional[Tuple[float, float]]]:
+    def extract_entry_price(self, text, symbol: str) -> Tuple[Optional[float], Optional[Tuple[float, float]]]:
         """استخراج سعر الدخول (قد يكون سعر واحد أو نطاق)"""
-        lines = text.split('\n')
+        tokens = self._tokens(text)
 
         # البحث عن سعر الدخول في السطر الأول أو بعد NOW/Price
-        for line in lines[:3]:  # نبحث في أول 3 أسطر
-            line_upper = line.upper()
-
+        for line in tokens.lines[:3]:  # نبحث في أول 3 أسطر
             # نمط: SYMBOL ACTION NOW PRICE
-            if 'NOW' in line_upper or 'PRICE' in line_upper or '@' in line:
-                numbers = self.extract_numbers(line)
+            if line.has_entry_marker:
+                numbers = line.numbers
 
                 if len(numbers) == 1:
                     return numbers[0], None
@@ -216,42 +627,29 @@ class SignalParser:
                     return None, (min(numbers), max(numbers))
 
         # إذا لم نجد "NOW"، نبحث عن رقم بعد نوع الصفقة مباشرة
-        all_numbers = self.extract_numbers(text)
-        if all_numbers:
-            return all_numbers[0], None
+        if tokens.numbers:
+            return tokens.numbers[0], None
 
         return None, None
 
-    def extract_take_profits(self, text: str, symbol: str) -> List[float]:
+    def extract_take_profits(self, text, symbol: str) -> List[float]:
         """استخراج جميع مستويات أخذ الربح"""
+        tokens = self._tokens(text)
         take_profits = []
-        lines = text.split('\n')
-
-        for line in lines:
-            line_upper = line.upper()
 
+        for line in tokens.lines:
             # تجاهل السطور التي تحتوي على نسب مئوية أو كلمات غير متعلقة بـ TP
-            if '%' in line or 'SURE' in line_upper or 'SIGNAL' in line_upper:
+            if line.is_noise:
                 continue
 
             # تجاهل السطور التي تحتوي على SL
-            if 'SL' in line_upper and 'TP' not in line_upper:
+            if 'SL' in line.upper and 'TP' not in line.upper:
                 continue
 
-            # البحث عن أنماط TP المختلفة
-            tp_patterns = [
-                'TP', 'TAKE PROFIT', 'TARGET', 'T.P', 'PROFIT',
-                'TAKE-PROFIT', 'TAKEPROFIT', 'T P', 'TP:', 'TP-',
-                'OBJETIVO', 'GOAL'  # دعم لغات أخرى (أزلنا التكرار)
-            ]
-
             # البحث عن TP في السطر
-            has_tp = any(pattern in line_upper for pattern in tp_patterns)
-
-            if has_tp:
-                numbers = self.extract_numbers(line)
+            if line.has_tp:
                 # تصفية الأرقام المنطقية فقط
-                valid_numbers = self.filter_valid_prices(numbers, symbol)
+                valid_numbers = self._line_valid_prices(tokens, line, symbol)
 
                 if valid_numbers:
                     # نأخذ آخر رقم صالح في السطر (عادة هو السعر)
@@ -260,8 +658,7 @@ class SignalParser:
         # إذا لم نجد TP بالطريقة التقليدية، نبحث عن أنماط رقمية
         if not take_profits:
             # نبحث عن أرقام متتالية قد تكون أهداف
-            all_numbers = self.extract_numbers(text)
-            valid_numbers = self.filter_valid_prices(all_numbers, symbol)
+            valid_numbers = self._all_valid_prices(tokens, symbol)
 
             if len(valid_numbers) >= 3:  # على الأقل: دخول، tp، sl
                 # نأخذ الأرقام الوسطى كأهداف محتملة
@@ -271,34 +668,21 @@ class SignalParser:
 
         return sorted(take_profits) if take_profits else []
 
-    def extract_stop_loss(self, text: str, symbol: str) -> Optional[float]:
+    def extract_stop_loss(self, text, symbol: str) -> Optional[float]:
         """استخراج وقف الخسارة"""
-        lines = text.split('\n')
-
-        for line in lines:
-            line_upper = line.upper()
+        tokens = self._tokens(text)
 
+        for line in tokens.lines:
             # تجاهل السطور التي تحتوي على نسب مئوية
-            if '%' in line or 'SURE' in line_upper or 'SIGNAL' in line_upper:
+            if line.is_noise:
                 continue
 
             # تجاهل السطور التي تحتوي على TP فقط بدون SL
-            if 'TP' in line_upper and not any(sl in line_upper for sl in ['SL', 'STOP']):
+            if 'TP' in line.upper and not ('SL' in line.upper or 'STOP' in line.upper):
                 continue
 
-            # البحث عن أنماط SL المختلفة
-            sl_patterns = [
-                r'\bSL\b', r'\bSTOP\sLOSS\b', r'\bSTOP\b', r'\bS\.L\b', r'\bSTOPLOSS\b',
-                r'\bSTOP-LOSS\b', r'\bS\sL\b', r'\bSL:', r'\bSL-', r'\bSTOP:',
-            ]
-
-            # البحث باستخدام regex لتجنب التطابقات الخاطئة
-            has_sl = any(re.search(pattern, line_upper) for pattern in sl_patterns)
-
-            if has_sl:
-                # استخراج الأرقام من السطر
-                numbers = self.extract_numbers(line)
-                valid_numbers = self.filter_valid_prices(numbers, symbol)
+            if line.has_sl:
+                valid_numbers = self._line_valid_prices(tokens, line, symbol)
 
                 if valid_numbers:
                     # نأخذ آخر رقم صالح (عادة يكون SL)
@@ -306,89 +690,457 @@ class SignalParser:
 
         # إذا لم نجد SL بالطريقة التقليدية
         # نأخذ آخر رقم صالح في الرسالة (عادة يكون SL)
-        all_numbers = self.extract_numbers(text)
-        valid_numbers = self.filter_valid_prices(all_numbers, symbol)
+        valid_numbers = self._all_valid_prices(tokens, symbol)
 
         if len(valid_numbers) >= 2:
             return valid_numbers[-1]  # آخر رقم صالح
 
         return None
 
-    def parse(self, message_text: str, channel_name: str = None) -> Optional[Signal]:
-        """تحليل رسالة التليجرام واستخراج الإشارة - محسّن"""
+    def extract_fields(self, text, complete: bool = True, channel_name: str = None) -> Dict:
+        """استخراج جميع مكونات الإشارة من تقطيع واحد للرسالة
+
+        Args:
+            text: نص الرسالة أو رسالة مقطّعة مسبقاً
+            complete: استخراج جميع الحقول حتى لو لم يوجد رمز أو نوع صفقة
+                      (مفيد للتشخيص)
+            channel_name: اسم القناة لتجربة قوالبها المتعلَّمة أولاً
+
+        Returns:
+            قاموس بالحقول: symbol, action, entry_price, entry_range, take_profits, stop_loss
+        """
+        tokens = self._tokens(text)
+
+        fields = {
+            'symbol': self.extract_symbol(tokens),
+            'action': self.extract_action(tokens),
+            'entry_price': None,
+            'entry_range': None,
+            'take_profits': [],
+            'stop_loss': None
+        }
+
+        if not complete and not (fields['symbol'] and fields['action'][0]):
+            return fields
+
+        symbol = fields['symbol'] or ""
+
+        # المسار السريع: قالب القناة المتعلَّم
+        if fields['symbol'] and fields['action'][0] and self._apply_template(tokens, symbol, fields, channel_name):
+            return fields
+
+        fields['entry_price'], fields['entry_range'] = self.extract_entry_price(tokens, symbol)
+        fields['take_profits'] = self.extract_take_profits(tokens, symbol)
+        fields['stop_loss'] = self.extract_stop_loss(tokens, symbol)
+
+        return fields
+
+    # ===== القوالب المتعلَّمة لكل قناة =====
+
+    # الحد الأقصى لعدد القوالب المحفوظة لكل قناة
+    MAX_TEMPLATES_PER_CHANNEL = 5
+
+    # خاصية السطر في التوقيع: يحتوي أسعاراً صالحة للرمز
+    _VALID_PRICES_FLAG = 64
+
+    def _line_flags(self, tokens: MessageTokens, line: MessageLine, symbol: str) -> int:
+        """ملخص السطر كما تراه دوال الاستخراج (الكلمات المفتاحية والأسعار الصالحة)"""
+        upper = line.upper
+        return (
+            (1 if line.is_noise else 0)
+            | (2 if line.has_tp else 0)
+            | (4 if line.has_sl else 0)
+            | (8 if line.has_entry_marker else 0)
+            | (16 if 'SL' in upper and 'TP' not in upper else 0)
+            | (32 if 'TP' in upper and not ('SL' in upper or 'STOP' in upper) else 0)
+            | (self._VALID_PRICES_FLAG if self._line_valid_prices(tokens, line, symbol) else 0)
+        )
+
+    def _layout_signature(self, tokens: MessageTokens, symbol: str) -> Tuple:
+        """توقيع تخطيط الرسالة: (رقم السطر، عدد الأرقام، الخصائص) لكل سطر يحتوي أرقاماً"""
+        return tuple(
+            (line.index, len(line.numbers), self._line_flags(tokens, line, symbol))
+            for line in tokens.lines if line.numbers
+        )
+
+    def _learn_template(self, tokens: MessageTokens, symbol: str) -> Optional[Dict]:
+        """تعلّم قالب من رسالة نجح تحليلها بالمسار العام
+
+        يسجل أسطر الدخول/TP/SL بنفس قواعد دوال الاستخراج، ولا يتعلم إذا
+        اعتمد التحليل على التخمين الاحتياطي (الأرقام الوسطى أو آخر رقم).
+        """
+        entry_line = None
+        entry_range = False
+        for line in tokens.lines[:3]:
+            if line.has_entry_marker and len(line.numbers) in (1, 2):
+                entry_line, entry_range = line.index, len(line.numbers) == 2
+                break
+        if entry_line is None:
+            entry_line = next((line.index for line in tokens.lines if line.numbers), None)
+        if entry_line is None:
+            return None
+
+        tp_lines = []
+        sl_line = None
+        for line in tokens.lines:
+            if line.is_noise or not self._line_valid_prices(tokens, line, symbol):
+                continue
+            if line.has_tp and not ('SL' in line.upper and 'TP' not in line.upper):
+                tp_lines.append(line.index)
+            if sl_line is None and line.has_sl and not ('TP' in line.upper and not ('SL' in line.upper or 'STOP' in line.upper)):
+                sl_line = line.index
+
+        if not tp_lines or sl_line is None:
+            return None
+
+        return {
+            'signature': [list(item) for item in self._layout_signature(tokens, symbol)],
+            'entry': {'line': entry_line, 'range': entry_range},
+            'take_profits': tp_lines,
+            'stop_loss': sl_line,
+            'learned': datetime.now().isoformat(),
+            'hits': 0
+        }
+
+    def _apply_template(self, tokens: MessageTokens, symbol: str, fields: Dict,
+                        channel_name: Optional[str]) -> bool:
+        """تطبيق قالب مطابق (للقناة أولاً ثم القوالب المخصصة العامة)"""
+        channel_templates = self.channel_templates.get(channel_name) if channel_name else None
+        if not channel_templates and not self._custom_templates:
+            return False
+
+        signature = self._layout_signature(tokens, symbol)
+        template = channel_templates.get(signature) if channel_templates else None
+        if template is not None:
+            channel_templates.move_to_end(signature)
+        else:
+            template = self._custom_templates.get(signature)
+            if template is None:
+                return False
+
+        # القالب لا يناسب الرسالة رغم تطابق التوقيع: المسار العام يكمل التحليل
         try:
-            # استخراج المكونات الأساسية
-            symbol = self.extract_symbol(message_text)
-            if not symbol:
-                return None  # يجب أن يكون هناك رمز على الأقل
+            lines = tokens.lines
+            entry = lines[template['entry']['line']].numbers
+            if template['entry']['range']:
+                entry_price, entry_range = None, (min(entry), max(entry))
+            else:
+                entry_price, entry_range = entry[0], None
 
-            action, order_type = self.extract_action(message_text)
-            if not action:
-                return None  # يجب أن يكون هناك نوع صفقة
+            take_profits = sorted(
+                self._line_valid_prices(tokens, lines[index], symbol)[-1] for index in template['take_profits']
+            )
+            stop_loss = self._line_valid_prices(tokens, lines[template['stop_loss']], symbol)[-1]
+        except (IndexError, KeyError, TypeError, ValueError):
+            self.template_errors += 1
+            return False
 
-            entry_price, entry_range = self.extract_entry_price(message_text, symbol)
-            take_profits = self.extract_take_profits(message_text, symbol)
-            stop_loss = self.extract_stop_loss(message_text, symbol)
+        fields['entry_price'], fields['entry_range'] = entry_price, entry_range
+        fields['take_profits'] = take_profits
+        fields['stop_loss'] = stop_loss
 
-            # التحقق الصارم من المتطلبات الأساسية
-            if not take_profits:
-                return None
+        template['hits'] = template.get('hits', 0) + 1
+        self.template_hits += 1
+        tokens.template = template
+        return True
 
-            if not stop_loss:
-                return None
+    @classmethod
+    def _valid_template(cls, template: Dict) -> bool:
+        """فحص بنية قالب محمّل أو مخصص: أسطر الدخول/TP/SL موجودة في توقيعه وأسطر TP/SL فيها أسعار"""
+        try:
+            lines = {index: (count, flags) for index, count, flags in template['signature']}
+            entry = lines.get(template['entry']['line'])
+            entry_range = template['entry'].get('range')
+            targets = list(template['take_profits']) + [template['stop_loss']]
+            if entry is None or not template['take_profits'] or (entry_range and entry[0] != 2):
+                return False
+            return all(index in lines and lines[index][1] & cls._VALID_PRICES_FLAG for index in targets)
+        except (KeyError, TypeError, ValueError, AttributeError):
+            return False
 
-            if not (entry_price or entry_range):
-                return None
+    def _register_template(self, channel_name: str, template: Dict) -> bool:
+        """إضافة قالب لقناة (مع حد أقصى للعدد)"""
+        templates = self.channel_templates.setdefault(channel_name, OrderedDict())
+        signature = tuple(tuple(item) for item in template['signature'])
+        if signature in templates:
+            return False
+        templates[signature] = template
+        while len(templates) > self.MAX_TEMPLATES_PER_CHANNEL:
+            templates.popitem(last=False)
+        return True
 
-            # تحديد سعر المرجع
-            reference_price = entry_price if entry_price else sum(entry_range) / 2
-            
-            # تصفية TPs لإزالة TPs غير المنطقية
-            if action == 'BUY':
-                # في BUY: نبقي TPs >= Entry فقط
-                filtered_tps = [tp for tp in take_profits if tp >= reference_price]
-                # إذا كان أول TP يساوي Entry، نحتفظ به كنقطة تأكيد
-                if filtered_tps and filtered_tps[0] == reference_price:
-                    # نبحث عن TPs أعلى
-                    higher_tps = [tp for tp in take_profits if tp > reference_price]
-                    if higher_tps:
-                        # نستخدم TPs الأعلى فقط
-                        filtered_tps = sorted(higher_tps)
-                take_profits = filtered_tps
-            else:  # SELL
-                # في SELL: نبقي TPs <= Entry فقط
-                filtered_tps = [tp for tp in take_profits if tp <= reference_price]
-                if filtered_tps and filtered_tps[0] == reference_price:
-                    # نبحث عن TPs أقل
-                    lower_tps = [tp for tp in take_profits if tp < reference_price]
-                    if lower_tps:
-                        # نستخدم TPs الأقل فقط
-                        filtered_tps = sorted(lower_tps, reverse=True)
-                take_profits = filtered_tps
-            
-            # التأكد من وجود TPs بعد التصفية
-            if not take_profits:
-                print(f"⚠️ لا توجد TPs صالحة بعد التصفية للإشارة {symbol} {action}")
-                return None
+    def learn_from_message(self, tokens: MessageTokens, symbol: str, channel_name: str) -> bool:
+        """تعلّم قالب القناة من رسالة ناجحة (الحفظ مؤجل - انظر templates_dirty)"""
+        template = self._learn_template(tokens, symbol)
+        if not template or not self._register_template(channel_name, template):
+            return False
+        self.templates_dirty = True
+        return True
 
-            # التحقق الصارم من صحة البيانات
-            if not self.validate_signal_data(symbol, action, entry_price, entry_range,
-                                            take_profits, stop_loss):
-                return None
+    def get_channel_templates(self, channel_name: str) -> List[Dict]:
+        """قوالب قناة معينة"""
+        return list(self.channel_templates.get(channel_name, {}).values())
+
+    def load_templates(self, file_path: Optional[str] = None) -> int:
+        """تحميل القوالب من data/patterns.json"""
+        file_path = file_path or self.patterns_file
+        try:
+            if not file_path or not os.path.exists(file_path):
+                return 0
+            with open(file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+
+            count = 0
+            skipped = 0
+            for channel_name, templates in data.get('channels', {}).items():
+                for template in templates:
+                    if not self._valid_template(template):
+                        skipped += 1
+                        continue
+                    count += self._register_template(channel_name, template)
+            for pattern in data.get('custom', []):
+                if self.add_custom_pattern(pattern):
+                    count += 1
+                else:
+                    skipped += 1
+            if skipped:
+                print(f"⚠️ تم تجاهل {skipped} قالب غير صالح في {file_path}")
+            return count
+        except Exception as e:
+            print(f"❌ خطأ في تحميل القوالب: {str(e)}")
+            return 0
+
+    def templates_snapshot(self) -> Dict:
+        """نسخة ثابتة من القوالب للحفظ (تُكتب لاحقاً خارج حلقة الأحداث)"""
+        return {
+            'channels': {
+                channel_name: [dict(template) for template in templates.values()]
+                for channel_name, templates in self.channel_templates.items()
+            },
+            'custom': list(self.custom_patterns)
+        }
+
+    def save_templates(self, file_path: Optional[str] = None) -> bool:
+        """حفظ القوالب إلى data/patterns.json (فوري وذري)"""
+        file_path = file_path or self.patterns_file
+        if not file_path:
+            return False
+        try:
+            os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
+            atomic_write_json(file_path, self.templates_snapshot())
+            if file_path == self.patterns_file:
+                self.templates_dirty = False
+            return True
+        except Exception as e:
+            print(f"❌ خطأ في حفظ القوالب: {str(e)}")
+            return False
+
+    # رموز تعبيرية تُستبدل بمسافة في مفتاح الذاكرة المؤقتة
+    # (رموز الشراء/البيع مستثناة لأنها تحدد نوع الصفقة)
+    _CACHE_EMOJI_RE = re.compile(
+        '(?![🟢🔴📈📉🔼🔽⬆⬇])'
+        '[\U0001F000-\U0001FAFF\u2300-\u23FF\u2600-\u27BF\u2B00-\u2BFF\u200D]'
+    )
+    _CACHE_SPACE_RE = re.compile(r'[ \t\r\f\v\u00A0]+')
+
+    def normalize_message(self, message_text: str) -> str:
+        """توحيد نص الرسالة لمفتاح الذاكرة المؤقتة
+
+        إزالة الرموز التعبيرية وضغط المسافات داخل كل سطر، مع الحفاظ على الأسطر
+        (موضع السطر يؤثر على استخراج سعر الدخول).
+        """
+        text = self._CACHE_EMOJI_RE.sub(' ', message_text)
+        return '\n'.join(self._CACHE_SPACE_RE.sub(' ', line).strip() for line in text.split('\n'))
+
+    def _message_key(self, message_text: str) -> bytes:
+        return hashlib.blake2b(self.normalize_message(message_text).encode('utf-8'), digest_size=16).digest()
+
+    def get_cache_stats(self) -> Dict:
+        """إحصائيات الذاكرة المؤقتة للتحليل"""
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            'enabled': self.cache_size > 0,
+            'size': len(self._cache),
+            'capacity': self.cache_size,
+            'hits': self.cache_hits,
+            'misses': self.cache_misses,
+            'hit_ratio': round(self.cache_hits / lookups, 4) if lookups else 0.0
+        }
+
+    def clear_cache(self):
+        """مسح الذاكرة المؤقتة للتحليل"""
+        self._cache.clear()
+
+    # ===== فلتر الرفض المبكر =====
+
+    # مسح واحد للنص: كلمات نوع الصفقة أو أرقام قد تكون أسعاراً
+    _PREFILTER_RE = re.compile(
+        '(?P<action>' + _BUY_RE.pattern + '|' + _SELL_RE.pattern + ')|(?P<number>' + _NUMBER_RE.pattern + ')'
+    )
+    # كلمة من 6 أحرف على الأقل (نمط الرموز العامة XXXYYY)
+    _GENERIC_SYMBOL_RE = re.compile(r'[A-Z]{6}')
+
+    def prefilter(self, message_text: str) -> Optional[str]:
+        """فحص سريع يرفض الرسائل التي لا يمكن أن تكون إشارة قبل أي استخراج
+
+        الشروط هي نفس متطلبات parse (نوع صفقة، رقم أكبر من الحد الأدنى للأسعار،
+        ورمز)، لذلك لا تُرفض أي رسالة كان التحليل الكامل سيقبلها.
+
+        Returns:
+            سبب الرفض ('empty', 'no_action', 'no_price', 'no_symbol') أو None
+        """
+        self.prefilter_checked += 1
+
+        if not message_text or not message_text.strip():
+            reason = 'empty'
+        else:
+            text_upper = message_text.upper()
+            has_action = False
+            has_price = False
+
+            for match in self._PREFILTER_RE.finditer(text_upper):
+                if match.lastgroup == 'action':
+                    has_action = True
+                elif not has_price:
+                    # أقصر سعر صالح في جدول النطاقات (مثل 1.08 أو 75.5 أو 3330) فيه 3 أرقام على الأقل
+                    has_price = sum(ch.isdigit() for ch in match.group('number')) >= 3
+                if has_action and has_price:
+                    break
+
+            if not has_action:
+                reason = 'no_action'
+            elif not has_price:
+                reason = 'no_price'
+            else:
+                regex = self._symbol_matcher()
+                has_symbol = ((regex is not None and regex.search(text_upper))
+                              or self._GENERIC_SYMBOL_RE.search(text_upper))
+                reason = None if has_symbol else 'no_symbol'
+
+        if reason:
+            self.prefilter_rejects[reason] += 1
+        return reason
+
+    def get_prefilter_stats(self) -> Dict:
+        """إحصائيات فلتر الرفض المبكر"""
+        rejected = sum(self.prefilter_rejects.values())
+        return {
+            'enabled': self.prefilter_enabled,
+            'checked': self.prefilter_checked,
+            'rejected': rejected,
+            'passed': self.prefilter_checked - rejected,
+            'reasons': dict(self.prefilter_rejects)
+        }
+
+    def parse(self, message_text: str, channel_name: str = None,
+              diagnostics: Optional[Dict] = None) -> Optional[Signal]:
+        """تحليل رسالة التليجرام واستخراج الإشارة - محسّن
+
+        Args:
+            message_text: نص الرسالة
+            channel_name: اسم القناة
+            diagnostics: قاموس اختياري يُملأ بالحقول المستخرجة (للتشخيص عند الفشل)
+        """
+        # رفض مبكر للرسائل غير المتعلقة بالإشارات (دردشة، نتائج، ترويج)
+        if self._rejected_early(message_text, diagnostics):
+            return None
+
+        return self._parse_cached(message_text, channel_name, diagnostics)
+
+    def _rejected_early(self, message_text: str, diagnostics: Optional[Dict] = None) -> bool:
+        """تطبيق فلتر الرفض المبكر وتعبئة التشخيص بسبب الرفض"""
+        if not self.prefilter_enabled:
+            return False
+
+        reason = self.prefilter(message_text)
+        if not reason:
+            return False
+
+        if diagnostics is not None:
+            diagnostics.update({
+                'symbol': None, 'action': (None, 'MARKET'), 'entry_price': None,
+                'entry_range': None, 'take_profits': [], 'stop_loss': None,
+                'rejected': reason
+            })
+        return True
+
+    def _parse_cached(self, message_text: str, channel_name: str = None,
+                      diagnostics: Optional[Dict] = None,
+                      tokens: Optional[MessageTokens] = None) -> Optional[Signal]:
+        """التحليل عبر الذاكرة المؤقتة (إن كانت مفعلة)
 
-            # إنشاء كائن الإشارة
-            signal = Signal(
-                symbol=symbol,
-                action=action,
-                entry_price=entry_price,
-                entry_price_range=entry_range,
-                take_profits=take_profits,
-                stop_loss=stop_loss,
+        tokens: تقطيع الرسالة إن كان محسوباً مسبقاً (parse_all) حتى لا تُقطّع مرة ثانية
+        """
+        if self.cache_size <= 0:
+            return self._parse_uncached(message_text, channel_name, diagnostics, tokens)
+
+        # إبطال الذاكرة عند تغيير الرموز أو نطاقات الأسعار
+        state = (self.symbols.version, self.price_ranges.version)
+        if state != self._cache_state:
+            self._cache.clear()
+            self._cache_state = state
+
+        key = self._message_key(message_text)
+        entry = self._cache.get(key)
+
+        # التشخيص الجزئي لا يكفي إذا طُلب تشخيص كامل لرسالة فاشلة
+        if entry is not None and diagnostics is not None and entry[0] is None and not entry[2]:
+            entry = None
+
+        if entry is not None:
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            cached_signal, cached_fields, _ = entry
+            if diagnostics is not None:
+                diagnostics.update({k: list(v) if isinstance(v, list) else v for k, v in cached_fields.items()})
+            if cached_signal is None:
+                return None
+            # نسخة جديدة بقناة ووقت الرسالة الحالية
+            return replace(
+                cached_signal,
+                take_profits=list(cached_signal.take_profits),
+                timestamp=datetime.now().isoformat(),
                 channel_name=channel_name,
-                raw_message=message_text,
-                order_type=order_type  # إضافة نوع الأمر
+                raw_message=message_text
             )
 
+        self.cache_misses += 1
+        fields = {}
+        signal = self._parse_uncached(message_text, channel_name, fields if diagnostics is not None else None,
+                                      tokens)
+        if diagnostics is not None:
+            diagnostics.update(fields)
+
+        self._cache[key] = (
+            replace(signal, take_profits=list(signal.take_profits)) if signal else None,
+            fields,
+            diagnostics is not None
+        )
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+        return signal
+
+    def _parse_uncached(self, message_text: str, channel_name: str = None,
+                        diagnostics: Optional[Dict] = None,
+                        tokens: Optional[MessageTokens] = None) -> Optional[Signal]:
+        """التحليل الكامل للرسالة (بدون الذاكرة المؤقتة)"""
+        try:
+            # تقطيع الرسالة واستخراج المكونات مرة واحدة
+            if tokens is None:
+                tokens = self.tokenize(message_text)
+            fields = self.extract_fields(tokens, complete=diagnostics is not None, channel_name=channel_name)
+            if diagnostics is not None:
+                diagnostics.update(fields)
+
+            signal = self._signal_from_fields(fields, message_text, channel_name)
+            if signal is None:
+                return None
+
+            # تعلّم تخطيط القناة للمسار السريع في الرسائل القادمة
+            if channel_name and tokens.template is None:
+                self.learn_from_message(tokens, signal.symbol, channel_name)
+
             return signal
 
         except Exception as e:
@@ -397,6 +1149,174 @@ class SignalParser:
             traceback.print_exc()
             return None
 
+    # ===== الرسائل متعددة الإشارات =====
+
+    def _block_starts(self, tokens: MessageTokens) -> List[int]:
+        """أرقام الأسطر التي يبدأ عندها رمز جديد (مسح واحد للنص)
+
+        يبدأ مقطع جديد فقط عند تغيّر الرمز الموحَّد، فتكرار نفس الأصل
+        (مثل XAUUSD ثم GOLD) لا يقسم الإشارة.
+        """
+        regex = self._symbol_matcher()
+        if regex is None:
+            return []
+
+        offsets = [line.offset for line in tokens.lines]
+        starts = []
+        current = None
+        for match in regex.finditer(tokens.text_upper):
+            symbol = self.normalize_symbol(match.group(1))
+            if symbol == current:
+                continue
+            line_index = bisect_right(offsets, match.start()) - 1
+            # رموز متعددة في نفس السطر (مثل XAUUSD_GOLD) تبقى في نفس المقطع
+            if starts and starts[-1] == line_index:
+                continue
+            starts.append(line_index)
+            current = symbol
+
+        return starts
+
+    def split_blocks(self, text) -> List[MessageTokens]:
+        """تقسيم الرسالة إلى مقاطع لكل أصل باستخدام نفس التقطيع
+
+        الأسطر التي تسبق أول رمز تُضم إلى المقطع الأول.
+        """
+        tokens = self._tokens(text)
+        starts = self._block_starts(tokens)
+        if len(starts) < 2:
+            return [tokens]
+
+        bounds = [0] + starts[1:] + [len(tokens.lines)]
+        blocks = []
+        for first, last in zip(bounds, bounds[1:]):
+            base = tokens.lines[first].offset
+            lines = [
+                replace(
+                    line,
+                    index=line.index - first,
+                    offset=line.offset - base,
+                    number_spans=[(start - base, end - base) for start, end in line.number_spans]
+                )
+                for line in tokens.lines[first:last]
+            ]
+            block_text = '\n'.join(line.text for line in lines)
+            blocks.append(MessageTokens(
+                text=block_text,
+                text_upper=block_text.upper(),
+                lines=lines,
+                numbers=[num for line in lines for num in line.numbers]
+            ))
+        return blocks
+
+    def parse_all(self, message_text: str, channel_name: str = None,
+                  diagnostics: Optional[Dict] = None) -> List[Signal]:
+        """تحليل رسالة قد تحتوي عدة إشارات (مثل GOLD و EURUSD في نفس الرسالة)
+
+        Returns:
+            قائمة الإشارات (فارغة إذا لم يُعثر على أي إشارة)
+        """
+        if self._rejected_early(message_text, diagnostics):
+            return []
+
+        tokens = None
+        try:
+            tokens = self.tokenize(message_text)
+            blocks = self.split_blocks(tokens)
+            if len(blocks) > 1:
+                signals = []
+                for block in blocks:
+                    fields = self.extract_fields(block, complete=False, channel_name=channel_name)
+                    signal = self._signal_from_fields(fields, block.text, channel_name)
+                    if signal:
+                        signals.append(signal)
+                if signals:
+                    return signals
+        except Exception:
+            import traceback
+            traceback.print_exc()
+
+        # رسالة بإشارة واحدة (أو مقاطع بدون إشارة): المسار العادي (الذاكرة المؤقتة
+        # والقوالب) بنفس التقطيع، والتشخيص يُملأ منه كما في parse
+        signal = self._parse_cached(message_text, channel_name, diagnostics, tokens)
+        return [signal] if signal else []
+
+    def _signal_from_fields(self, fields: Dict, message_text: str,
+                            channel_name: str = None) -> Optional[Signal]:
+        """التحقق من الحقول المستخرجة وإنشاء كائن الإشارة"""
+        symbol = fields['symbol']
+        if not symbol:
+            return None  # يجب أن يكون هناك رمز على الأقل
+
+        action, order_type = fields['action']
+        if not action:
+            return None  # يجب أن يكون هناك نوع صفقة
+
+        entry_price, entry_range = fields['entry_price'], fields['entry_range']
+        take_profits = fields['take_profits']
+        stop_loss = fields['stop_loss']
+
+        # التحقق الصارم من المتطلبات الأساسية
+        if not take_profits:
+            return None
+
+        if not stop_loss:
+            return None
+
+        if not (entry_price or entry_range):
+            return None
+
+        # تحديد سعر المرجع
+        reference_price = entry_price if entry_price else sum(entry_range) / 2
+        
+        # تصفية TPs لإزالة TPs غير المنطقية
+        if action == 'BUY':
+            # في BUY: نبقي TPs >= Entry فقط
+            filtered_tps = [tp for tp in take_profits if tp >= reference_price]
+            # إذا كان أول TP يساوي Entry، نحتفظ به كنقطة تأكيد
+            if filtered_tps and filtered_tps[0] == reference_price:
+                # نبحث عن TPs أعلى
+                higher_tps = [tp for tp in take_profits if tp > reference_price]
+                if higher_tps:
+                    # نستخدم TPs الأعلى فقط
+                    filtered_tps = sorted(higher_tps)
+            take_profits = filtered_tps
+        else:  # SELL
+            # في SELL: نبقي TPs <= Entry فقط
+            filtered_tps = [tp for tp in take_profits if tp <= reference_price]
+            if filtered_tps and filtered_tps[0] == reference_price:
+                # نبحث عن TPs أقل
+                lower_tps = [tp for tp in take_profits if tp < reference_price]
+                if lower_tps:
+                    # نستخدم TPs الأقل فقط
+                    filtered_tps = sorted(lower_tps, reverse=True)
+            take_profits = filtered_tps
+        
+        # التأكد من وجود TPs بعد التصفية
+        if not take_profits:
+            print(f"⚠️ لا توجد TPs صالحة بعد التصفية للإشارة {symbol} {action}")
+            return None
+
+        # التحقق الصارم من صحة البيانات
+        if not self.validate_signal_data(symbol, action, entry_price, entry_range,
+                                        take_profits, stop_loss):
+            return None
+
+        # إنشاء كائن الإشارة
+        signal = Signal(
+            symbol=symbol,
+            action=action,
+            entry_price=entry_price,
+            entry_price_range=entry_range,
+            take_profits=take_profits,
+            stop_loss=stop_loss,
+            channel_name=channel_name,
+            raw_message=message_text,
+            order_type=order_type  # إضافة نوع الأمر
+        )
+
+        return signal
+
     def validate_signal_data(self, symbol: str, action: str, entry_price: Optional[float],
                            entry_range: Optional[Tuple[float, float]],
                            take_profits: List[float], stop_loss: float) -> bool:
@@ -446,9 +1366,109 @@ class SignalParser:
 
         return True
 
-    def add_custom_pattern(self, pattern: Dict):
-        """إضافة نمط مخصص للتحليل"""
+    def parse_many(self, messages: Iterable[Union[str, Tuple[str, str]]], channel_name: str = None,
+                   processes: Optional[int] = 1, chunk_size: int = 256,
+                   summary: Optional[Dict] = None, verbose: bool = False) -> Iterator[ParseResult]:
+        """تحليل عدد كبير من الرسائل (مثل إعادة تشغيل سجل القنوات)
+
+        النتائج تُعاد بنفس ترتيب الرسائل وبشكل تدفقي.
+
+        Args:
+            messages: نصوص الرسائل أو أزواج (النص، اسم القناة)
+            channel_name: اسم القناة الافتراضي للنصوص المفردة
+            processes: عدد العمليات المتوازية (1 = في نفس العملية، None = عدد الأنوية)
+            chunk_size: عدد الرسائل المرسلة لكل عملية دفعة واحدة
+            summary: قاموس اختياري يُملأ بملخص الأداء عند الانتهاء
+            verbose: طباعة ملخص الأداء عند الانتهاء
+
+        Yields:
+            ParseResult لكل رسالة
+        """
+        if processes is None:
+            processes = os.cpu_count() or 1
+
+        items = (
+            (item, channel_name) if isinstance(item, str) else (item[0], item[1])
+            for item in messages
+        )
+
+        start_time = time.perf_counter()
+        total = 0
+        parsed = 0
+
+        executor = None
+        if processes > 1:
+            executor = ProcessPoolExecutor(max_workers=processes,
+                                           initializer=_init_parse_worker,
+                                           initargs=(self,))
+
+        try:
+            if executor is None:
+                pairs = ((item, self._parse_item(item)) for item in items)
+            else:
+                pairs = self._parse_in_pool(executor, items, chunk_size * processes * 4, chunk_size)
+
+            for item, (signal, diagnostics) in pairs:
+                if signal:
+                    parsed += 1
+                yield ParseResult(
+                    index=total,
+                    message=item[0],
+                    channel_name=item[1],
+                    signal=signal,
+                    diagnostics=None if signal else diagnostics
+                )
+                total += 1
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+            elapsed = time.perf_counter() - start_time
+            stats = {
+                'total': total,
+                'parsed': parsed,
+                'failed': total - parsed,
+                'processes': processes,
+                'elapsed_seconds': round(elapsed, 4),
+                'messages_per_second': round(total / elapsed, 1) if elapsed > 0 else 0.0
+            }
+            if summary is not None:
+                summary.update(stats)
+            if verbose:
+                print(f"📊 تم تحليل {stats['total']} رسالة: ✅ {stats['parsed']} | ❌ {stats['failed']} "
+                      f"| ⏱️ {stats['elapsed_seconds']}s | {stats['messages_per_second']} رسالة/ث")
+
+    def _parse_item(self, item: Tuple[str, str]):
+        diagnostics = {}
+        signal = self.parse(item[0], item[1], diagnostics=diagnostics)
+        return signal, diagnostics
+
+    @staticmethod
+    def _parse_in_pool(executor, items, batch_size: int, chunk_size: int):
+        """توزيع الرسائل على العمليات بدفعات محدودة مع الحفاظ على الترتيب"""
+        while True:
+            batch = list(islice(items, batch_size))
+            if not batch:
+                return
+            yield from zip(batch, executor.map(_parse_worker, batch, chunksize=chunk_size))
+
+    def add_custom_pattern(self, pattern: Dict) -> bool:
+        """إضافة نمط مخصص للتحليل
+
+        النمط قالب بنفس صيغة القوالب المتعلَّمة (signature, entry, take_profits,
+        stop_loss) ويُجرَّب لجميع القنوات بعد قوالب القناة نفسها.
+
+        Returns:
+            False إذا كان للنمط توقيع لكن بنيته غير صالحة (لا يُضاف)
+        """
+        if pattern.get('signature'):
+            if not self._valid_template(pattern):
+                print(f"⚠️ نمط مخصص غير صالح: {pattern.get('name', pattern.get('signature'))}")
+                return False
+            signature = tuple(tuple(item) for item in pattern['signature'])
+            self._custom_templates[signature] = pattern
         self.custom_patterns.append(pattern)
+        return True
 
     def test_parser(self):
         """اختبار المحلل على الأنماط المختلفة"""
@@ -0,0 +1,276 @@
+"""
+خط معالجة الرسائل على مراحل
+استقبال -> تحليل -> تنفيذ، كل مرحلة تستهلك من طابور asyncio محدود الحجم
+حتى لا يؤخر تنفيذ بطيء في MT5 (أو إعادة محاولة) استقبال الرسالة التالية
+"""
+
+import asyncio
+import time
+import traceback
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+
+class LatencyStats:
+    """عينات زمن محدودة العدد (الأحدث فقط) مع النسب المئوية"""
+
+    def __init__(self, max_samples: int = 10000):
+        self.samples = deque(maxlen=max_samples)
+        self.count = 0
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+        self.count += 1
+
+    def reset(self):
+        self.samples.clear()
+        self.count = 0
+
+    @staticmethod
+    def percentile(values: List[float], pct: float) -> float:
+        """النسبة المئوية من قائمة مرتبة"""
+        if not values:
+            return 0.0
+        index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+        return values[index]
+
+    def get_stats(self) -> Dict:
+        values = sorted(self.samples)
+        return {
+            'count': self.count,
+            'p50_ms': round(self.percentile(values, 50) * 1000, 3),
+            'p90_ms': round(self.percentile(values, 90) * 1000, 3),
+            'p99_ms': round(self.percentile(values, 99) * 1000, 3),
+            'max_ms': round(values[-1] * 1000, 3) if values else 0.0
+        }
+
+
+class PipelineStage:
+    """
+    مرحلة واحدة في خط المعالجة: طابور محدود الحجم + عدد ثابت من العمال
+
+    عند امتلاء الطابور ينتظر المُرسِل (ضغط عكسي) ويتم تسجيل ذلك في الإحصائيات
+    """
+
+    def __init__(self, name: str, handler: Callable[[Any], Awaitable], queue_size: int = 100,
+                 workers: int = 1):
+        self.name = name
+        self.handler = handler
+        self.queue_size = queue_size
+        self.workers = max(1, workers)
+        # الطابور يُنشأ عند التشغيل داخل حلقة الأحداث
+        self.queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self.reset_stats()
+
+    def reset_stats(self):
+        """تصفير الإحصائيات"""
+        self.submitted = 0
+        self.processed = 0
+        self.failed = 0
+        self.busy = 0
+        self.max_depth = 0
+        self.blocked = 0            # مرات امتلاء الطابور
+        self.blocked_time = 0.0     # إجمالي زمن انتظار المُرسِل (ثانية)
+        self.wait_time = 0.0        # إجمالي زمن بقاء العناصر في الطابور
+        self.max_wait = 0.0
+        self.handle_time = 0.0      # إجمالي زمن المعالجة
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self):
+        """تشغيل عمال المرحلة"""
+        if self.is_running:
+            return
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [
+            asyncio.ensure_future(self._worker()) for _ in range(self.workers)
+        ]
+
+    async def stop(self, timeout: float = 1.0):
+        """
+        إيقاف المرحلة بعد تفريغ الطابور (بحد أقصى timeout ثانية)
+
+        العناصر المتبقية بعد المهلة تُلغى مع العمال
+        """
+        if not self.is_running:
+            return
+        if timeout:
+            # join ينتظر أيضاً العناصر قيد المعالجة حالياً
+            try:
+                await asyncio.wait_for(self.queue.join(), timeout)
+            except asyncio.TimeoutError:
+                print(f"⚠️ مرحلة {self.name}: تم الإيقاف مع {self.queue.qsize()} عنصر في الطابور")
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def put(self, item: Any):
+        """إضافة عنصر للطابور (ينتظر فقط إذا كان الطابور ممتلئاً)"""
+        entry = (time.perf_counter(), item)
+        self.submitted += 1
+        try:
+            self.queue.put_nowait(entry)
+        except asyncio.QueueFull:
+            # ضغط عكسي: المرحلة التالية لا تلحق
+            self.blocked += 1
+            start = time.perf_counter()
+            await self.queue.put(entry)
+            self.blocked_time += time.perf_counter() - start
+
+        depth = self.queue.qsize()
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    async def _worker(self):
+        """عامل يستهلك من الطابور حتى الإلغاء"""
+        while True:
+            enqueued_at, item = await self.queue.get()
+            started = time.perf_counter()
+            wait = started - enqueued_at
+            self.wait_time += wait
+            if wait > self.max_wait:
+                self.max_wait = wait
+
+            self.busy += 1
+            try:
+                await self.handler(item)
+                self.processed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                print(f"❌ خطأ في مرحلة {self.name}: {str(e)}")
+                traceback.print_exc()
+            finally:
+                self.busy -= 1
+                self.handle_time += time.perf_counter() - started
+                self.queue.task_done()
+
+    def get_stats(self) -> Dict:
+        """إحصائيات المرحلة"""
+        done = self.processed + self.failed
+        return {
+            'workers': self.workers,
+            'busy': self.busy,
+            'depth': self.queue.qsize() if self.queue else 0,
+            'capacity': self.queue_size,
+            'max_depth': self.max_depth,
+            'submitted': self.submitted,
+            'processed': self.processed,
+            'failed': self.failed,
+            'blocked': self.blocked,
+            'blocked_ms': round(self.blocked_time * 1000, 2),
+            'avg_wait_ms': round(self.wait_time / done * 1000, 2) if done else 0.0,
+            'max_wait_ms': round(self.max_wait * 1000, 2),
+            'avg_handle_ms': round(self.handle_time / done * 1000, 2) if done else 0.0
+        }
+
+
+class SignalPipeline:
+    """
+    خط معالجة الإشارات: استقبال -> تحليل -> تنفيذ
+
+    - الاستقبال يضع الرسائل الخام في طابور التحليل ويعود فوراً
+    - مرحلة التحليل تحوّل كل رسالة إلى قائمة إشارات (قد تكون فارغة أو متعددة)
+      وتضعها في طابور التنفيذ
+    - مرحلة التنفيذ تنفذ الإشارات بعدد عمال قابل للضبط
+
+    عند امتلاء طابور التنفيذ ينتظر عمال التحليل، وعند امتلاء طابور التحليل
+    تنتظر مرحلة الاستقبال - وكل انتظار يظهر في get_stats
+
+    الزمن الكلي يُقاس من submit حتى انتهاء آخر مرحلة للعنصر: latency لكل
+    الرسائل (تنتهي عند التحليل إن لم تكن إشارة) و signal_latency للإشارات المنفذة
+    """
+
+    def __init__(self, parse_handler: Callable[[Any], Awaitable[Optional[Iterable]]],
+                 execute_handler: Callable[[Any], Awaitable],
+                 queue_size: int = 1000, parse_workers: int = 1,
+                 execute_queue_size: int = 100, execute_workers: int = 2):
+        """
+        Args:
+            parse_handler: دالة async تستقبل رسالة خام وتعيد الإشارات المستخرجة
+            execute_handler: دالة async تنفذ إشارة واحدة
+            queue_size: حجم طابور الرسائل الخام
+            parse_workers: عدد عمال التحليل
+            execute_queue_size: حجم طابور الإشارات
+            execute_workers: عدد الإشارات التي تُنفذ بالتوازي
+        """
+        self.parse_handler = parse_handler
+        self.execute_handler = execute_handler
+        self.parse_stage = PipelineStage('التحليل', self._parse_and_forward, queue_size, parse_workers)
+        self.execute_stage = PipelineStage('التنفيذ', self._execute_and_record, execute_queue_size, execute_workers)
+        self.latency = LatencyStats()
+        self.signal_latency = LatencyStats()
+
+    @property
+    def is_running(self) -> bool:
+        return self.parse_stage.is_running
+
+    def start(self):
+        """تشغيل جميع المراحل (يجب استدعاؤها داخل حلقة الأحداث)"""
+        self.execute_stage.start()
+        self.parse_stage.start()
+
+    async def stop(self, timeout: float = 1.0):
+        """إيقاف المراحل بالترتيب: التحليل أولاً ثم التنفيذ"""
+        await self.parse_stage.stop(timeout)
+        await self.execute_stage.stop(timeout)
+
+    async def join(self, timeout: Optional[float] = None) -> bool:
+        """
+        انتظار انتهاء جميع العناصر الحالية بدون إيقاف المراحل
+
+        Returns:
+            True إذا فرغت الطوابير قبل المهلة
+        """
+        async def drain():
+            # عمال التحليل قد يضيفون للتنفيذ حتى آخر لحظة
+            await self.parse_stage.queue.join()
+            await self.execute_stage.queue.join()
+
+        try:
+            await asyncio.wait_for(drain(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def submit(self, item: Any):
+        """إضافة رسالة خام لخط المعالجة"""
+        await self.parse_stage.put((time.perf_counter(), item))
+
+    async def _parse_and_forward(self, entry):
+        arrived_at, item = entry
+        signals = await self.parse_handler(item)
+        if not signals:
+            self.latency.record(time.perf_counter() - arrived_at)
+            return
+        for signal in signals:
+            await self.execute_stage.put((arrived_at, signal))
+
+    async def _execute_and_record(self, entry):
+        arrived_at, signal = entry
+        await self.execute_handler(signal)
+        elapsed = time.perf_counter() - arrived_at
+        self.latency.record(elapsed)
+        self.signal_latency.record(elapsed)
+
+    def reset_stats(self):
+        """تصفير إحصائيات جميع المراحل والزمن الكلي"""
+        self.parse_stage.reset_stats()
+        self.execute_stage.reset_stats()
+        self.latency.reset()
+        self.signal_latency.reset()
+
+    def get_stats(self) -> Dict:
+        """إحصائيات جميع المراحل والزمن الكلي (استقبال -> انتهاء المعالجة)"""
+        return {
+            'parse': self.parse_stage.get_stats(),
+            'execute': self.execute_stage.get_stats(),
+            'latency': self.latency.get_stats(),
+            'signal_latency': self.signal_latency.get_stats()
+        }
@@ -2,24 +2,105 @@ from telethon import TelegramClient, events
 from telethon.tl.functions.channels import GetFullChannelRequest
 from telethon.errors import SessionPasswordNeededError
 import asyncio
+import itertools
 import json
 import os
+import threading
+from config import Config
 from signal_parser import SignalParser, Signal
-from typing import Callable, List, Dict
-from datetime import datetime
+from signal_pipeline import SignalPipeline
+from message_tracker import MessageTracker, SignalAmendment
+from signal_dedup import SignalDeduplicator
+from channel_metrics import ChannelMetrics
+from file_utils import atomic_write_json
+from typing import Callable, List, Dict, FrozenSet, Optional
+from datetime import datetime, timezone
+import time
+
+
+# الحساب الرئيسي (بيانات الاتصال من الواجهة وملف الجلسة data/telegram_session)
+DEFAULT_ACCOUNT = 'main'
+
 
 class TelegramSignalClient:
-    def __init__(self, api_id: str, api_hash: str, phone: str):
+    def __init__(self, api_id: str, api_hash: str, phone: str, save_interval: float = 5.0,
+                 queue_size: int = 1000, execution_workers: int = 2):
         self.api_id = api_id
         self.api_hash = api_hash
         self.phone = phone
         self.client = None
         self.is_connected = False
+        # الحسابات المتصلة: الاسم -> TelegramClient (الرئيسي + الإضافية)
+        # كل الحسابات تعمل على نفس حلقة الأحداث وتغذي نفس خط المعالجة
+        self.accounts: Dict[str, TelegramClient] = {}
+        self._account_credentials: Dict[str, Dict] = {}
         self.monitored_channels = []
-        self.signal_parser = SignalParser()
+        # فهرس القنوات: id -> معلومات القناة + مجموعة معرفات القنوات النشطة
+        # يُعاد بناؤه عند كل تغيير في القنوات لفحص الرسائل بزمن ثابت
+        self._channels_by_id: Dict[int, Dict] = {}
+        self._active_channel_ids: FrozenSet[int] = frozenset()
+        # توزيع القنوات على الحسابات الذي سُجّل به معالج الرسائل حالياً (None = غير مسجل)
+        self._handler_channel_ids: Optional[Dict[str, FrozenSet[int]]] = None
+        self.signal_parser = SignalParser(price_ranges_file=Config.PRICE_RANGES_FILE,
+                                          symbols_info_file=Config.SYMBOLS_INFO_FILE, cache_size=1000,
+                                          patterns_file=Config.PATTERNS_FILE)
         self.signal_callback = None
         self.message_callback = None  # callback لجميع الرسائل (ناجحة أو فاشلة)
-        self.channels_file = 'data/channels.json'
+        self.amendment_callback = None  # callback لتعديل/إلغاء إشارة سابقة
+
+        # فهرس الرسائل (القناة، رقم الرسالة) -> الإشارات لتتبع التعديل والحذف
+        self.message_tracker = MessageTracker()
+        # تعديل رسالة غير مسجلة يُعامل كرسالة جديدة فقط إذا كانت حديثة (ثانية)
+        self.edit_as_new_max_age = 300
+
+        # منع تكرار نفس الإشارة من عدة قنوات تنسخ نفس المزوّد (نافذة 30 ثانية)
+        # السياسة first_wins أو merge (دمج أسماء القنوات في الإشارة الأولى)
+        self.signal_deduplicator = SignalDeduplicator(window=30.0, policy='first_wins')
+        self.channels_file = Config.CHANNELS_FILE
+
+        # استرجاع الرسائل الفائتة عند الاتصال (آخر رسالة محفوظة لكل قناة في last_message_id)
+        self.catch_up_limit = 100          # أقصى عدد رسائل لكل قناة
+        self.catch_up_concurrency = 4      # عدد القنوات التي تُسترجع بالتوازي
+        self.catch_up_max_age = 300        # الرسائل الأقدم (ثانية) تُسجل ولا تُنفذ
+        self._catch_up_tasks = set()
+        # أول رسالة حية لكل قناة بعد الاتصال - الاسترجاع يتوقف عندها
+        self._first_live_ids: Dict[int, int] = {}
+        # Telethon يعيد الاتصال تلقائياً بدون حدث، لذلك تُفحص حالة كل حساب دورياً
+        # ويُسترجع ما فات منذ الانقطاع (آخر رسالة لكل قناة محفوظة في _resume_ids)
+        self.reconnect_check_interval = 2.0
+        self._connection_task = None
+        self._resume_ids: Dict[str, Dict[int, int]] = {}
+
+        # حفظ حالة القنوات المؤجل: العدادات تُحدّث في الذاكرة ويكتبها
+        # الحافظ الخلفي مرة واحدة كل save_interval ثانية كحد أقصى
+        self.save_interval = save_interval
+        self._channels_dirty = False
+        self._flush_task = None
+        self._save_lock = threading.Lock()
+        # رقم تسلسلي لكل نسخة تُحفظ: الكتابة من الحافظ الخلفي قد تنتهي بعد حفظ فوري
+        # أحدث من الواجهة، فالنسخة الأقدم من آخر نسخة مكتوبة للملف لا تُكتب
+        self._save_generation = itertools.count(1)
+        self._written_generations: Dict[str, int] = {}
+
+        # ذاكرة مؤقتة لقائمة المحادثات (نافذة "جميع القنوات") على القرص
+        self.dialogs_cache_file = Config.DIALOGS_CACHE_FILE
+        self.dialogs_cache_ttl = 3600      # بعد هذه المدة (ثانية) يتم التحديث في الخلفية
+        self._dialogs_cache: Optional[Dict] = None
+        self._dialogs_refresh_task = None
+
+        # إحصائيات الأداء لكل قناة في الذاكرة، ونسخة دورية منها على القرص
+        self.channel_metrics = ChannelMetrics()
+        self.metrics_file = Config.CHANNEL_METRICS_FILE
+        self.metrics_interval = 60.0
+        self._metrics_task = None
+
+        # خط المعالجة: الاستقبال لا ينتظر التحليل ولا تنفيذ الصفقات
+        self.pipeline = SignalPipeline(
+            self._process_message,
+            self._execute_signal,
+            queue_size=queue_size,
+            execute_workers=execution_workers
+        )
 
         # إنشاء مجلد البيانات
         os.makedirs('data', exist_ok=True)
@@ -27,11 +108,18 @@ class TelegramSignalClient:
         # تحميل القنوات المحفوظة
         self.load_channels()
 
+    @staticmethod
+    def _session_path(account: str) -> str:
+        """مسار ملف الجلسة للحساب (جلسة مستقلة لكل حساب)"""
+        if account == DEFAULT_ACCOUNT:
+            return os.path.join('data', 'telegram_session')
+        return os.path.join('data', f'telegram_session_{account}')
+
     async def start(self):
         """بدء الاتصال بالتليجرام"""
         try:
             # استخدام مسار واضح لملف الجلسة
-            session_path = os.path.join('data', 'telegram_session')
+            session_path = self._session_path(DEFAULT_ACCOUNT)
             self.client = TelegramClient(session_path, int(self.api_id), self.api_hash)
 
             print("⏳ جارٍ الاتصال بالتليجرام...")
@@ -41,10 +129,35 @@ class TelegramSignalClient:
             # التحقق من الاتصال
             if await self.client.is_user_authorized():
                 self.is_connected = True
+                self.accounts = {DEFAULT_ACCOUNT: self.client}
                 print("✅ تم الاتصال بالتليجرام بنجاح")
 
-                # تسجيل معالج الرسائل
-                self.client.add_event_handler(self.message_handler, events.NewMessage())
+                # الحسابات الإضافية واحداً تلو الآخر (تسجيل الدخول الأول قد يطلب رمز التحقق)
+                for account in self._account_credentials:
+                    await self._connect_account(account)
+
+                # تشغيل خط المعالجة قبل تسجيل المعالج
+                self.pipeline.start()
+
+                # تسجيل معالج الرسائل (مقيّد بالقنوات النشطة فقط)
+                self._first_live_ids = {}
+                self._register_message_handler()
+
+                # تشغيل الحافظ الخلفي لحالة القنوات
+                if self._flush_task is None or self._flush_task.done():
+                    self._flush_task = asyncio.ensure_future(self._channels_flusher())
+                if self._metrics_task is None or self._metrics_task.done():
+                    self._metrics_task = asyncio.ensure_future(self._metrics_snapshotter())
+
+                # استرجاع الرسائل الفائتة أثناء الانقطاع في الخلفية، ومراقبة إعادة الاتصال
+                self._start_catch_up()
+                if self._connection_task is None or self._connection_task.done():
+                    self._connection_task = asyncio.ensure_future(self._connection_watcher())
+
+                # تجهيز قائمة المحادثات مسبقاً إذا لم تكن محفوظة أو انتهت صلاحيتها
+                cache = self._load_dialogs_cache()
+                if cache is None or time.time() - cache.get('updated_at', 0) > self.dialogs_cache_ttl:
+                    self._schedule_dialogs_refresh()
 
                 print(f"📢 تم تفعيل مراقبة {len(self.monitored_channels)} قناة")
 
@@ -68,11 +181,103 @@ class TelegramSignalClient:
 
     async def disconnect(self):
         """قطع الاتصال"""
+        if self._connection_task:
+            self._connection_task.cancel()
+            self._connection_task = None
+        for task in list(self._catch_up_tasks):
+            task.cancel()
+        self._resume_ids = {}
+
+        # إيقاف الاستقبال ثم تفريغ خط المعالجة قبل الحفظ النهائي، حتى تُحفظ
+        # العدادات والقوالب والإحصائيات الناتجة عن الرسائل التي كانت قيد المعالجة
+        for client in self.accounts.values():
+            client.remove_event_handler(self.message_handler)
+            client.remove_event_handler(self.edit_handler)
+            client.remove_event_handler(self.delete_handler)
+        await self.pipeline.stop()
+
+        # إيقاف الحافظ الخلفي وكتابة أي تغييرات معلقة قبل الإغلاق
+        if self._flush_task:
+            self._flush_task.cancel()
+            self._flush_task = None
+        if self._channels_dirty:
+            self.save_channels()
+        self._save_templates()
+
+        if self._metrics_task:
+            self._metrics_task.cancel()
+            self._metrics_task = None
+            self.save_channel_metrics()
+
+        for account, client in list(self.accounts.items()):
+            if client is not self.client:
+                await client.disconnect()
+        self.accounts = {}
+
         if self.client:
             await self.client.disconnect()
             self.is_connected = False
+            self._handler_channel_ids = None
             print("⚠️ تم قطع الاتصال بالتليجرام")
 
+    async def add_account(self, name: str, api_id: str, api_hash: str, phone: str) -> bool:
+        """
+        إضافة حساب Telegram إضافي للمراقبة
+
+        قنوات الحساب هي القنوات التي يحمل حقل account فيها اسمه. إذا كان العميل
+        متصلاً يتم اتصال الحساب مباشرة، وإلا عند start()
+
+        Args:
+            name: اسم مميز للحساب (يُستخدم في ملف الجلسة وفي channels.json)
+            api_id: API ID
+            api_hash: API Hash
+            phone: رقم الهاتف
+
+        Returns:
+            True إذا تم الاتصال (أو تسجيل الحساب قبل الاتصال)
+        """
+        if name == DEFAULT_ACCOUNT:
+            print(f"❌ الاسم {DEFAULT_ACCOUNT} محجوز للحساب الرئيسي")
+            return False
+
+        self._account_credentials[name] = {'api_id': api_id, 'api_hash': api_hash, 'phone': phone}
+        if not self.is_connected:
+            return True
+
+        # تحديث بيانات حساب متصل: الاتصال القديم يُغلق أولاً
+        previous = self.accounts.pop(name, None)
+        if previous is not None:
+            previous.remove_event_handler(self.message_handler)
+            previous.remove_event_handler(self.edit_handler)
+            previous.remove_event_handler(self.delete_handler)
+            await previous.disconnect()
+
+        connected = await self._connect_account(name)
+        # قنوات الحساب تنتقل إليه (أو للحساب الرئيسي إذا فشل الاتصال)
+        self._register_message_handler()
+        return connected
+
+    async def _connect_account(self, name: str) -> bool:
+        """اتصال حساب إضافي (فشله لا يؤثر على باقي الحسابات)"""
+        credentials = self._account_credentials[name]
+        try:
+            client = TelegramClient(self._session_path(name), int(credentials['api_id']), credentials['api_hash'])
+            print(f"⏳ جارٍ اتصال الحساب {name}...")
+            await client.start(phone=credentials['phone'])
+
+            if not await client.is_user_authorized():
+                print(f"❌ فشل التحقق من الحساب {name}")
+                await client.disconnect()
+                return False
+
+            self.accounts[name] = client
+            print(f"✅ تم اتصال الحساب {name}")
+            return True
+
+        except Exception as e:
+            print(f"❌ خطأ في اتصال الحساب {name}: {str(e)}")
+            return False
+
     def set_signal_callback(self, callback: Callable):
         """تعيين دالة callback عند استقبال إشارة جديدة"""
         self.signal_callback = callback
@@ -81,6 +286,10 @@ class TelegramSignalClient:
         """تعيين دالة callback لجميع الرسائل (ناجحة أو فاشلة)"""
         self.message_callback = callback
 
+    def set_amendment_callback(self, callback: Callable):
+        """تعيين دالة callback عند تعديل أو إلغاء إشارة سابقة (SignalAmendment)"""
+        self.amendment_callback = callback
+
     def _normalize_channel_id(self, chat_id: int) -> int:
         """
         تحويل chat_id من Telegram إلى ID القناة الحقيقي
@@ -105,8 +314,110 @@ class TelegramSignalClient:
                 return abs(chat_id)
         return chat_id
 
+    @staticmethod
+    def _is_basic_group_chat(chat_id: Optional[int]) -> bool:
+        """المجموعة العادية: chat_id سالب بدون بادئة -100 (القنوات والمجموعات الخارقة بها)"""
+        return chat_id is not None and chat_id < 0 and not str(chat_id).startswith('-100')
+
+    def _rebuild_channel_index(self):
+        """إعادة بناء فهرس القنوات بعد أي تغيير في قائمة القنوات أو حالتها"""
+        self._channels_by_id = {ch['id']: ch for ch in self.monitored_channels}
+        self._active_channel_ids = frozenset(
+            ch['id'] for ch in self.monitored_channels if ch.get('status') == 'active'
+        )
+
+        # إعادة تسجيل المعالج فقط عند تغيّر القنوات النشطة أو توزيعها على الحسابات
+        if self.client and self.is_connected and self._assign_channels() != self._handler_channel_ids:
+            self._register_message_handler()
+
+    def _channel_account(self, channel_id: int) -> str:
+        """
+        الحساب الذي يستقبل رسائل القناة
+
+        القناة بدون حساب، أو حسابها غير متصل، تُستقبل عبر الحساب الرئيسي
+        """
+        account = self._channels_by_id[channel_id].get('account') or DEFAULT_ACCOUNT
+        return account if account in self.accounts else DEFAULT_ACCOUNT
+
+    def _client_for_channel(self, channel_id: int):
+        """TelegramClient الحساب المسؤول عن القناة"""
+        return self.accounts.get(self._channel_account(channel_id), self.client)
+
+    def _assign_channels(self) -> Dict[str, FrozenSet[int]]:
+        """توزيع القنوات النشطة على الحسابات المتصلة (كل قناة على حساب واحد فقط)"""
+        assignment: Dict[str, set] = {}
+        for channel_id in self._active_channel_ids:
+            assignment.setdefault(self._channel_account(channel_id), set()).add(channel_id)
+        return {account: frozenset(ids) for account, ids in assignment.items()}
+
+    @staticmethod
+    def _chat_filter_ids(channel_ids) -> List[int]:
+        """
+        تحويل معرفات القنوات المحفوظة إلى صيغة chat_id في Telegram
+
+        المعرفات محفوظة بدون بادئة (انظر _normalize_channel_id)، لذلك نضيف
+        الصيغتين: -100xxxx للقنوات والمجموعات الخارقة و -xxxx للمجموعات العادية
+
+        Args:
+            channel_ids: معرفات القنوات المحفوظة
+
+        Returns:
+            قائمة معرفات chat_id لفلتر الأحداث
+        """
+        chat_ids = []
+        for channel_id in sorted(channel_ids):
+            chat_ids.append(int(f"-100{channel_id}"))
+            chat_ids.append(-channel_id)
+        return chat_ids
+
+    def _register_message_handler(self):
+        """
+        تسجيل معالج الرسائل مقيّداً بالقنوات النشطة
+
+        يتم الفلترة داخل Telethon قبل استدعاء المعالج، فلا تصل رسائل
+        المحادثات الخاصة والمجموعات غير المراقبة إلى كود Python إطلاقاً.
+        كل حساب يستقبل قنواته فقط، فالقناة المشتركة بين حسابين لا تصل مرتين.
+        يُستدعى عند الاتصال وعند كل تغيير في القنوات النشطة أو الحسابات.
+        """
+        if not self.accounts:
+            return
+
+        assignment = self._assign_channels()
+        self._handler_channel_ids = assignment
+
+        for account, client in self.accounts.items():
+            client.remove_event_handler(self.message_handler)
+            client.remove_event_handler(self.edit_handler)
+            client.remove_event_handler(self.delete_handler)
+
+            channel_ids = assignment.get(account)
+            if not channel_ids:
+                continue
+
+            chats = self._chat_filter_ids(channel_ids)
+            client.add_event_handler(self.message_handler, events.NewMessage(chats=chats))
+            client.add_event_handler(self.edit_handler, events.MessageEdited(chats=chats))
+            # الحذف في المجموعات العادية يصل بدون chat_id، لذلك لا يُفلتر هنا
+            # (ويُبحث عنه في المجموعات العادية المسجلة فقط - انظر MessageTracker.forget)
+            client.add_event_handler(self.delete_handler, events.MessageDeleted())
+
+        if not self._active_channel_ids:
+            print("⚠️ لا توجد قنوات نشطة للمراقبة")
+
+    def _resolve_channel(self, chat_id: int) -> Optional[Dict]:
+        """معلومات القناة إذا كانت مراقبة ونشطة، وإلا None"""
+        real_channel_id = self._normalize_channel_id(chat_id)
+        if real_channel_id not in self._active_channel_ids:
+            return None
+        return self._channels_by_id.get(real_channel_id)
+
     async def message_handler(self, event):
-        """معالج الرسائل الواردة"""
+        """
+        معالج الرسائل الواردة (مرحلة الاستقبال)
+
+        يفلتر الرسالة ويضعها في طابور التحليل فقط - التحليل والتنفيذ
+        يتمان في مراحل خط المعالجة
+        """
         try:
             # الحصول على chat_id وتحويله إلى الصيغة الصحيحة
             chat_id = event.chat_id
@@ -114,15 +425,13 @@ class TelegramSignalClient:
             # تحويل chat_id إلى ID القناة الحقيقي
             real_channel_id = self._normalize_channel_id(chat_id)
 
-            # التحقق من أن الرسالة من قناة مراقبة ونشطة
-            active_channel_ids = [ch['id'] for ch in self.monitored_channels if ch.get('status') == 'active']
-
-            if not active_channel_ids:
+            # التحقق من أن الرسالة من قناة مراقبة ونشطة (بحث في الفهرس)
+            if not self._active_channel_ids:
                 print("⚠️ لا توجد قنوات نشطة للمراقبة")
                 print(f"   عدد القنوات المحفوظة: {len(self.monitored_channels)}")
                 return
 
-            if real_channel_id not in active_channel_ids:
+            if real_channel_id not in self._active_channel_ids:
                 return  # تجاهل الرسائل من قنوات غير مراقبة بصمت
 
             message_text = event.message.message
@@ -130,28 +439,300 @@ class TelegramSignalClient:
                 return
 
             # الحصول على معلومات القناة
-            channel_info = next(
-                (ch for ch in self.monitored_channels if ch['id'] == real_channel_id),
-                None
-            )
+            channel_info = self._channels_by_id.get(real_channel_id)
 
             if not channel_info:
                 return
 
+            self._first_live_ids.setdefault(real_channel_id, event.message.id)
+            await self._submit_message(channel_info, event.message)
+
+        except Exception as e:
+            print(f"❌ خطأ في استقبال الرسالة: {str(e)}")
+            import traceback
+            traceback.print_exc()
+
+    async def _submit_message(self, channel_info: Dict, message, catch_up: bool = False):
+        """وضع رسالة في طابور التحليل وتحديث آخر رسالة مستلمة للقناة"""
+        if message.id > channel_info.get('last_message_id', 0):
+            channel_info['last_message_id'] = message.id
+            self.mark_channels_dirty()
+
+        await self.pipeline.submit({
+            'channel_info': channel_info,
+            'channel_id': channel_info['id'],
+            'message_id': message.id,
+            'reply_to': message.reply_to_msg_id,
+            'basic_group': self._is_basic_group_chat(getattr(message, 'chat_id', None)),
+            'message_text': message.message,
+            'message_date': message.date,
+            'catch_up': catch_up,
+            'received_at': datetime.now()
+        })
+
+    def _last_message_ids(self) -> Dict[int, int]:
+        """آخر رسالة مستلمة لكل قناة (نقطة بداية الاسترجاع)"""
+        return {cid: ch.get('last_message_id') for cid, ch in self._channels_by_id.items()}
+
+    def _start_catch_up(self, account: Optional[str] = None, since: Optional[Dict[int, int]] = None):
+        """تشغيل استرجاع الرسائل الفائتة في الخلفية (نقطة البداية تُحفظ فوراً قبل وصول رسائل حية)"""
+        task = asyncio.ensure_future(self.catch_up(account, since or self._last_message_ids()))
+        self._catch_up_tasks.add(task)
+        task.add_done_callback(self._catch_up_tasks.discard)
+
+    async def catch_up(self, account: Optional[str] = None, since: Optional[Dict[int, int]] = None) -> int:
+        """
+        استرجاع الرسائل التي فاتت أثناء الانقطاع لجميع القنوات النشطة
+
+        لكل قناة تُجلب أحدث catch_up_limit رسالة بعد آخر رسالة مستلمة وتمر عبر
+        نفس خط المعالجة من الأقدم للأحدث - بعد انقطاع طويل تُترك الرسائل الأقدم
+        لأن الأحدث هي التي ما زالت قابلة للتنفيذ. يتم العمل على عدة قنوات بالتوازي
+        بحد أقصى catch_up_concurrency. الرسائل الأقدم من catch_up_max_age تُحلل
+        وتُعرض لكن لا تُنفذ (انظر _process_new_message)
+
+        Args:
+            account: قنوات حساب واحد فقط (بعد إعادة اتصاله) أو None لجميع الحسابات
+            since: آخر رسالة مستلمة لكل قناة قبل الانقطاع (الافتراضي last_message_id الحالي)
+
+        Returns:
+            عدد الرسائل المسترجعة
+        """
+        if since is None:
+            since = self._last_message_ids()
+        channels = [
+            self._channels_by_id[cid] for cid in self._active_channel_ids
+            if since.get(cid) and (account is None or self._channel_account(cid) == account)
+        ]
+        if not channels or not self.accounts:
+            return 0
+
+        semaphore = asyncio.Semaphore(self.catch_up_concurrency)
+
+        async def fetch_channel(channel_info: Dict) -> int:
+            async with semaphore:
+                return await self._catch_up_channel(channel_info, since[channel_info['id']])
+
+        results = await asyncio.gather(*(fetch_channel(ch) for ch in channels), return_exceptions=True)
+        total = sum(r for r in results if isinstance(r, int))
+        if total:
+            print(f"🔄 تم استرجاع {total} رسالة فائتة من {len(channels)} قناة")
+        return total
+
+    async def _catch_up_channel(self, channel_info: Dict, last_id: int) -> int:
+        """استرجاع أحدث الرسائل الفائتة لقناة واحدة ومعالجتها من الأقدم للأحدث"""
+        channel_id = channel_info['id']
+        count = 0
+        client = self._client_for_channel(channel_id)
+        try:
+            entity = await self._get_channel_entity(channel_id, client)
+            # الأحدث أولاً (بدون reverse) حتى يشمل الحد الرسائل الحديثة وليس الأقدم
+            messages = [
+                message async for message in client.iter_messages(entity, min_id=last_id,
+                                                                  limit=self.catch_up_limit)
+            ]
+            if len(messages) >= self.catch_up_limit:
+                print(f"⚠️ {channel_info.get('name')}: تم استرجاع آخر {self.catch_up_limit} رسالة فقط")
+
+            # الرسائل التي استُلمت مباشرة بعد الاتصال (بما فيها أثناء الجلب) لا تُكرر
+            first_live = self._first_live_ids.get(channel_id)
+            for message in reversed(messages):
+                if first_live is not None and message.id >= first_live:
+                    break
+                if not message.message:
+                    continue
+                await self._submit_message(channel_info, message, catch_up=True)
+                count += 1
+        except Exception as e:
+            print(f"⚠️ فشل استرجاع الرسائل الفائتة من {channel_info.get('name')}: {str(e)}")
+        return count
+
+    async def _connection_watcher(self):
+        """
+        مراقبة انقطاع وعودة اتصال الحسابات كل reconnect_check_interval ثانية
+
+        عند الانقطاع تُحفظ آخر رسالة مستلمة لكل قناة من قنوات الحساب، وعند عودة
+        الاتصال تُسترجع الرسائل الفائتة منذ ذلك الحين
+        """
+        online = {account: client.is_connected() for account, client in self.accounts.items()}
+        while True:
+            await asyncio.sleep(self.reconnect_check_interval)
+            for account, client in list(self.accounts.items()):
+                connected = client.is_connected()
+                was_connected = online.get(account, connected)
+                online[account] = connected
+
+                if was_connected and not connected:
+                    channel_ids = self._assign_channels().get(account, ())
+                    self._resume_ids[account] = {
+                        cid: self._channels_by_id[cid].get('last_message_id') for cid in channel_ids
+                    }
+                    # أول رسالة حية بعد العودة تحدد نهاية الاسترجاع من جديد
+                    for cid in channel_ids:
+                        self._first_live_ids.pop(cid, None)
+                    print(f"⚠️ انقطع اتصال الحساب {account} - جارٍ انتظار إعادة الاتصال")
+
+                elif connected and not was_connected:
+                    print(f"🔄 عاد اتصال الحساب {account} - استرجاع الرسائل الفائتة")
+                    self._start_catch_up(account, self._resume_ids.pop(account, None))
+
+    async def _get_channel_entity(self, channel_id: int, client=None):
+        """الحصول على كيان القناة من المعرف المحفوظ (قناة/مجموعة خارقة أو مجموعة عادية)"""
+        client = client or self.client
+        try:
+            return await client.get_input_entity(int(f"-100{channel_id}"))
+        except (ValueError, TypeError):
+            return await client.get_input_entity(-channel_id)
+
+    async def edit_handler(self, event):
+        """معالج تعديل الرسائل - يمر عبر نفس طابور التحليل للحفاظ على الترتيب"""
+        try:
+            channel_info = self._resolve_channel(event.chat_id)
+            message_text = event.message.message
+            if not channel_info or not message_text:
+                return
+
+            await self.pipeline.submit({
+                'event': 'edit',
+                'channel_info': channel_info,
+                'channel_id': channel_info['id'],
+                'message_id': event.message.id,
+                'basic_group': self._is_basic_group_chat(event.chat_id),
+                'message_text': message_text,
+                'message_date': event.message.date,
+                'received_at': datetime.now()
+            })
+
+        except Exception as e:
+            print(f"❌ خطأ في استقبال تعديل الرسالة: {str(e)}")
+
+    async def delete_handler(self, event):
+        """معالج حذف الرسائل"""
+        try:
+            channel_id = None
+            if event.chat_id is not None:
+                channel_info = self._resolve_channel(event.chat_id)
+                if not channel_info:
+                    return
+                channel_id = channel_info['id']
+
+            await self.pipeline.submit({
+                'event': 'delete',
+                'channel_id': channel_id,
+                'message_ids': list(event.deleted_ids),
+                'received_at': datetime.now()
+            })
+
+        except Exception as e:
+            print(f"❌ خطأ في استقبال حذف الرسالة: {str(e)}")
+
+    async def _process_message(self, item: Dict) -> List:
+        """
+        مرحلة التحليل: توجيه الحدث حسب نوعه (رسالة جديدة، تعديل، حذف)
+
+        Returns:
+            الإشارات أو التعديلات لتمريرها لمرحلة التنفيذ
+        """
+        event_type = item.get('event')
+        if event_type == 'edit':
+            return await self._process_edit(item)
+        if event_type == 'delete':
+            return self._process_delete(item)
+        return await self._process_new_message(item)
+
+    async def _process_edit(self, item: Dict) -> List:
+        """تعديل رسالة: إعادة تحليلها ومقارنتها مع إشاراتها المسجلة"""
+        try:
+            channel_name = item['channel_info']['name']
+            signals = self.signal_parser.parse_all(item['message_text'], channel_name)
+            amendments = self.message_tracker.amend(
+                item['channel_id'], item['message_id'], item['message_text'], signals
+            )
+
+            if amendments is None:
+                # رسالة غير مسجلة (لم تكن إشارة أو قديمة): تُعامل كجديدة إن كانت حديثة
+                if self._message_age(item) > self.edit_as_new_max_age:
+                    return []
+                return await self._process_new_message(item)
+
+            self._release_cancelled(amendments)
+            for amendment in amendments:
+                print(f"✏️ تعديل إشارة {amendment.signal.symbol} من {channel_name}: "
+                      f"{amendment.kind} {amendment.changes or ''}")
+            return amendments
+
+        except Exception as e:
+            print(f"❌ خطأ في معالجة تعديل الرسالة: {str(e)}")
+            return []
+
+    @staticmethod
+    def _message_age(item: Dict) -> float:
+        """عمر الرسالة بالثواني من تاريخ نشرها في Telegram (0 إذا لم يكن معروفاً)"""
+        message_date = item.get('message_date')
+        if message_date is None:
+            return 0.0
+        return (datetime.now(timezone.utc) - message_date).total_seconds()
+
+    def _process_delete(self, item: Dict) -> List[SignalAmendment]:
+        """حذف رسائل: إلغاء إشاراتها المسجلة"""
+        amendments = []
+        for message_id in item['message_ids']:
+            amendments.extend(self.message_tracker.delete(item['channel_id'], message_id))
+        self._release_cancelled(amendments)
+        for amendment in amendments:
+            print(f"🗑️ حُذفت رسالة إشارة {amendment.signal.symbol} (رسالة {amendment.message_id})")
+        return amendments
+
+    def _release_cancelled(self, amendments: List[SignalAmendment]):
+        """إزالة الإشارات الملغاة/المحذوفة من منع التكرار (إعادة نشرها تُنفذ كإشارة جديدة)"""
+        for amendment in amendments:
+            if amendment.kind in ('cancel', 'deleted'):
+                self.signal_deduplicator.forget(amendment.signal)
+
+    async def _process_new_message(self, item: Dict) -> List:
+        """
+        تحليل رسالة جديدة وإرسال بياناتها للواجهة
+
+        الرسالة التي ليست إشارة وهي رد على رسالة إشارة مسجلة تُفحص كأمر
+        (تحريك SL، إغلاق النصف...) على صفقة تلك الإشارة
+
+        Returns:
+            الإشارات أو أوامر الرد لتمريرها لمرحلة التنفيذ
+        """
+        try:
+            channel_info = item['channel_info']
             channel_name = channel_info['name']
+            message_text = item['message_text']
+            commands = []
 
-            # محاولة تحليل الرسالة
-            signal = self.signal_parser.parse(message_text, channel_name)
+            # محاولة تحليل الرسالة (التشخيص يُجمع من نفس التقطيع)
+            # الرسالة قد تحتوي عدة إشارات لأصول مختلفة
+            diagnostics = {}
+            parse_start = time.perf_counter()
+            signals = self.signal_parser.parse_all(message_text, channel_name, diagnostics=diagnostics)
+            self.channel_metrics.record_message(
+                item['channel_id'], channel_name, time.perf_counter() - parse_start,
+                len(signals), diagnostics.get('rejected')
+            )
+            signal = signals[0] if signals else None
 
             # بيانات الرسالة للواجهة
             message_data = {
                 'channel_name': channel_name,
-                'channel_id': real_channel_id,
+                'channel_id': item['channel_id'],
                 'message_text': message_text,
-                'time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'time': item['received_at'].strftime('%Y-%m-%d %H:%M:%S'),
                 'parsed': signal is not None
             }
 
+            # رسالة مسترجعة قديمة: تُعرض وتُسجل فقط بدون تنفيذ
+            stale = item.get('catch_up') and self._message_age(item) > self.catch_up_max_age
+            if item.get('catch_up'):
+                message_data['catch_up'] = True
+            if stale:
+                message_data['stale'] = True
+                if signal:
+                    print(f"⏰ إشارة قديمة من {channel_name} (رسالة {item.get('message_id')}) - لن تُنفذ")
+
             if signal:
                 # نجح التحليل
                 message_data['signal_info'] = {
@@ -163,54 +744,139 @@ class TelegramSignalClient:
                     'stop_loss': signal.stop_loss
                 }
 
+                if len(signals) > 1:
+                    message_data['signals_count'] = len(signals)
+
                 # تحديث حالة القناة
                 channel_info['last_signal'] = datetime.now().isoformat()
-                channel_info['signal_count'] = channel_info.get('signal_count', 0) + 1
-                self.save_channels()
+                channel_info['signal_count'] = channel_info.get('signal_count', 0) + len(signals)
+                self.mark_channels_dirty()
 
-                # استدعاء callback للإشارة
-                if self.signal_callback:
-                    await self.signal_callback(signal)
+                # تسجيل الإشارات لتتبع تعديل/حذف الرسالة لاحقاً
+                self.message_tracker.track(item['channel_id'], item.get('message_id'), signals,
+                                           basic_group=item.get('basic_group', False))
+
+                # نفس الإشارة وصلت من قناة أخرى خلال النافذة: لا تُنفذ مرة ثانية
+                if not stale:
+                    signals, duplicates = self.signal_deduplicator.filter(signals, channel_name)
+                    self.channel_metrics.record_outcome(item['channel_id'], 'duplicate', len(duplicates))
+                    if duplicates:
+                        message_data['duplicates'] = [
+                            {'symbol': dup.symbol, 'action': dup.action, 'original_channel': original.channel_name}
+                            for dup, original in duplicates
+                        ]
+                    for dup, original in duplicates:
+                        print(f"🔁 إشارة مكررة من {channel_name}: {dup.symbol} {dup.action} "
+                              f"(وصلت من {original.channel_name}) - لن تُنفذ")
 
             else:
-                # فشل التحليل - جمع معلومات التشخيص
-                symbol = self.signal_parser.extract_symbol(message_text)
-                action = self.signal_parser.extract_action(message_text)
-                entry_price, entry_range = self.signal_parser.extract_entry_price(message_text, symbol if symbol else "")
-                take_profits = self.signal_parser.extract_take_profits(message_text, symbol if symbol else "")
-                stop_loss = self.signal_parser.extract_stop_loss(message_text, symbol if symbol else "")
-
-                message_data['diagnostics'] = {
-                    'symbol': symbol,
-                    'action': action,
-                    'entry_price': entry_price,
-                    'entry_range': entry_range,
-                    'take_profits': take_profits,
-                    'stop_loss': stop_loss
-                }
+                # فشل التحليل - معلومات التشخيص من نفس التحليل
+                message_data['diagnostics'] = diagnostics
+
+                # رد على رسالة إشارة: البحث عن أمر على صفقتها
+                if item.get('reply_to'):
+                    commands = self.message_tracker.reply(item['channel_id'], item['reply_to'], message_text) or []
+                    if commands:
+                        message_data['reply_commands'] = [(c.kind, c.value) for c in commands]
+                    for command in commands:
+                        print(f"↩️ أمر رد من {channel_name} على {command.signal.symbol}: "
+                              f"{command.kind} {command.value if command.value is not None else ''}")
 
             # استدعاء callback للرسالة (ناجحة أو فاشلة)
             if self.message_callback:
                 await self.message_callback(message_data, signal)
 
+            if stale:
+                self.channel_metrics.record_outcome(item['channel_id'], 'stale', len(signals))
+                return []
+
+            # ربط الإشارات بقناتها لتسجيل نتيجة التنفيذ
+            for dispatched in signals:
+                self.channel_metrics.bind_signal(dispatched, item['channel_id'])
+
+            # الإشارات (أو أوامر الرد) تُنفذ في مرحلة التنفيذ
+            return signals or commands
+
         except Exception as e:
             print(f"❌ خطأ في معالجة الرسالة: {str(e)}")
             import traceback
             traceback.print_exc()
+            return []
+
+    async def _execute_signal(self, item):
+        """مرحلة التنفيذ: تمرير إشارة لـ callback الإشارات أو تعديل/أمر رد لـ callback التعديلات"""
+        if isinstance(item, SignalAmendment):
+            if self.amendment_callback:
+                await self.amendment_callback(item)
+            return
+
+        # الإشارة أُلغيت (تعديل/حذف الرسالة) قبل وصول دورها في التنفيذ
+        if item.status == 'cancelled':
+            print(f"⏭️ تخطي إشارة ملغاة: {item.symbol} {item.action}")
+            self.channel_metrics.record_signal_outcome(item, 'cancelled')
+            return
+
+        if self.signal_callback:
+            self.channel_metrics.record_signal_outcome(item, 'dispatched')
+            try:
+                await self.signal_callback(item)
+            except Exception:
+                self.channel_metrics.record_signal_outcome(item, 'error')
+                raise
 
-    async def add_channel(self, channel_identifier: str) -> Dict:
-        """إضافة قناة للمراقبة (رابط أو username)"""
+    def get_pipeline_stats(self) -> Dict:
+        """إحصائيات خط المعالجة (عمق الطوابير والضغط العكسي وزمن الانتظار)"""
+        return self.pipeline.get_stats()
+
+    def get_channel_metrics(self, channel_id: int = None):
+        """
+        إحصائيات الأداء لكل قناة (الأكثر استهلاكاً لزمن التحليل أولاً)
+
+        Args:
+            channel_id: قناة واحدة فقط (اختياري)
+        """
+        if channel_id is not None:
+            return self.channel_metrics.get_channel(channel_id)
+        return self.channel_metrics.get_stats()
+
+    def record_execution_outcome(self, signal: Signal, outcome: str):
+        """تسجيل نتيجة تنفيذ إشارة في MT5 لقناتها (executed, failed...)"""
+        self.channel_metrics.record_signal_outcome(signal, outcome)
+
+    def save_channel_metrics(self):
+        """حفظ نسخة من إحصائيات القنوات (فوري)"""
         try:
+            atomic_write_json(self.metrics_file, self.channel_metrics.snapshot())
+        except Exception as e:
+            print(f"⚠️ فشل حفظ إحصائيات القنوات: {str(e)}")
+
+    async def _metrics_snapshotter(self):
+        """حفظ دوري لإحصائيات القنوات كل metrics_interval ثانية (الكتابة في thread منفصل)"""
+        loop = asyncio.get_event_loop()
+        while True:
+            await asyncio.sleep(self.metrics_interval)
+            snapshot = self.channel_metrics.snapshot()
+            try:
+                await loop.run_in_executor(None, atomic_write_json, self.metrics_file, snapshot)
+            except Exception as e:
+                print(f"⚠️ فشل حفظ إحصائيات القنوات: {str(e)}")
+
+    async def add_channel(self, channel_identifier: str, account: str = DEFAULT_ACCOUNT) -> Dict:
+        """إضافة قناة للمراقبة (رابط أو username) عبر الحساب المحدد"""
+        try:
+            client = self.accounts.get(account, self.client)
+
             # محاولة الانضمام إلى القناة
-            entity = await self.client.get_entity(channel_identifier)
+            entity = await client.get_entity(channel_identifier)
 
             # الحصول على معلومات القناة الكاملة
-            full_channel = await self.client(GetFullChannelRequest(entity))
+            full_channel = await client(GetFullChannelRequest(entity))
 
             channel_info = {
                 'id': entity.id,
                 'name': entity.title,
                 'username': entity.username if hasattr(entity, 'username') else None,
+                'account': account if account in self.accounts else DEFAULT_ACCOUNT,
                 'added_date': datetime.now().isoformat(),
                 'status': 'active',
                 'signal_count': 0,
@@ -218,7 +884,7 @@ class TelegramSignalClient:
             }
 
             # التحقق من عدم تكرار القناة
-            if not any(ch['id'] == channel_info['id'] for ch in self.monitored_channels):
+            if channel_info['id'] not in self._channels_by_id:
                 self.monitored_channels.append(channel_info)
                 self.save_channels()
                 print(f"✅ تمت إضافة القناة: {channel_info['name']}")
@@ -246,12 +912,12 @@ class TelegramSignalClient:
     def toggle_channel_status(self, channel_id: int) -> bool:
         """تفعيل/تعطيل قناة"""
         try:
-            for channel in self.monitored_channels:
-                if channel['id'] == channel_id:
-                    channel['status'] = 'active' if channel['status'] == 'inactive' else 'inactive'
-                    self.save_channels()
-                    return True
-            return False
+            channel = self._channels_by_id.get(channel_id)
+            if channel is None:
+                return False
+            channel['status'] = 'active' if channel['status'] == 'inactive' else 'inactive'
+            self.save_channels()
+            return True
         except Exception as e:
             print(f"❌ خطأ في تغيير حالة القناة: {str(e)}")
             return False
@@ -261,13 +927,87 @@ class TelegramSignalClient:
         return self.monitored_channels
 
     def save_channels(self):
-        """حفظ القنوات إلى ملف"""
+        """حفظ القنوات إلى ملف (فوري)"""
+        # الواجهة قد تعدّل حالة القنوات مباشرة ثم تستدعي الحفظ
+        self._rebuild_channel_index()
+        self._channels_dirty = False
         try:
-            with open(self.channels_file, 'w', encoding='utf-8') as f:
-                json.dump(self.monitored_channels, f, indent=4, ensure_ascii=False)
+            self._write_json_file(self.channels_file, self.monitored_channels, next(self._save_generation))
         except Exception as e:
+            self._channels_dirty = True
             print(f"❌ خطأ في حفظ القنوات: {str(e)}")
 
+    def mark_channels_dirty(self):
+        """تعليم حالة القنوات كمعدّلة ليكتبها الحافظ الخلفي لاحقاً"""
+        self._channels_dirty = True
+
+    def _write_json_file(self, path: str, data, generation: int) -> bool:
+        """
+        كتابة ملف بشكل ذري (لا يترك الملف مقطوعاً عند الانقطاع)
+
+        Args:
+            generation: رقم النسخة من _save_generation وقت أخذ البيانات
+
+        Returns:
+            False إذا كُتبت نسخة أحدث من نفس الملف بالفعل (لا تتم الكتابة)
+        """
+        with self._save_lock:
+            if generation < self._written_generations.get(path, 0):
+                return False
+            atomic_write_json(path, data)
+            self._written_generations[path] = generation
+            return True
+
+    async def _channels_flusher(self):
+        """
+        حافظ خلفي لحالة القنوات وقوالب القنوات المتعلمة
+
+        يكتب التغييرات المعلقة مرة كل save_interval ثانية كحد أقصى.
+        الكتابة تتم في thread منفصل حتى لا تتوقف استقبال الرسائل.
+        """
+        loop = asyncio.get_event_loop()
+        while True:
+            await asyncio.sleep(self.save_interval)
+            await self._flush_templates(loop)
+            if not self._channels_dirty:
+                continue
+
+            # نسخة ثابتة من البيانات قبل الكتابة خارج حلقة الأحداث
+            self._channels_dirty = False
+            generation = next(self._save_generation)
+            snapshot = [dict(ch) for ch in self.monitored_channels]
+            try:
+                await loop.run_in_executor(None, self._write_json_file, self.channels_file, snapshot, generation)
+            except Exception as e:
+                self._channels_dirty = True
+                print(f"❌ خطأ في حفظ القنوات: {str(e)}")
+
+    async def _flush_templates(self, loop):
+        """كتابة قوالب القنوات المتعلمة إذا تغيّرت (في thread منفصل)"""
+        parser = self.signal_parser
+        if not parser.templates_dirty or not parser.patterns_file:
+            return
+        parser.templates_dirty = False
+        generation = next(self._save_generation)
+        snapshot = parser.templates_snapshot()
+        try:
+            await loop.run_in_executor(None, self._write_json_file, parser.patterns_file, snapshot, generation)
+        except Exception as e:
+            parser.templates_dirty = True
+            print(f"❌ خطأ في حفظ القوالب: {str(e)}")
+
+    def _save_templates(self):
+        """كتابة قوالب القنوات المعلقة فوراً (عند الإغلاق)"""
+        parser = self.signal_parser
+        if not parser.templates_dirty or not parser.patterns_file:
+            return
+        parser.templates_dirty = False
+        try:
+            self._write_json_file(parser.patterns_file, parser.templates_snapshot(), next(self._save_generation))
+        except Exception as e:
+            parser.templates_dirty = True
+            print(f"❌ خطأ في حفظ القوالب: {str(e)}")
+
     def load_channels(self):
         """تحميل القنوات من الملف"""
         try:
@@ -278,6 +1018,56 @@ class TelegramSignalClient:
         except Exception as e:
             print(f"❌ خطأ في تحميل القنوات: {str(e)}")
             self.monitored_channels = []
+        self._rebuild_channel_index()
+
+    async def run_source(self, source, drain_timeout: float = 30.0) -> Dict:
+        """
+        تشغيل خط المعالجة من مصدر رسائل بديل بدلاً من Telegram
+
+        المصدر (مثل FileReplaySource من message_sources) يستدعي message_handler
+        بأحداث بنفس شكل أحداث Telethon، فتمر الرسائل بنفس المسار الحقيقي حتى
+        callbacks الإشارات والرسائل. قنوات المصدر تُضاف في الذاكرة فقط أثناء التشغيل.
+
+        Args:
+            source: مصدر الرسائل (MessageSource)
+            drain_timeout: أقصى انتظار (ثانية) لانتهاء المعالجة بعد آخر رسالة
+
+        Returns:
+            إحصائيات خط المعالجة مع معدل الإرسال الفعلي
+        """
+        added = [ch for ch in source.channels if ch['id'] not in self._channels_by_id]
+        self.monitored_channels.extend(added)
+        self._rebuild_channel_index()
+
+        started = not self.pipeline.is_running
+        if started:
+            self.pipeline.start()
+
+        start = time.perf_counter()
+        send_time = 0.0
+        drained = False
+        try:
+            await source.run(self.message_handler)
+            send_time = time.perf_counter() - start
+            drained = await self.pipeline.join(drain_timeout)
+        finally:
+            elapsed = time.perf_counter() - start
+            if started:
+                await self.pipeline.stop(timeout=0)
+            if added:
+                added_ids = {ch['id'] for ch in added}
+                self.monitored_channels = [ch for ch in self.monitored_channels if ch['id'] not in added_ids]
+                self._rebuild_channel_index()
+
+        stats = self.pipeline.get_stats()
+        stats['source'] = {
+            'sent': source.sent,
+            'seconds': round(elapsed, 3),
+            'send_seconds': round(send_time, 3),
+            'messages_per_second': round(source.sent / send_time, 1) if send_time else 0.0,
+            'drained': drained
+        }
+        return stats
 
     async def run(self):
         """تشغيل العميل"""
@@ -288,16 +1078,30 @@ class TelegramSignalClient:
 
     def get_connection_status(self) -> Dict:
         """الحصول على حالة الاتصال"""
+        assignment = self._assign_channels()
         return {
             'connected': self.is_connected,
             'channels_count': len(self.monitored_channels),
-            'active_channels': len([ch for ch in self.monitored_channels if ch['status'] == 'active'])
+            'active_channels': len(self._active_channel_ids),
+            'accounts': {
+                account: {'connected': client.is_connected(), 'channels': len(assignment.get(account, ()))}
+                for account, client in self.accounts.items()
+            },
+            'pipeline': self.pipeline.get_stats(),
+            'dedup': self.signal_deduplicator.get_stats()
         }
 
-    async def get_all_joined_channels(self) -> List[Dict]:
+    async def get_all_joined_channels(self, force_refresh: bool = False) -> List[Dict]:
         """
         الحصول على جميع القنوات التي انضم لها المستخدم
 
+        القائمة تُقرأ من الذاكرة المؤقتة على القرص إن وُجدت (فتح فوري للنافذة)،
+        وإذا انتهت صلاحيتها يتم تحديثها في الخلفية للمرة القادمة.
+        مع عدة حسابات تُدمج القوائم: كل قناة مرة واحدة مع الحسابات المنضمة لها (accounts).
+
+        Args:
+            force_refresh: تحميل القائمة من Telegram الآن (زر التحديث)
+
         Returns:
             قائمة بمعلومات القنوات
         """
@@ -306,33 +1110,89 @@ class TelegramSignalClient:
                 print("❌ يجب الاتصال بالتليجرام أولاً")
                 return []
 
-            print("⏳ جارٍ تحميل جميع القنوات...")
+            cache = self._load_dialogs_cache()
+            if cache is None or force_refresh:
+                await self._refresh_dialogs()
+                cache = self._dialogs_cache
+            elif time.time() - cache.get('updated_at', 0) > self.dialogs_cache_ttl:
+                self._schedule_dialogs_refresh()
+
+            # حالة المراقبة تُحسب عند كل طلب (قد تتغير بعد حفظ الذاكرة)
+            return [
+                dict(channel, is_monitored=channel['id'] in self._channels_by_id)
+                for channel in cache['channels']
+            ]
 
-            channels_list = []
+        except Exception as e:
+            print(f"❌ خطأ في تحميل القنوات: {str(e)}")
+            return []
 
-            # الحصول على جميع المحادثات
-            async for dialog in self.client.iter_dialogs():
+    def _load_dialogs_cache(self) -> Optional[Dict]:
+        """قراءة ذاكرة المحادثات من القرص (مرة واحدة لكل جلسة)"""
+        if self._dialogs_cache is None and os.path.exists(self.dialogs_cache_file):
+            try:
+                with open(self.dialogs_cache_file, 'r', encoding='utf-8') as f:
+                    self._dialogs_cache = json.load(f)
+            except Exception as e:
+                print(f"⚠️ تجاهل ذاكرة المحادثات التالفة: {str(e)}")
+        return self._dialogs_cache
+
+    def _schedule_dialogs_refresh(self):
+        """تحديث ذاكرة المحادثات في الخلفية (تحديث واحد في نفس الوقت)"""
+        if self._dialogs_refresh_task is None or self._dialogs_refresh_task.done():
+            self._dialogs_refresh_task = asyncio.ensure_future(self._refresh_dialogs())
+
+    async def _refresh_dialogs(self):
+        """
+        تحديث كامل لقائمة المحادثات من Telegram (كل المحادثات من كل الحسابات)
+
+        ليس تحديثاً تزايدياً: iter_dialogs يمر على جميع المحادثات في كل مرة، لذلك
+        يُستدعى في الخلفية بعد انتهاء صلاحية الذاكرة أو عند طلب التحديث صراحة، والنافذة
+        تعرض الذاكرة المحفوظة أثناءه. القائمة الجديدة تستبدل القديمة بترتيب Telegram
+        (الأحدث نشاطاً أولاً)، ثم تُكتب على القرص خارج حلقة الأحداث
+        """
+        print("⏳ جارٍ تحميل جميع القنوات...")
+
+        previous = {ch['id']: ch for ch in (self._dialogs_cache or {}).get('channels', [])}
+        channels_list = []
+        channels_by_id = {}
+
+        # الحصول على جميع المحادثات من كل الحسابات (القناة المشتركة تظهر مرة واحدة)
+        for account, client in list(self.accounts.items()):
+            async for dialog in client.iter_dialogs():
                 # فقط القنوات والمجموعات الخارقة
-                if dialog.is_channel or dialog.is_group:
-                    channel_info = {
-                        'id': dialog.entity.id,
-                        'name': dialog.title,
-                        'username': dialog.entity.username if hasattr(dialog.entity, 'username') else None,
-                        'is_channel': dialog.is_channel,
-                        'is_group': dialog.is_group,
-                        'participants_count': getattr(dialog.entity, 'participants_count', 0),
-                        'is_monitored': any(ch['id'] == dialog.entity.id for ch in self.monitored_channels)
-                    }
-                    channels_list.append(channel_info)
+                if not (dialog.is_channel or dialog.is_group):
+                    continue
+                existing = channels_by_id.get(dialog.entity.id)
+                if existing is not None:
+                    existing['accounts'].append(account)
+                    continue
+                channel_info = {
+                    'id': dialog.entity.id,
+                    'name': dialog.title,
+                    'username': dialog.entity.username if hasattr(dialog.entity, 'username') else None,
+                    'is_channel': dialog.is_channel,
+                    'is_group': dialog.is_group,
+                    'participants_count': getattr(dialog.entity, 'participants_count', 0),
+                    'accounts': [account]
+                }
+                channels_by_id[channel_info['id']] = channel_info
+                channels_list.append(channel_info)
 
-            print(f"✅ تم تحميل {len(channels_list)} قناة/مجموعة")
-            return channels_list
+        changed = sum(1 for ch in channels_list if previous.get(ch['id']) != ch)
+        removed = len(set(previous) - {ch['id'] for ch in channels_list})
+        self._dialogs_cache = {'updated_at': time.time(), 'channels': channels_list}
 
+        try:
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(None, atomic_write_json, self.dialogs_cache_file, self._dialogs_cache, None)
         except Exception as e:
-            print(f"❌ خطأ في تحميل القنوات: {str(e)}")
-            return []
+            print(f"⚠️ فشل حفظ ذاكرة المحادثات: {str(e)}")
+
+        print(f"✅ تم تحميل {len(channels_list)} قناة/مجموعة (تغيير {changed} | حذف {removed})")
 
-    async def add_channel_by_id(self, channel_id: int, channel_name: str, username: str = None) -> Dict:
+    async def add_channel_by_id(self, channel_id: int, channel_name: str, username: str = None,
+                                account: str = None) -> Dict:
         """
         إضافة قناة للمراقبة باستخدام ID
 
@@ -340,19 +1200,27 @@ class TelegramSignalClient:
             channel_id: معرف القناة
             channel_name: اسم القناة
             username: اسم المستخدم للقناة (اختياري)
+            account: الحساب الذي يستقبل رسائل القناة (الافتراضي: أول حساب منضم لها
+                     حسب قائمة المحادثات)
 
         Returns:
             نتيجة العملية
         """
         try:
             # التحقق من عدم تكرار القناة
-            if any(ch['id'] == channel_id for ch in self.monitored_channels):
+            if channel_id in self._channels_by_id:
                 return {'success': False, 'error': 'القناة موجودة بالفعل'}
 
+            if account is None:
+                joined = next((ch for ch in (self._dialogs_cache or {}).get('channels', [])
+                               if ch['id'] == channel_id), None)
+                account = (joined or {}).get('accounts', [DEFAULT_ACCOUNT])[0]
+
             channel_info = {
                 'id': channel_id,
                 'name': channel_name,
                 'username': username,
+                'account': account,
                 'added_date': datetime.now().isoformat(),
                 'status': 'active',
                 'signal_count': 0,
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+اختبار إحصائيات الأداء لكل قناة
+"""
+
+import time
+
+from signal_parser import SignalParser
+from channel_metrics import ChannelMetrics
+
+
+def test_channel_metrics():
+    parser = SignalParser()
+    metrics = ChannelMetrics(max_bound_signals=2)
+
+    print("=" * 70)
+    print("🧪 اختبار إحصائيات القنوات")
+    print("=" * 70)
+    print()
+
+    passed = 0
+    failed = 0
+
+    def check(name, condition, details=''):
+        nonlocal passed, failed
+        if condition:
+            print(f"   ✅ {name}")
+            passed += 1
+        else:
+            print(f"   ❌ {name} {details}")
+            failed += 1
+
+    now = time.time()
+    messages = [
+        'XAUUSD BUY 3330\nTP 3334\nSL 3317',
+        'صباح الخير',
+        'TP1 HIT 🔥',
+        'GOLD SELL NOW',
+    ]
+    for i, text in enumerate(messages):
+        diagnostics = {}
+        start = time.perf_counter()
+        signals = parser.parse_all(text, 'Gold VIP', diagnostics=diagnostics)
+        metrics.record_message(1, 'Gold VIP', time.perf_counter() - start, len(signals),
+                               diagnostics.get('rejected'), now=now - 90 + i * 30)
+
+    stats = metrics.get_channel(1)
+    check("عدد الرسائل والإشارات", stats['messages'] == 4 and stats['parsed'] == 1 and stats['signals'] == 1,
+          stats)
+    check("نسبة نجاح التحليل", stats['parse_success_ratio'] == 0.25, stats['parse_success_ratio'])
+    check("أسباب الرفض المبكر",
+          stats['prefilter_reasons'] == {'no_action': 2, 'no_price': 1}, stats['prefilter_reasons'])
+    check("الرسائل في الدقيقة (آخر 60 ثانية فقط)", stats['messages_per_minute'] == 2.0,
+          stats['messages_per_minute'])
+    check("توزيع زمن التحليل", sum(stats['parse_latency_histogram'].values()) == 4,
+          stats['parse_latency_histogram'])
+
+    # ===== نتائج التنفيذ =====
+    signal = parser.parse_all(messages[0], 'Gold VIP')[0]
+    metrics.bind_signal(signal, 1)
+    metrics.record_outcome(1, 'duplicate', 2)
+    metrics.record_outcome(1, 'stale', 0)
+    check("نتيجة تنفيذ الإشارة تُسجل لقناتها", metrics.record_signal_outcome(signal, 'executed'))
+    check("عدادات النتائج", metrics.get_channel(1)['outcomes'] == {'duplicate': 2, 'executed': 1},
+          metrics.get_channel(1)['outcomes'])
+
+    for _ in range(2):
+        metrics.bind_signal(parser.parse_all(messages[0], 'Gold VIP')[0], 1)
+    check("ربط الإشارات محدود الحجم", not metrics.record_signal_outcome(signal, 'executed'))
+
+    # ===== القنوات المزعجة =====
+    for _ in range(60):
+        metrics.record_message(2, 'Chat Group', 0.0001, 0, 'no_action')
+    noisy = metrics.noisy_channels(min_messages=50)
+    check("اكتشاف القناة المزعجة", [ch['channel_id'] for ch in noisy] == [2], noisy)
+    check("الترتيب حسب زمن التحليل", metrics.get_stats()[0]['channel_id'] in (1, 2)
+          and len(metrics.snapshot()['channels']) == 2)
+
+    print()
+    print("=" * 70)
+    print(f"📊 النتائج: ✅ نجح {passed} | ❌ فشل {failed}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    test_channel_metrics()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+اختبار القوالب المتعلَّمة لكل قناة (المسار السريع)
+"""
+
+import json
+import os
+import tempfile
+
+from signal_parser import SignalParser
+
+def test_channel_templates():
+    patterns_file = os.path.join(tempfile.mkdtemp(), 'patterns.json')
+    parser = SignalParser(patterns_file=patterns_file)
+
+    first = """XAUUSD BUY 3330
+
+TP¹.  3333
+TP².  3336
+
+SL.   3310"""
+
+    second = """XAUUSD SELL 3352
+
+TP¹.  3348
+TP².  3344
+
+SL.   3365"""
+
+    different = """GOLD sell NOW 3343   - 45
+TP 3340
+TP 3337
+SL 3351"""
+
+    print("=" * 70)
+    print("🧪 اختبار القوالب المتعلَّمة لكل قناة")
+    print("=" * 70)
+    print()
+
+    passed = 0
+    failed = 0
+
+    parser.parse(first, 'قناة الذهب')
+    learned = len(parser.get_channel_templates('قناة الذهب'))
+
+    signal = parser.parse(second, 'قناة الذهب')
+    generic = SignalParser(price_ranges_file=None).parse(second, 'قناة الذهب')
+
+    parser.parse(different, 'قناة الذهب')
+
+    # التعلّم لا يكتب الملف أثناء التحليل - الحفظ مؤجل للحافظ الخلفي
+    deferred = parser.templates_dirty and not os.path.exists(patterns_file)
+    saved = parser.save_templates() and not parser.templates_dirty
+
+    reloaded = SignalParser(patterns_file=patterns_file)
+
+    # قالب طابق توقيعه لكنه لا يناسب الرسالة: المسار العام يكمل بدلاً من فقدان الإشارة
+    template = parser.get_channel_templates('قناة الذهب')[0]
+    broken = dict(template, take_profits=[99])
+    mismatched = SignalParser(patterns_file=None)
+    mismatched._register_template('قناة الذهب', broken)
+    fallback = mismatched.parse(second, 'قناة الذهب')
+
+    # القوالب غير الصالحة في الملف أو المضافة يدوياً لا تُستخدم
+    bad_file = os.path.join(os.path.dirname(patterns_file), 'bad_patterns.json')
+    with open(bad_file, 'w', encoding='utf-8') as f:
+        json.dump({
+            'channels': {'قناة الذهب': [broken, dict(template, stop_loss='3'), {'signature': []}, template]},
+            'custom': [dict(template, entry={'line': 99, 'range': False}), {'name': 'نمط بدون قالب'}]
+        }, f, ensure_ascii=False)
+    validated = SignalParser(patterns_file=bad_file)
+
+    checks = [
+        ('تعلّم قالب من أول إشارة', learned == 1),
+        ('المسار السريع للرسالة الثانية', parser.template_hits == 1),
+        ('نفس نتيجة المسار العام', signal is not None and generic is not None
+         and (signal.entry_price, signal.take_profits, signal.stop_loss)
+         == (generic.entry_price, generic.take_profits, generic.stop_loss)),
+        ('تخطيط مختلف يعود للمسار العام', parser.template_hits == 1),
+        ('الحفظ مؤجل أثناء التحليل', deferred),
+        ('الحفظ في patterns.json', saved and os.path.exists(patterns_file)),
+        ('إعادة التحميل', len(reloaded.get_channel_templates('قناة الذهب'))
+         == len(parser.get_channel_templates('قناة الذهب'))),
+        ('قالب لا يناسب الرسالة يعود للمسار العام', fallback is not None
+         and (fallback.entry_price, fallback.take_profits, fallback.stop_loss)
+         == (generic.entry_price, generic.take_profits, generic.stop_loss)
+         and mismatched.template_errors == 1 and mismatched.template_hits == 0),
+        ('تجاهل القوالب غير الصالحة عند التحميل', validated.get_channel_templates('قناة الذهب') == [template]
+         and validated.custom_patterns == [{'name': 'نمط بدون قالب'}]),
+        ('رفض نمط مخصص غير صالح', not validated.add_custom_pattern(broken)
+         and validated.add_custom_pattern(dict(template, name='مخصص'))),
+    ]
+
+    for name, ok in checks:
+        if ok:
+            print(f"   ✅ {name}")
+            passed += 1
+        else:
+            print(f"   ❌ {name}")
+            failed += 1
+
+    print()
+    print("=" * 70)
+    print(f"📊 النتائج: ✅ نجح {passed} | ❌ فشل {failed}")
+    print("=" * 70)
+
+if __name__ == "__main__":
+    test_channel_templates()
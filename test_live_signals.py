@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+اختبار كائنات الإشارات الحية في Trailing Stop (بدون منصة MT5 - منصة وهمية)
+"""
+
+import os
+import tempfile
+from types import SimpleNamespace
+
+import mt5_manager
+from mt5_manager import MT5Manager
+from signal_parser import Signal
+
+
+class FakePlatform:
+    """بديل وحدة MetaTrader5 في الاختبار: مراكز مفتوحة وطلبات تعديل SL"""
+
+    TRADE_ACTION_SLTP = 6
+    TRADE_RETCODE_DONE = 10009
+
+    def __init__(self):
+        self.positions = {}
+        self.sent = []
+
+    def positions_get(self, ticket=None):
+        position = self.positions.get(ticket)
+        return (position,) if position else ()
+
+    def symbol_info(self, symbol):
+        return SimpleNamespace(spread=0, point=0.01)
+
+    def symbol_info_tick(self, symbol):
+        return None
+
+    def order_send(self, request):
+        self.sent.append(request)
+        self.positions[request['position']].sl = request['sl']
+        return SimpleNamespace(retcode=self.TRADE_RETCODE_DONE, comment='')
+
+
+def test_live_signals():
+    print("=" * 70)
+    print("🧪 اختبار الإشارات الحية في Trailing Stop")
+    print("=" * 70)
+    print()
+
+    passed = 0
+    failed = 0
+
+    def check(name, condition, details=''):
+        nonlocal passed, failed
+        if condition:
+            print(f"   ✅ {name}")
+            passed += 1
+        else:
+            print(f"   ❌ {name} {details}")
+            failed += 1
+
+    platform = FakePlatform()
+    original_mt5 = mt5_manager.mt5
+    mt5_manager.mt5 = platform
+    try:
+        manager = MT5Manager()
+        manager.trades_file = os.path.join(tempfile.mkdtemp(), 'trades.json')
+
+        signal = Signal(symbol='XAUUSD', action='BUY', entry_price=3330.0,
+                        take_profits=[3334.0, 3340.0], stop_loss=3317.0)
+        platform.positions[1] = SimpleNamespace(ticket=1, symbol='XAUUSD', price_current=3333.0, sl=3317.0, tp=3340.0)
+        trade_info = {'signal': signal.to_dict(), 'entry_price': 3330.0, 'current_tp_index': 0}
+        manager.active_positions[1] = trade_info
+        manager._track_signal(1, signal)
+
+        # ===== 1. تعديل الإشارة الحية يصل للـ Trailing بدون إعادة البناء =====
+        signal.take_profits = [3332.0, 3340.0]  # تعديل TP1 من القناة (السعر 3333 لم يصل لـ TP1 القديم)
+        manager._update_trailing_stop(1, trade_info)
+        check("Trailing يستخدم TP المعدّل في الإشارة الحية",
+              trade_info['current_tp_index'] == 1 and platform.sent and platform.sent[-1]['sl'] == 3330.0,
+              platform.sent)
+        check("التذكرة مرتبطة بنفس الكائن", manager._live_signals[1] is signal
+              and manager.get_signal_tickets(signal) == [1])
+
+        # ===== 2. صفقة محملة من الملف: الإشارة تُبنى مرة واحدة من القاموس =====
+        platform.positions[2] = SimpleNamespace(ticket=2, symbol='XAUUSD', price_current=3331.0, sl=3317.0, tp=3340.0)
+        loaded = {'signal': signal.to_dict(), 'entry_price': 3330.0, 'current_tp_index': 0}
+        manager.active_positions[2] = loaded
+        manager._update_trailing_stop(2, loaded)
+        rebuilt = manager._live_signals.get(2)
+        manager._update_trailing_stop(2, loaded)
+        check("بناء الإشارة من القاموس مرة واحدة", rebuilt is not None and rebuilt is not signal
+              and manager._live_signals[2] is rebuilt and rebuilt == Signal.from_dict(signal.to_dict()))
+
+        # ===== 3. إغلاق الصفقة يفك الارتباط =====
+        del platform.positions[1]
+        manager._update_trailing_stop(1, trade_info)
+        check("إغلاق الصفقة يفك ارتباط الإشارة", 1 not in manager._live_signals
+              and manager.get_signal_tickets(signal) == [] and 1 not in manager.active_positions)
+
+        manager.executor.shutdown()
+    finally:
+        mt5_manager.mt5 = original_mt5
+
+    print()
+    print("=" * 70)
+    print(f"📊 النتائج: ✅ نجح {passed} | ❌ فشل {failed}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    test_live_signals()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+اختبار تتبع تعديل وحذف رسائل الإشارات والردود عليها
+"""
+
+from signal_parser import SignalParser
+from message_tracker import MessageTracker, is_cancel_message, parse_reply_command
+
+
+def test_message_tracker():
+    parser = SignalParser()
+    tracker = MessageTracker(max_messages_per_channel=3)
+
+    print("=" * 70)
+    print("🧪 اختبار تتبع تعديل وحذف الرسائل")
+    print("=" * 70)
+    print()
+
+    passed = 0
+    failed = 0
+
+    def check(name, condition, details=''):
+        nonlocal passed, failed
+        if condition:
+            print(f"   ✅ {name}")
+            passed += 1
+        else:
+            print(f"   ❌ {name} {details}")
+            failed += 1
+
+    original = parser.parse_all('XAUUSD BUY 3330\nTP 3334\nSL 3317', 'test')
+    tracker.track(100, 1, original)
+    live = original[0]
+
+    # ===== تعديل SL وإضافة TP =====
+    edited = parser.parse_all('XAUUSD BUY 3330\nTP 3334\nTP 3340\nSL 3320', 'test')
+    amendments = tracker.amend(100, 1, 'XAUUSD BUY 3330\nTP 3334\nTP 3340\nSL 3320', edited)
+    check("تعديل واحد للإشارة", amendments is not None and len(amendments) == 1, amendments)
+    if amendments:
+        amendment = amendments[0]
+        check("نوع التعديل modify", amendment.kind == 'modify', amendment.kind)
+        check("التعديل على نفس كائن الإشارة", amendment.signal is live)
+        check("الحقول المتغيرة SL و TP",
+              set(amendment.changes) == {'stop_loss', 'take_profits'}, amendment.changes)
+        check("الإشارة حُدّثت بالقيم الجديدة",
+              live.stop_loss == 3320 and live.take_profits == [3334, 3340],
+              f"{live.stop_loss} {live.take_profits}")
+
+    # ===== تعديل بدون تغيير =====
+    amendments = tracker.amend(100, 1, 'XAUUSD BUY 3330\nTP 3334\nTP 3340\nSL 3320', edited)
+    check("تعديل بدون تغيير لا ينتج تعديلات", amendments == [], amendments)
+
+    # ===== رسالة غير مسجلة =====
+    check("رسالة غير مسجلة", tracker.amend(100, 99, 'x', []) is None)
+
+    # ===== إلغاء بالتعديل =====
+    check("كلمات الإلغاء", is_cancel_message('XAUUSD BUY 3330 ❌ CANCELLED') and is_cancel_message('الإشارة ملغية'))
+    check("رسالة عادية ليست إلغاء", not is_cancel_message('XAUUSD BUY 3330\nTP 3334\nSL 3317'))
+    amendments = tracker.amend(100, 1, 'XAUUSD BUY 3330 ❌ CANCELLED', [])
+    check("الإلغاء بالتعديل", amendments and amendments[0].kind == 'cancel' and live.status == 'cancelled',
+          amendments)
+    check("الرسالة الملغاة أُزيلت من الفهرس", tracker.get_signals(100, 1) is None)
+
+    # ===== الحذف (بدون رقم المحادثة) =====
+    signals = parser.parse_all('GBPJPY SELL 199.400\nTP 199.100\nSL 199.900', 'test')
+    tracker.track(200, 7, signals, basic_group=True)
+    amendments = tracker.delete(None, 7)
+    check("الحذف بدون رقم المحادثة في مجموعة عادية", len(amendments) == 1 and amendments[0].channel_id == 200
+          and amendments[0].kind == 'deleted', amendments)
+    check("حذف رسالة غير مسجلة", tracker.delete(200, 7) == [])
+
+    # حذف رسالة في محادثة خاصة بنفس رقم رسالة قناة مراقبة
+    channel_signals = parser.parse_all('GBPJPY SELL 199.400\nTP 199.100\nSL 199.900', 'test')
+    tracker.track(250, 8, channel_signals)
+    check("حذف بدون رقم المحادثة لا يلغي إشارة قناة", tracker.delete(None, 8) == []
+          and tracker.get_signals(250, 8) is not None and channel_signals[0].status != 'cancelled')
+
+    # ===== الحد الأقصى لكل قناة =====
+    for message_id in range(10, 15):
+        tracker.track(300, message_id, signals)
+    check("الفهرس محدود الحجم لكل قناة",
+          tracker.get_stats()[300] == 3 and tracker.get_signals(300, 10) is None
+          and tracker.get_signals(300, 14) is not None, tracker.get_stats())
+
+    # ===== أوامر الردود =====
+    signal = parser.parse_all('XAUUSD BUY 3330\nTP 3334\nTP 3340\nSL 3317', 'test')[0]
+    replies = [
+        ('Move SL to entry', [('move_sl', None)]),
+        ('Move to BE ✅', [('move_sl', None)]),
+        ('SL BE', [('move_sl', None)]),
+        ('SL to TP1', [('move_sl', 3334.0)]),
+        ('move sl to 3325', [('move_sl', 3325.0)]),
+        ('Close half', [('close', 0.5)]),
+        ('close 30% and move SL to BE', [('move_sl', None), ('close', 0.3)]),
+        ('✅ Close now', [('close', 1.0)]),
+        ('Close all trades', [('close', 1.0)]),
+        ('CLOSE ✅', [('close', 1.0)]),
+        ('اغلق الصفقة الآن', [('close', 1.0)]),
+        ('اغلاق نصف الصفقة', [('close', 0.5)]),
+        ('حرك الستوب على الدخول', [('move_sl', None)]),
+        ('we will be fine', []),
+        ('price is close to TP1', []),
+        ('SL hit at 3317', []),
+        ('TP1 hit 🔥', []),
+        ('TP2 WILL BE HIT SOON', []),
+        ('BE READY', []),
+        ('Close to TP1 now 🔥', []),
+        ('PRICE CLOSE TO ENTRY', []),
+    ]
+    for text, expected in replies:
+        result = parse_reply_command(text, signal)
+        check(f"رد: {text}", result == expected, f"المتوقع {expected} - الفعلي {result}")
+
+    tracker.track(400, 50, [signal])
+    commands = tracker.reply(400, 50, 'close half')
+    check("الرد يُحل لنفس كائن الإشارة",
+          len(commands) == 1 and commands[0].signal is signal and commands[0].kind == 'close'
+          and commands[0].value == 0.5, commands)
+    check("رد على رسالة غير مسجلة", tracker.reply(400, 51, 'close half') is None)
+
+    print()
+    print("=" * 70)
+    print(f"📊 النتائج: ✅ نجح {passed} | ❌ فشل {failed}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    test_message_tracker()
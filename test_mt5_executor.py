@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+اختبار منفذ عمليات MT5 (thread مخصص مع واجهة async)
+"""
+
+import asyncio
+import threading
+import time
+
+from mt5_executor import MT5Executor
+
+
+async def run_executor_tests():
+    executor = MT5Executor()
+    passed = 0
+    failed = 0
+
+    def check(name, condition, details=''):
+        nonlocal passed, failed
+        if condition:
+            print(f"   ✅ {name}")
+            passed += 1
+        else:
+            print(f"   ❌ {name} {details}")
+            failed += 1
+
+    threads = []
+
+    def slow_order(value):
+        # محاكاة order_send بطيء (أو انتظار تفعيل التداول التلقائي)
+        threads.append(threading.get_ident())
+        time.sleep(0.2)
+        return value
+
+    # ===== 1. حلقة الأحداث تستمر أثناء تنفيذ أمر بطيء =====
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticker_task = asyncio.ensure_future(ticker())
+    results = await asyncio.gather(executor.run(slow_order, 1), executor.run(slow_order, 2))
+    ticker_task.cancel()
+
+    check("النتائج بالترتيب", results == [1, 2], results)
+    check("حلقة الأحداث لم تتوقف أثناء التنفيذ", ticks >= 20, f"ticks={ticks}")
+    check("كل الاستدعاءات في thread واحد",
+          len(set(threads)) == 1 and threads[0] != threading.get_ident(), threads)
+
+    # ===== 2. الاستدعاء المتزامن من داخل thread MT5 لا يتوقف =====
+    def nested():
+        return executor.call(lambda: 'inner')
+
+    check("call متداخل داخل thread MT5", await executor.run(nested) == 'inner')
+    check("call من thread آخر", executor.call(lambda: threading.get_ident()) == threads[0])
+
+    # ===== 3. الأخطاء تصل للمستدعي =====
+    def broken():
+        raise RuntimeError('MT5 غير متصل')
+
+    try:
+        await executor.run(broken)
+        check("الخطأ يصل للمستدعي", False)
+    except RuntimeError:
+        check("الخطأ يصل للمستدعي", True)
+
+    stats = executor.get_stats()
+    check("الإحصائيات", stats['failed'] == 1 and stats['pending'] == 0 and stats['max_run_ms'] >= 200, stats)
+
+    executor.shutdown(wait=True)
+    return passed, failed
+
+
+def test_mt5_executor():
+    print("=" * 70)
+    print("🧪 اختبار منفذ عمليات MT5")
+    print("=" * 70)
+    print()
+
+    passed, failed = asyncio.run(run_executor_tests())
+
+    print()
+    print("=" * 70)
+    print(f"📊 النتائج: ✅ نجح {passed} | ❌ فشل {failed}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    test_mt5_executor()
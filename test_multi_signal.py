@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+اختبار الرسائل التي تحتوي عدة إشارات لأصول مختلفة
+"""
+
+from signal_parser import SignalParser
+
+def test_multi_signal():
+    parser = SignalParser()
+
+    tests = [
+        {
+            'name': 'ذهب ويورو ين في رسالة واحدة',
+            'message': """🔥 GOLD BUY 3330
+TP 3335
+TP 3340
+SL 3320
+
+EURJPY SELL 172.500
+TP 172.100
+SL 172.900""",
+            'expected': [('XAUUSD', 'BUY'), ('EURJPY', 'SELL')]
+        },
+        {
+            'name': 'تكرار نفس الأصل لا يقسم الرسالة',
+            'message': """🔵XAUUSD_GOLD BUY 3331
+🔳TP : 3335.00
+🔳TP : 3338.00
+❌SL : 3321.000
+GOLD 🚀🚀""",
+            'expected': [('XAUUSD', 'BUY')]
+        },
+        {
+            'name': 'إشارة واحدة',
+            'message': """GBPJPY SELL 199.400
+TP 199.100
+SL 199.900""",
+            'expected': [('GBPJPY', 'SELL')]
+        },
+        {
+            'name': 'بدون إشارة',
+            'message': "GOLD و EURUSD اليوم في حالة ترقب",
+            'expected': []
+        },
+    ]
+
+    print("=" * 70)
+    print("🧪 اختبار الرسائل متعددة الإشارات")
+    print("=" * 70)
+    print()
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        signals = parser.parse_all(test['message'], 'test')
+        result = [(signal.symbol, signal.action) for signal in signals]
+        if result == test['expected']:
+            print(f"   ✅ {test['name']}: {result}")
+            passed += 1
+        else:
+            print(f"   ❌ {test['name']}: المتوقع {test['expected']} - الفعلي {result}")
+            failed += 1
+
+    # الرجوع للمسار العادي يستخدم نفس التقطيع ويملأ التشخيص مثل parse
+    tokenized = []
+    tokenize = parser.tokenize
+
+    def counting_tokenize(text):
+        tokenized.append(text)
+        return tokenize(text)
+
+    parser.tokenize = counting_tokenize
+    no_signal = """GOLD BUY 3330
+TP 3335
+
+EURJPY SELL 172.500
+TP 172.100"""
+    fallback_checks = []
+    for name, message in [('رسالة بإشارة واحدة', tests[2]['message'] + ' '),
+                          ('مقاطع بدون إشارة', no_signal)]:
+        tokenized.clear()
+        diagnostics = {}
+        signals = parser.parse_all(message, 'test', diagnostics=diagnostics)
+        calls = len(tokenized)
+        expected = {}
+        parser.parse(message + ' ', 'test', diagnostics=expected)
+        fallback_checks.append((name, calls == 1 and diagnostics == expected, (calls, diagnostics, expected)))
+    parser.tokenize = tokenize
+
+    for name, ok, details in fallback_checks:
+        if ok:
+            print(f"   ✅ تقطيع واحد وتشخيص كامل: {name}")
+            passed += 1
+        else:
+            print(f"   ❌ تقطيع واحد وتشخيص كامل: {name} {details}")
+            failed += 1
+
+    print()
+    print("=" * 70)
+    print(f"📊 النتائج: ✅ نجح {passed} | ❌ فشل {failed}")
+    print("=" * 70)
+
+if __name__ == "__main__":
+    test_multi_signal()
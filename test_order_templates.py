@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+اختبار قوالب الأوامر لكل رمز (بدون منصة MT5 - منصة وهمية تحسب الاستدعاءات)
+"""
+
+import threading
+from types import SimpleNamespace
+
+import mt5_manager
+from mt5_manager import MT5Manager
+
+
+class FakePlatform:
+    """بديل وحدة MetaTrader5 في الاختبار: رمز واحد XAUUSDm وعداد للاستدعاءات"""
+
+    ORDER_TIME_GTC = 0
+    ORDER_FILLING_FOK = 0
+    ORDER_FILLING_IOC = 1
+    ORDER_FILLING_RETURN = 2
+
+    def __init__(self):
+        self.calls = {}
+        self.info = dict(name='XAUUSDm', digits=2, point=0.01, trade_stops_level=10,
+                         volume_min=0.01, volume_max=100, volume_step=0.01, filling_mode=1,
+                         trade_allowed=True, trade_expert=True, trade_mode=4, visible=True,
+                         spread=20, bid=3330.0, ask=3330.2, trade_tick_size=0.01, trade_tick_value=1.0,
+                         trade_contract_size=100, order_mode=127)
+        self.tick = SimpleNamespace(bid=3330.0, ask=3330.2)
+        self.selected = []
+        self.threads = set()
+
+    def _count(self, name):
+        self.calls[name] = self.calls.get(name, 0) + 1
+        self.threads.add(threading.get_ident())
+
+    def symbol_info(self, symbol):
+        self._count('symbol_info')
+        return SimpleNamespace(**self.info) if symbol == 'XAUUSDm' else None
+
+    def symbol_info_tick(self, symbol):
+        self._count('symbol_info_tick')
+        # الرمز المخفي من Market Watch لا يُرجع سعراً
+        return self.tick if self.info['visible'] else None
+
+    def symbol_select(self, symbol, enable):
+        self.selected.append(symbol)
+        self.info['visible'] = True
+        return True
+
+    def symbols_get(self):
+        self._count('symbols_get')
+        return [SimpleNamespace(name='XAUUSDm')]
+
+    def positions_get(self):
+        self._count('positions_get')
+        return [SimpleNamespace(ticket=1, symbol='XAUUSDm', type=0, volume=0.01, price_open=3330.0,
+                                price_current=3331.0, sl=3320.0, tp=3340.0, profit=1.0, time=0)]
+
+    def account_info(self):
+        self._count('account_info')
+        return SimpleNamespace(login=1, balance=1000.0, equity=1001.0, margin=10.0,
+                               margin_free=991.0, profit=1.0, leverage=100)
+
+
+def test_order_templates():
+    print("=" * 70)
+    print("🧪 اختبار قوالب الأوامر")
+    print("=" * 70)
+    print()
+
+    passed = 0
+    failed = 0
+
+    def check(name, condition, details=''):
+        nonlocal passed, failed
+        if condition:
+            print(f"   ✅ {name}")
+            passed += 1
+        else:
+            print(f"   ❌ {name} {details}")
+            failed += 1
+
+    platform = FakePlatform()
+    original_mt5 = mt5_manager.mt5
+    mt5_manager.mt5 = platform
+    try:
+        manager = MT5Manager()
+
+        # ===== 1. البناء مرة واحدة ثم من الذاكرة =====
+        template = manager.get_order_template('XAUUSD')
+        calls = dict(platform.calls)
+        again = manager.get_order_template('XAUUSD')
+        check("بناء القالب بالرمز الفعلي", template is not None and template.actual_symbol == 'XAUUSDm'
+              and template.request_base['symbol'] == 'XAUUSDm', template and template.actual_symbol)
+        check("القالب من الذاكرة بدون استدعاءات", again is template and platform.calls == calls,
+              platform.calls)
+
+        # ===== 2. انتهاء الصلاحية بدون تغيير الخصائص: تمديد نفس القالب =====
+        template.created_at -= manager.order_template_ttl + 1
+        check("تمديد القالب بعد الصلاحية", manager.get_order_template('XAUUSD') is template
+              and manager.template_stats['revalidated'] == 1, manager.template_stats)
+
+        # ===== 3. تغيّر Stop Level: قالب جديد =====
+        platform.info['trade_stops_level'] = 50
+        rebuilt = manager.get_order_template('XAUUSD', refresh=True)
+        check("تغيّر الخصائص يعيد بناء القالب", rebuilt is not template and rebuilt.stops_level == 50)
+
+        # ===== 4. refresh_order_templates يحدّث القوالب القديمة فقط =====
+        before = manager.template_stats['revalidated']
+        manager.refresh_order_templates()
+        check("لا تحديث للقوالب الحديثة", manager.template_stats['revalidated'] == before)
+        rebuilt.created_at -= manager.order_template_ttl
+        manager.refresh_order_templates()
+        check("تحديث القالب القديم", manager.template_stats['revalidated'] == before + 1)
+
+        # ===== 5. إخفاء الرمز من Market Watch =====
+        platform.info['visible'] = False
+        hidden = manager.get_order_template('XAUUSD', refresh=True)
+        check("الرمز المخفي يُعاد تفعيله", hidden is not rebuilt and platform.selected == ['XAUUSDm'],
+              platform.selected)
+
+        # فشل السعر: حذف القالب وإعادة التفعيل قبل رفض الصفقة
+        platform.info['visible'] = False
+        manager.tick_cache.invalidate()
+        result = manager.validate_trade_conditions('XAUUSD', 'BUY', 0.01, None, 3320.0, 3340.0)
+        check("فشل السعر يعيد تفعيل الرمز ويكمل التحقق",
+              result['valid'] and platform.selected.count('XAUUSDm') == 2, result.get('errors'))
+        check("فشل السعر يحذف القالب", 'XAUUSD' not in manager._order_templates)
+
+        # ===== 6. check_trade_conditions بدون استدعاءات للمنصة =====
+        template = manager.get_order_template('XAUUSD')
+        calls = dict(platform.calls)
+        valid = manager.check_trade_conditions(template, platform.tick, 'BUY', 0.01, None, 3320.0, 3340.0)
+        too_close = manager.check_trade_conditions(template, platform.tick, 'BUY', 0.01, None, 3330.0, 3340.0)
+        small_lot = manager.check_trade_conditions(template, platform.tick, 'BUY', 0.001, None, 3320.0, 3340.0)
+        check("شروط صحيحة", valid['valid'] and valid['current_price'] == 3330.2, valid['errors'])
+        check("SL أقرب من Stop Level", not too_close['valid'])
+        check("حجم أقل من الحد الأدنى", not small_lot['valid'])
+        check("التحقق بدون استدعاءات للمنصة", platform.calls == calls, platform.calls)
+
+        # ===== 7. قراءات الواجهة تمر عبر thread MT5 =====
+        manager.is_connected = True
+        platform.threads.clear()
+        positions = manager.get_open_positions()
+        account = manager.get_account_info()
+        properties = manager.get_symbol_properties('XAUUSD', verbose=False)
+        everything = manager.get_all_symbols_properties(save_to_file=False)
+        mt5_thread = manager.executor.call(threading.get_ident)
+        check("القراءات صحيحة", positions[0]['ticket'] == 1 and account['balance'] == 1000.0
+              and properties['symbol'] == 'XAUUSDm' and list(everything) == ['XAUUSDm'])
+        check("استدعاءات MT5 من الواجهة في thread MT5 فقط",
+              platform.threads == {mt5_thread} and mt5_thread != threading.get_ident(), platform.threads)
+
+        manager.executor.shutdown()
+    finally:
+        mt5_manager.mt5 = original_mt5
+
+    print()
+    print("=" * 70)
+    print(f"📊 النتائج: ✅ نجح {passed} | ❌ فشل {failed}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    test_order_templates()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+اختبار الذاكرة المؤقتة لنتائج التحليل (الرسائل المكررة والمعاد توجيهها)
+"""
+
+from signal_parser import SignalParser
+
+def test_parse_cache():
+    parser = SignalParser(cache_size=2)
+
+    message = """🔵XAUUSD BUY 3330
+TP 3334
+TP 3338
+SL 3317"""
+
+    # نفس الرسالة بعد إعادة التوجيه: مسافات ورموز تعبيرية مختلفة
+    forwarded = """🔥 XAUUSD   BUY 3330
+TP 3334 ✅
+TP 3338
+SL  3317"""
+
+    print("=" * 70)
+    print("🧪 اختبار الذاكرة المؤقتة للتحليل")
+    print("=" * 70)
+    print()
+
+    passed = 0
+    failed = 0
+
+    first = parser.parse(message, 'قناة 1')
+    second = parser.parse(forwarded, 'قناة 2')
+    first.take_profits.append(9999)
+
+    stats = parser.get_cache_stats()
+    checks = [
+        ('إصابة للرسالة المعاد توجيهها', stats['hits'] == 1 and stats['misses'] == 1),
+        ('نسخة جديدة بقناة الرسالة الحالية', second is not first and second.channel_name == 'قناة 2'),
+        ('النص الأصلي محفوظ', second.raw_message == forwarded),
+        ('النسخة مستقلة', second.take_profits == [3334.0, 3338.0]),
+    ]
+
+    # رموز الشراء/البيع جزء من المفتاح
+    parser.parse("GOLD 🟢 3330\nTP 3334\nSL 3317", 'قناة 1')
+    parser.parse("GOLD 🔴 3330\nTP 3334\nSL 3317", 'قناة 1')
+    checks.append(('رموز الاتجاه تغير المفتاح', parser.get_cache_stats()['misses'] == 3))
+
+    # الحد الأقصى للحجم
+    checks.append(('الحجم محدود', parser.get_cache_stats()['size'] == 2))
+
+    # إضافة رمز تبطل الذاكرة
+    parser.add_symbol('SOLUSD')
+    parser.parse(message, 'قناة 1')
+    checks.append(('إبطال عند إضافة رمز', parser.get_cache_stats()['misses'] == 4))
+
+    # تبديل رمز بآخر (نفس طول القائمة) يبطل الذاكرة أيضاً
+    parser.parse(message, 'قناة 1')
+    parser.symbols[-1] = 'ADAUSD'
+    parser.parse(message, 'قناة 1')
+    checks.append(('إبطال عند تبديل رمز', parser.get_cache_stats()['misses'] == 5))
+
+    for name, ok in checks:
+        if ok:
+            print(f"   ✅ {name}")
+            passed += 1
+        else:
+            print(f"   ❌ {name}")
+            failed += 1
+
+    print()
+    print("=" * 70)
+    print(f"📊 النتائج: ✅ نجح {passed} | ❌ فشل {failed}")
+    print("=" * 70)
+
+if __name__ == "__main__":
+    test_parse_cache()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+اختبار التحليل الجماعي للرسائل (إعادة تشغيل سجل القنوات)
+"""
+
+import json
+import os
+
+from signal_parser import SignalParser
+
+def test_parse_many():
+    parser = SignalParser()
+
+    messages = [
+        """XAUUSD BUY 3330
+TP 3334
+TP 3338
+SL 3317""",
+        "صباح الخير للجميع",
+        ("""GBPJPY SELL 199.400
+TP 199.100
+TP 198.800
+SL 199.900""", 'قناة 2'),
+    ]
+
+    # إضافة رسائل السجل إن وجدت
+    history_file = 'data/signals_history.json'
+    if os.path.exists(history_file):
+        with open(history_file, 'r', encoding='utf-8') as f:
+            messages += [s['raw_message'] for s in json.load(f) if s.get('raw_message')]
+
+    print("=" * 70)
+    print("🧪 اختبار التحليل الجماعي")
+    print("=" * 70)
+    print()
+
+    passed = 0
+    failed = 0
+
+    summary = {}
+    sequential = list(parser.parse_many(messages, 'قناة 1', summary=summary, verbose=True))
+    parallel = list(parser.parse_many(messages, 'قناة 1', processes=2, chunk_size=16))
+
+    checks = [
+        ('الترتيب محفوظ', [r.index for r in sequential] == list(range(len(messages)))),
+        ('الرسالة الأولى إشارة', sequential[0].signal is not None and sequential[0].signal.symbol == 'XAUUSD'),
+        ('الرسالة الثانية فاشلة مع تشخيص', sequential[1].signal is None and sequential[1].diagnostics is not None),
+        ('اسم القناة من الزوج', sequential[2].channel_name == 'قناة 2'),
+        ('الملخص', summary.get('total') == len(messages) and summary.get('messages_per_second', 0) > 0),
+        ('التوازي يطابق التسلسل', [bool(r.signal) for r in sequential] == [bool(r.signal) for r in parallel]
+         and [r.signal.stop_loss for r in sequential if r.signal] == [r.signal.stop_loss for r in parallel if r.signal]),
+    ]
+
+    for name, ok in checks:
+        if ok:
+            print(f"   ✅ {name}")
+            passed += 1
+        else:
+            print(f"   ❌ {name}")
+            failed += 1
+
+    print()
+    print("=" * 70)
+    print(f"📊 النتائج: ✅ نجح {passed} | ❌ فشل {failed}")
+    print("=" * 70)
+
+if __name__ == "__main__":
+    test_parse_many()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+اختبار فلتر الرفض المبكر قبل التحليل الكامل
+"""
+
+from signal_parser import SignalParser
+
+def test_prefilter():
+    parser = SignalParser()
+
+    tests = [
+        {'name': 'إشارة كاملة', 'message': 'XAUUSD BUY 3330\nTP 3334\nSL 3317', 'expected': None},
+        {'name': 'رسالة فارغة', 'message': '   \n ', 'expected': 'empty'},
+        {'name': 'دردشة', 'message': 'صباح الخير يا شباب 🌹', 'expected': 'no_action'},
+        {'name': 'نتائج بدون أسعار', 'message': 'GOLD BUY TP1 HIT ✅ +40 PIPS', 'expected': 'no_price'},
+        {'name': 'ترويج', 'message': 'Join our VIP channel now! 50% off', 'expected': 'no_action'},
+        {'name': 'بدون رمز', 'message': 'BUY NOW 3330 TP 3340', 'expected': 'no_symbol'},
+        {'name': 'رقم بفاصلة آلاف', 'message': 'BTCUSD BUY 1,234', 'expected': None},
+    ]
+
+    print("=" * 70)
+    print("🧪 اختبار فلتر الرفض المبكر")
+    print("=" * 70)
+    print()
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        reason = parser.prefilter(test['message'])
+        if reason == test['expected']:
+            print(f"   ✅ {test['name']}: {reason or 'مقبولة'}")
+            passed += 1
+        else:
+            print(f"   ❌ {test['name']}: المتوقع {test['expected']} - الفعلي {reason}")
+            failed += 1
+
+    # التشخيص يحمل سبب الرفض
+    diagnostics = {}
+    signal = parser.parse('صباح الخير', 'test', diagnostics=diagnostics)
+    if signal is None and diagnostics.get('rejected') == 'no_action':
+        print("   ✅ التشخيص يحتوي سبب الرفض")
+        passed += 1
+    else:
+        print(f"   ❌ التشخيص: {diagnostics}")
+        failed += 1
+
+    stats = parser.get_prefilter_stats()
+    print(f"\n   📊 تم فحص {stats['checked']} | رفض {stats['rejected']} | {stats['reasons']}")
+
+    print()
+    print("=" * 70)
+    print(f"📊 النتائج: ✅ نجح {passed} | ❌ فشل {failed}")
+    print("=" * 70)
+
+if __name__ == "__main__":
+    test_prefilter()
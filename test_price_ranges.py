@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+اختبار جدول نطاقات الأسعار والتوليد من data/symbols_info.json
+"""
+
+import json
+import os
+import tempfile
+
+from signal_parser import PriceRangeTable, SignalParser
+
+
+def test_price_ranges():
+    print("=" * 70)
+    print("🧪 اختبار نطاقات الأسعار")
+    print("=" * 70)
+    print()
+
+    passed = 0
+    failed = 0
+
+    def check(name, condition, details=''):
+        nonlocal passed, failed
+        if condition:
+            print(f"   ✅ {name}")
+            passed += 1
+        else:
+            print(f"   ❌ {name} {details}")
+            failed += 1
+
+    # رموز متقاطعة توحَّد إلى BTCUSD/XAUUSD إذا مُرّرت لـ normalize_symbol
+    symbols_info = {
+        'BTCJPY': {'symbol': 'BTCJPY', 'original_symbol': 'BTCJPY', 'bid': 16000000.0},
+        'XAUEUR': {'symbol': 'XAUEUR', 'original_symbol': 'XAUEUR', 'bid': 2900.0},
+        'EURJPYm': {'symbol': 'EURJPYm', 'original_symbol': 'EURJPYm', 'bid': 170.0},
+        'XAGUSD': {'symbol': 'XAGUSD', 'original_symbol': 'XAGUSD', 'bid': 30.0},
+        'NOPRICE': {'symbol': 'NOPRICE'},
+    }
+    info_file = os.path.join(tempfile.mkdtemp(), 'symbols_info.json')
+    with open(info_file, 'w', encoding='utf-8') as f:
+        json.dump(symbols_info, f)
+
+    table = PriceRangeTable()
+    table.set_range('XAUEUR', 2000, 4000)
+    btcusd = table.get_range('BTCUSD')
+    seeded = table.seed_from_symbols_info(info_file)
+
+    check("عدد الرموز المولّدة (بدون المحدد يدوياً وبدون سعر)", seeded == 3, seeded)
+    check("التوليد باسم الرمز في المنصة", table.get_range('EURJPYM') == (85.0, 340.0),
+          table.get_range('EURJPYM'))
+    check("BTCJPY لا يغيّر نطاق BTCUSD", table.get_range('BTCUSD') == btcusd, table.get_range('BTCUSD'))
+    check("الرمز المحدد يدوياً لا يتغير", table.get_range('XAUEUR') == (2000.0, 4000.0))
+
+    # إشارة BTCUSD صالحة مع وجود BTCJPY في symbols_info.json
+    parser = SignalParser(price_ranges_file=None, symbols_info_file=info_file)
+    signal = parser.parse('BTCUSD BUY 65000\nTP 66000\nSL 64000', 'test')
+    check("إشارة BTCUSD لا تُرفض", signal is not None and signal.entry_price == 65000,
+          signal and signal.entry_price)
+
+    # الجدول هو المرجع الوحيد: النطاقات الأقل من 100 تعمل (عملات، نفط، رموز مولّدة)
+    check("نطاق العملات من الجدول", table.filter([1.0852, 150.0], 'EURUSD') == [1.0852])
+    check("نطاق رمز مولّد أقل من 100", table.filter([30.5, 1.5, 120.0], 'XAGUSD') == [30.5])
+    check("الأصول غير المعروفة من 100 فأكثر", table.filter([50.0, 100.0, 250.5], 'UNKNOWN') == [100.0, 250.5])
+    signal = parser.parse('XAGUSD BUY 30.50\nTP 31.20\nSL 29.80', 'test')
+    check("إشارة رمز مولّد بسعر أقل من 100", signal is not None and signal.symbol == 'XAGUSD'
+          and signal.entry_price == 30.5 and signal.take_profits == [31.2] and signal.stop_loss == 29.8, signal)
+    signal = parser.parse('GBPUSD BUY 1.34200\nTP 1.34400\nSL 1.33800', 'test')
+    check("إشارة عملات رئيسية", signal is not None and signal.entry_price == 1.342, signal)
+
+    # الحفظ ذري ويُعاد تحميله بنفس النطاقات
+    ranges_file = os.path.join(os.path.dirname(info_file), 'price_ranges.json')
+    saved = table.save(ranges_file)
+    reloaded = PriceRangeTable(ranges_file)
+    check("حفظ وإعادة تحميل الجدول", saved and reloaded.get_range('XAGUSD') == (15.0, 60.0)
+          and sorted(os.listdir(os.path.dirname(info_file))) == ['price_ranges.json', 'symbols_info.json'])
+
+    print()
+    print("=" * 70)
+    print(f"📊 النتائج: ✅ نجح {passed} | ❌ فشل {failed}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    test_price_ranges()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+اختبار منع تكرار نفس الإشارة من عدة قنوات
+"""
+
+from signal_parser import SignalParser
+from signal_dedup import SignalDeduplicator, round_price
+
+
+def test_signal_dedup():
+    parser = SignalParser()
+
+    print("=" * 70)
+    print("🧪 اختبار منع تكرار الإشارات بين القنوات")
+    print("=" * 70)
+    print()
+
+    passed = 0
+    failed = 0
+
+    def check(name, condition, details=''):
+        nonlocal passed, failed
+        if condition:
+            print(f"   ✅ {name}")
+            passed += 1
+        else:
+            print(f"   ❌ {name} {details}")
+            failed += 1
+
+    gold = 'GOLD BUY 3330\nTP 3334\nTP 3340\nSL 3317'
+    gold_copy = '🔥 XAUUSD BUY NOW 3330.4\nTP1 3334\nSL 3317'
+
+    # ===== first_wins =====
+    dedup = SignalDeduplicator(window=30.0, policy='first_wins')
+    first = parser.parse_all(gold, 'Channel A')[0]
+    copy = parser.parse_all(gold_copy, 'Channel B')[0]
+
+    check("أول نسخة جديدة", dedup.check(first, 'Channel A', now=0.0) is None)
+    check("النسخة من قناة أخرى مكررة", dedup.check(copy, 'Channel B', now=2.0) is first)
+    check("first_wins لا يغير الإشارة الأولى", first.channel_name == 'Channel A', first.channel_name)
+
+    sell = parser.parse_all('GOLD SELL 3330\nTP 3320\nSL 3340', 'Channel B')[0]
+    check("نوع صفقة مختلف ليس تكراراً", dedup.check(sell, 'Channel B', now=3.0) is None)
+
+    other_sl = parser.parse_all('GOLD BUY 3330\nTP 3334\nSL 3300', 'Channel C')[0]
+    check("SL مختلف ليس تكراراً", dedup.check(other_sl, 'Channel C', now=4.0) is None)
+
+    # ===== انتهاء النافذة =====
+    late = parser.parse_all(gold, 'Channel C')[0]
+    check("بعد انتهاء النافذة الإشارة جديدة", dedup.check(late, 'Channel C', now=31.0) is None)
+    check("الإدخال المنتهي فقط حُذف", len(dedup._entries) == 3, len(dedup._entries))
+
+    # ===== merge =====
+    dedup = SignalDeduplicator(window=30.0, policy='merge')
+    first = parser.parse_all(gold, 'Channel A')[0]
+    unique, duplicates = dedup.filter([first], 'Channel A')
+    check("filter: الإشارة الأولى تمر", unique == [first] and duplicates == [])
+
+    batch = parser.parse_all(gold_copy + '\n\nEURJPY SELL 172.500\nTP 172.100\nSL 172.900', 'Channel B')
+    unique, duplicates = dedup.filter(batch, 'Channel B')
+    check("filter: فصل المكرر عن الجديد في نفس الرسالة",
+          [s.symbol for s in unique] == ['EURJPY'] and len(duplicates) == 1 and duplicates[0][1] is first,
+          f"{[s.symbol for s in unique]} {duplicates}")
+    check("merge يدمج أسماء القنوات", first.channel_name == 'Channel A + Channel B', first.channel_name)
+
+    dedup.filter([parser.parse_all(gold, 'Channel B')[0]], 'Channel B')
+    check("نفس القناة لا تُضاف مرتين", first.channel_name == 'Channel A + Channel B', first.channel_name)
+    check("الإحصائيات", dedup.get_stats()['duplicates'] == 2, dedup.get_stats())
+
+    # ===== إلغاء الإشارة ثم إعادة نشرها =====
+    dedup = SignalDeduplicator(window=30.0, policy='first_wins')
+    cancelled = parser.parse_all(gold, 'Channel A')[0]
+    dedup.check(cancelled, 'Channel A', now=0.0)
+    copy = parser.parse_all(gold_copy, 'Channel B')[0]
+    dedup.check(copy, 'Channel B', now=1.0)
+    check("إلغاء النسخة المكررة لا يزيل الإشارة الأولى", not dedup.forget(copy) and len(dedup._entries) == 1)
+    cancelled.status = 'cancelled'
+    check("إزالة الإشارة الملغاة", dedup.forget(cancelled) and not dedup._entries)
+    reposted = parser.parse_all(gold, 'Channel A')[0]
+    check("إعادة النشر بعد الإلغاء إشارة جديدة", dedup.check(reposted, 'Channel A', now=5.0) is None)
+
+    modified = parser.parse_all('EURJPY SELL 172.500\nTP 172.100\nSL 172.900', 'Channel A')[0]
+    dedup.check(modified, 'Channel A', now=6.0)
+    modified.stop_loss = 173.5  # تعديل الرسالة بعد التسجيل يغيّر المفتاح
+    check("إزالة إشارة تغيرت قيمها بعد التسجيل", dedup.forget(modified)
+          and dedup.get_stats()['released'] == 2, dedup.get_stats())
+
+    # ===== التقريب والتعطيل =====
+    check("التقريب النسبي", round_price(3330.4) == 3330 and round_price(172.53) == 172.5
+          and round_price(1.08512) == 1.085 and round_price(None) is None)
+    disabled = SignalDeduplicator(window=0)
+    check("النافذة 0 تعطل منع التكرار",
+          disabled.check(first) is None and disabled.check(first) is None)
+
+    print()
+    print("=" * 70)
+    print(f"📊 النتائج: ✅ نجح {passed} | ❌ فشل {failed}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    test_signal_dedup()
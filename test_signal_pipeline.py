@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+اختبار خط معالجة الرسائل (استقبال -> تحليل -> تنفيذ)
+"""
+
+import asyncio
+import time
+
+from signal_parser import SignalParser
+from signal_pipeline import SignalPipeline
+
+
+async def run_pipeline_tests():
+    parser = SignalParser()
+    executed = []
+
+    async def parse_handler(message):
+        return parser.parse_all(message, 'test')
+
+    async def slow_execute(signal):
+        # تنفيذ بطيء يشبه انتظار MT5 أو إعادة المحاولة
+        await asyncio.sleep(0.2)
+        executed.append(signal.symbol)
+
+    passed = 0
+    failed = 0
+
+    # ===== 1. التنفيذ البطيء لا يؤخر الاستقبال =====
+    pipeline = SignalPipeline(parse_handler, slow_execute, queue_size=10, execute_workers=1)
+    pipeline.start()
+
+    start = time.perf_counter()
+    for _ in range(3):
+        await pipeline.submit('XAUUSD BUY 3330\nTP 3334\nSL 3317')
+    intake_ms = (time.perf_counter() - start) * 1000
+
+    if intake_ms < 50:
+        print(f"   ✅ الاستقبال لم ينتظر التنفيذ ({intake_ms:.2f}ms)")
+        passed += 1
+    else:
+        print(f"   ❌ الاستقبال انتظر التنفيذ ({intake_ms:.2f}ms)")
+        failed += 1
+
+    await pipeline.stop(timeout=2.0)
+    if executed == ['XAUUSD'] * 3:
+        print("   ✅ تم تنفيذ جميع الإشارات قبل الإيقاف")
+        passed += 1
+    else:
+        print(f"   ❌ الإشارات المنفذة: {executed}")
+        failed += 1
+
+    # ===== 2. رسالة بعدة إشارات + رسالة بدون إشارة =====
+    executed.clear()
+
+    async def fast_execute(signal):
+        executed.append(signal.symbol)
+
+    pipeline = SignalPipeline(parse_handler, fast_execute)
+    pipeline.start()
+    await pipeline.submit('XAUUSD BUY 3330\nTP 3334\nSL 3317\n\nEURJPY SELL 172.500\nTP 172.100\nSL 172.900')
+    await pipeline.submit('صباح الخير')
+    await pipeline.stop()
+
+    stats = pipeline.get_stats()
+    if sorted(executed) == ['EURJPY', 'XAUUSD'] and stats['parse']['processed'] == 2:
+        print(f"   ✅ التوزيع على مرحلة التنفيذ: {executed}")
+        passed += 1
+    else:
+        print(f"   ❌ التوزيع: {executed} | {stats['parse']}")
+        failed += 1
+
+    # ===== 3. الضغط العكسي يظهر في الإحصائيات =====
+    gate = asyncio.Event()
+
+    async def blocked_execute(signal):
+        await gate.wait()
+
+    pipeline = SignalPipeline(parse_handler, blocked_execute, queue_size=1,
+                              execute_queue_size=1, execute_workers=1)
+    pipeline.start()
+
+    async def feed():
+        for _ in range(5):
+            await pipeline.submit('XAUUSD BUY 3330\nTP 3334\nSL 3317')
+
+    feeder = asyncio.ensure_future(feed())
+    await asyncio.sleep(0.05)
+    gate.set()
+    await feeder
+    await pipeline.stop()
+
+    stats = pipeline.get_stats()
+    if stats['parse']['blocked'] > 0 and stats['execute']['blocked'] > 0 and stats['execute']['processed'] == 5:
+        print(f"   ✅ الضغط العكسي: تحليل {stats['parse']['blocked']} | تنفيذ {stats['execute']['blocked']}")
+        passed += 1
+    else:
+        print(f"   ❌ الإحصائيات: {stats}")
+        failed += 1
+
+    # ===== 4. خطأ في التنفيذ لا يوقف العامل =====
+    executed.clear()
+
+    async def flaky_execute(signal):
+        if not executed:
+            executed.append('error')
+            raise RuntimeError('MT5 غير متصل')
+        executed.append(signal.symbol)
+
+    pipeline = SignalPipeline(parse_handler, flaky_execute, execute_workers=1)
+    pipeline.start()
+    await pipeline.submit('XAUUSD BUY 3330\nTP 3334\nSL 3317')
+    await pipeline.submit('XAUUSD SELL 3330\nTP 3320\nSL 3340')
+    await pipeline.stop()
+
+    stats = pipeline.get_stats()['execute']
+    if stats['failed'] == 1 and stats['processed'] == 1:
+        print("   ✅ العامل استمر بعد الخطأ")
+        passed += 1
+    else:
+        print(f"   ❌ الإحصائيات بعد الخطأ: {stats}")
+        failed += 1
+
+    return passed, failed
+
+
+def test_signal_pipeline():
+    print("=" * 70)
+    print("🧪 اختبار خط معالجة الرسائل")
+    print("=" * 70)
+    print()
+
+    passed, failed = asyncio.run(run_pipeline_tests())
+
+    print()
+    print("=" * 70)
+    print(f"📊 النتائج: ✅ نجح {passed} | ❌ فشل {failed}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    test_signal_pipeline()
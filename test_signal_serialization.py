@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+اختبار تحويل الإشارة إلى قاموس/ترميز مضغوط واسترجاعها
+"""
+
+import json
+
+from signal_parser import Signal, SignalParser, SIGNAL_FIELDS
+
+
+def test_signal_serialization():
+    print("=" * 70)
+    print("🧪 اختبار تحويل الإشارات")
+    print("=" * 70)
+    print()
+
+    passed = 0
+    failed = 0
+
+    def check(name, condition, details=''):
+        nonlocal passed, failed
+        if condition:
+            print(f"   ✅ {name}")
+            passed += 1
+        else:
+            print(f"   ❌ {name} {details}")
+            failed += 1
+
+    parser = SignalParser(price_ranges_file=None)
+    signals = [
+        parser.parse('XAUUSD BUY 3330\nTP 3334\nTP 3340\nSL 3317', 'Gold VIP'),
+        Signal(symbol='XAUUSD', action='SELL', entry_price_range=(3343.0, 3345.0),
+               take_profits=[3340.0, 3337.0], stop_loss=3351.0, channel_name='Gold VIP'),
+        parser.parse('XAUUSD buy limit 4072\nTP 4077\nSL 4065', 'Gold VIP'),
+        Signal(symbol='EURJPY', action='SELL', status='cancelled'),
+    ]
+    check("تحليل رسائل الاختبار", all(s is not None for s in signals), signals)
+    signals = [s for s in signals if s is not None]
+
+    for signal in signals:
+        name = f"{signal.symbol} {signal.action} {signal.order_type}"
+
+        data = signal.to_dict()
+        check(f"to_dict بجميع الحقول: {name}", tuple(data) == SIGNAL_FIELDS, tuple(data))
+
+        # عبر JSON: القوائم تبقى قوائم والنطاق يعود tuple
+        restored = Signal.from_dict(json.loads(json.dumps(data, ensure_ascii=False)))
+        check(f"to_dict -> JSON -> from_dict: {name}", restored == signal, restored)
+
+        packed = signal.to_tuple()
+        check(f"to_tuple قابل للتجزئة: {name}", hash(packed) is not None)
+        check(f"to_tuple -> from_tuple: {name}", Signal.from_tuple(packed) == signal)
+
+    # to_dict نسخة: تعديل القاموس لا يغيّر الإشارة
+    signal = signals[0]
+    data = signal.to_dict()
+    data['take_profits'].append(9999)
+    check("to_dict لا يشارك قائمة TP", 9999 not in signal.take_profits)
+
+    # الحقول غير المعروفة في الملفات القديمة تُتجاهل
+    data = dict(signal.to_dict(), ticket=123, unknown='x')
+    check("from_dict يتجاهل الحقول غير المعروفة", Signal.from_dict(data) == signal)
+
+    print()
+    print("=" * 70)
+    print(f"📊 النتائج: ✅ نجح {passed} | ❌ فشل {failed}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    test_signal_serialization()
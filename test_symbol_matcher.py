@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+اختبار محرك مطابقة الرموز (مسح واحد للنص)
+"""
+
+from signal_parser import SignalParser
+
+def test_symbol_matcher():
+    parser = SignalParser()
+
+    tests = [
+        {'name': 'رمز عادي', 'message': 'EURUSD SELL 1.0850', 'expected': 'EURUSD'},
+        {'name': 'ذهب مع شرطة سفلية', 'message': '🔵XAUUSD_GOLD BUY 3331', 'expected': 'XAUUSD'},
+        {'name': 'رمز ملتصق بكلمة', 'message': '#XAUUSD_SELL 3340', 'expected': 'XAUUSD'},
+        {'name': 'حروف صغيرة', 'message': 'Gold buy limit 4072', 'expected': 'XAUUSD'},
+        {'name': 'الأولوية حسب القائمة', 'message': 'BTC vs GOLD buy', 'expected': 'XAUUSD'},
+        {'name': 'نمط عام XXXYYY', 'message': 'CHFJPY SELL 170.50', 'expected': 'CHFJPY'},
+        {'name': 'بدون رمز', 'message': 'hi all 🙂', 'expected': None},
+    ]
+
+    print("=" * 70)
+    print("🧪 اختبار محرك مطابقة الرموز")
+    print("=" * 70)
+    print()
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        symbol = parser.extract_symbol(test['message'])
+        if symbol == test['expected']:
+            print(f"   ✅ {test['name']}: {symbol}")
+            passed += 1
+        else:
+            print(f"   ❌ {test['name']}: المتوقع {test['expected']} - الفعلي {symbol}")
+            failed += 1
+
+    # إضافة رمز جديد وتحديث المحرك
+    parser.add_symbol('SOLUSD')
+    symbol = parser.extract_symbol('SOLUSD BUY 150')
+    if symbol == 'SOLUSD' and parser.symbols[-1] == 'SOLUSD':
+        print(f"   ✅ رمز مضاف: {symbol}")
+        passed += 1
+    else:
+        print(f"   ❌ رمز مضاف: {symbol}")
+        failed += 1
+
+    # تعديل القائمة مباشرة يعيد بناء المحرك تلقائياً
+    parser.symbols.append('DOGE')
+    symbol = parser.extract_symbol('DOGE BUY 0.15')
+    if symbol == 'DOGE':
+        print(f"   ✅ رمز مضاف مباشرة للقائمة: {symbol}")
+        passed += 1
+    else:
+        print(f"   ❌ رمز مضاف مباشرة للقائمة: {symbol}")
+        failed += 1
+
+    # تبديل رمز في مكانه (نفس طول القائمة) يعيد بناء المحرك أيضاً
+    parser.symbols[parser.symbols.index('DOGE')] = 'PEPE'
+    symbol = parser.extract_symbol('PEPE BUY 0.00001')
+    if symbol == 'PEPE' and parser.extract_symbol('DOGE BUY 0.15') is None:
+        print(f"   ✅ تبديل رمز في القائمة: {symbol}")
+        passed += 1
+    else:
+        print(f"   ❌ تبديل رمز في القائمة: {symbol}")
+        failed += 1
+
+    # إضافة عدة رموز متتالية: بناء واحد للمحرك عند أول مطابقة
+    regex = parser._symbol_regex
+    added = [parser.add_symbol(s) for s in ('SHIB', 'AVAX', 'SHIB')]
+    unchanged = parser._symbol_regex is regex
+    symbol = parser.extract_symbol('AVAX SELL 35')
+    if added == [True, True, False] and unchanged and symbol == 'AVAX' and parser._symbol_regex is not regex:
+        print(f"   ✅ إضافة عدة رموز ببناء واحد: {symbol}")
+        passed += 1
+    else:
+        print(f"   ❌ إضافة عدة رموز ببناء واحد: {added} {unchanged} {symbol}")
+        failed += 1
+
+    print()
+    print("=" * 70)
+    print(f"📊 النتائج: ✅ نجح {passed} | ❌ فشل {failed}")
+    print("=" * 70)
+
+if __name__ == "__main__":
+    test_symbol_matcher()
@@ -0,0 +1,378 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+اختبار عميل Telegram بدون اتصال (حسابات وهمية وأحداث بنفس شكل أحداث Telethon)
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from file_utils import atomic_write_json
+from message_sources import FileReplaySource, ReplayEvent, ReplayMessage
+from telegram_client import TelegramSignalClient
+
+CHANNEL_ID = 1234567890
+CHAT_ID = int(f"-100{CHANNEL_ID}")
+
+GOLD = 'GOLD BUY 3330\nTP 3334\nSL 3317'
+
+
+def gold(message_id, date=None):
+    """رسالة إشارة ذهب بسعر دخول مختلف لكل رقم رسالة (لا تُعتبر مكررة)"""
+    entry = 3000 + message_id * 10
+    return ReplayMessage(message_id, f'GOLD BUY {entry}\nTP {entry + 4}\nSL {entry - 13}', date)
+
+
+class FakeTelegram:
+    """بديل TelegramClient: معالجات الأحداث المسجلة وحالة الاتصال وسجل رسائل القناة"""
+
+    def __init__(self):
+        self.handlers = []
+        self.connected = True
+        self.history = []
+
+    def add_event_handler(self, callback, event):
+        self.handlers.append((callback, event))
+
+    def remove_event_handler(self, callback):
+        self.handlers = [(cb, event) for cb, event in self.handlers if cb != callback]
+
+    def is_connected(self):
+        return self.connected
+
+    async def disconnect(self):
+        self.connected = False
+
+    async def get_input_entity(self, peer):
+        return peer
+
+    async def iter_messages(self, entity, min_id=0, limit=None):
+        # مثل Telethon: الأحدث أولاً
+        newer = sorted((m for m in self.history if m.id > min_id), key=lambda m: m.id, reverse=True)
+        for message in newer[:limit]:
+            yield message
+
+
+def connect_fake(client, account=None):
+    """ربط العميل بحساب وهمي رئيسي كأنه متصل"""
+    account = account or FakeTelegram()
+    client.client = account
+    client.accounts = {'main': account}
+    client.is_connected = True
+    return account
+
+
+def handler_chats(account, callback):
+    """فلاتر chats لمعالج مسجل على حساب وهمي (None = بدون فلتر)"""
+    return [set(event.chats) if event.chats else None for cb, event in account.handlers if cb == callback]
+
+
+def make_client(channels=None):
+    """عميل بملفات مؤقتة وقناة نشطة واحدة (لا يكتب في data/)"""
+    client = TelegramSignalClient('0', '', '', save_interval=60)
+    client.channels_file = os.path.join(tempfile.mkdtemp(), 'channels.json')
+    client.signal_parser.patterns_file = None
+    if channels is None:
+        channels = [{'id': CHANNEL_ID, 'name': 'Gold VIP', 'status': 'active'}]
+    client.monitored_channels = channels
+    client._rebuild_channel_index()
+    return client
+
+
+async def run_client_tests():
+    passed = 0
+    failed = 0
+
+    def check(name, condition, details=''):
+        nonlocal passed, failed
+        if condition:
+            print(f"   ✅ {name}")
+            passed += 1
+        else:
+            print(f"   ❌ {name} {details}")
+            failed += 1
+
+    # ===== 1. إلغاء الإشارة ثم إعادة نشرها =====
+    client = make_client()
+    executed = []
+
+    async def on_signal(signal):
+        executed.append(signal)
+
+    client.set_signal_callback(on_signal)
+    client.pipeline.start()
+
+    await client.message_handler(ReplayEvent(CHAT_ID, ReplayMessage(1, GOLD)))
+    await client.pipeline.join(5)
+    await client.edit_handler(ReplayEvent(CHAT_ID, ReplayMessage(1, 'CANCELLED ❌')))
+    await client.message_handler(ReplayEvent(CHAT_ID, ReplayMessage(2, GOLD)))
+    await client.pipeline.join(5)
+    check("إعادة النشر بعد تعديل الرسالة للإلغاء تُنفذ",
+          len(executed) == 2 and executed[0].status == 'cancelled' and executed[1].status != 'cancelled',
+          [s.status for s in executed])
+
+    await client.delete_handler(SimpleNamespace(chat_id=CHAT_ID, deleted_ids=[2]))
+    await client.message_handler(ReplayEvent(CHAT_ID, ReplayMessage(3, GOLD)))
+    await client.pipeline.join(5)
+    check("إعادة النشر بعد حذف الرسالة تُنفذ", len(executed) == 3, len(executed))
+
+    await client.message_handler(ReplayEvent(CHAT_ID, ReplayMessage(4, GOLD)))
+    await client.pipeline.join(5)
+    check("النسخة المكررة من إشارة قائمة لا تُنفذ", len(executed) == 3, len(executed))
+    await client.pipeline.stop()
+
+    # ===== 2. حفظ القنوات: نسخة الحافظ الخلفي القديمة لا تغطي حفظاً أحدث =====
+    client = make_client([{'id': CHANNEL_ID, 'name': 'Gold VIP', 'status': 'active'},
+                          {'id': 42, 'name': 'Old', 'status': 'active'}])
+    generation = next(client._save_generation)
+    stale_snapshot = [dict(ch) for ch in client.monitored_channels]  # نسخة الحافظ قبل الكتابة
+    client.remove_channel(42)                                        # حفظ فوري من الواجهة
+    written = client._write_json_file(client.channels_file, stale_snapshot, generation)
+    with open(client.channels_file, 'r', encoding='utf-8') as f:
+        saved_ids = [ch['id'] for ch in json.load(f)]
+    check("النسخة الأقدم لا تُكتب بعد الحفظ الفوري", not written and saved_ids == [CHANNEL_ID], saved_ids)
+
+    # كتابات متزامنة لنفس الملف (الحافظ الخلفي + الحفظ عند الإغلاق)
+    path = os.path.join(tempfile.mkdtemp(), 'patterns.json')
+    errors = []
+
+    def writer(n):
+        try:
+            for i in range(20):
+                atomic_write_json(path, {'writer': n, 'i': i})
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with open(path, 'r', encoding='utf-8') as f:
+        last = json.load(f)
+    check("الكتابات المتزامنة لا تتداخل", not errors and last['i'] == 19
+          and os.listdir(os.path.dirname(path)) == ['patterns.json'], errors)
+
+    # ===== 3. قطع الاتصال: تفريغ خط المعالجة قبل الحفظ النهائي =====
+    client = make_client()
+    client.signal_parser.patterns_file = os.path.join(os.path.dirname(client.channels_file), 'patterns.json')
+    client.client = FakeTelegram()
+    client.accounts = {'main': client.client}
+    client.is_connected = True
+    client._register_message_handler()
+    client.pipeline.start()
+    client._flush_task = asyncio.ensure_future(client._channels_flusher())
+
+    await client.message_handler(ReplayEvent(CHAT_ID, ReplayMessage(7, GOLD)))
+    await client.disconnect()  # الرسالة ما زالت في الطابور
+    with open(client.channels_file, 'r', encoding='utf-8') as f:
+        saved = json.load(f)[0]
+    templates = {}
+    if os.path.exists(client.signal_parser.patterns_file):
+        with open(client.signal_parser.patterns_file, 'r', encoding='utf-8') as f:
+            templates = json.load(f)['channels']
+    check("عدادات الرسالة قيد المعالجة تُحفظ عند الإغلاق",
+          saved.get('signal_count') == 1 and saved.get('last_message_id') == 7, saved)
+    check("القالب المتعلم من الرسالة قيد المعالجة يُحفظ", 'Gold VIP' in templates, list(templates))
+    check("إزالة المعالجات عند الإغلاق", not client.accounts and client._handler_channel_ids is None)
+
+    # ===== 4. إعادة تشغيل ملف رسائل عبر المسار الحقيقي =====
+    replay_file = os.path.join(tempfile.mkdtemp(), 'history.json')
+    with open(replay_file, 'w', encoding='utf-8') as f:
+        json.dump([
+            {'channel_name': 'Gold VIP', 'raw_message': GOLD},
+            {'channel_name': 'FX Room', 'message_text': 'EURJPY SELL 172.500\nTP 172.100\nSL 172.900'},
+            'صباح الخير',
+        ], f, ensure_ascii=False)
+
+    source = FileReplaySource(replay_file, repeat=2)
+    check("قناة لكل اسم في الملف (النص بدون قناة في Replay)",
+          sorted(ch['name'] for ch in source.channels) == ['FX Room', 'Gold VIP', 'Replay']
+          and len({ch['id'] for ch in source.channels}) == 3, source.channels)
+
+    client = make_client([])
+    client.signal_deduplicator.window = 0
+    client.signal_parser.cache_size = 0
+    executed = []
+    messages = []
+
+    async def on_message(message_data, signal=None):
+        messages.append(message_data['channel_name'])
+
+    client.set_signal_callback(on_signal)
+    client.set_message_callback(on_message)
+    stats = await client.run_source(source, drain_timeout=5)
+
+    check("تنفيذ كل النسخ المعادة", sorted(s.symbol for s in executed) == ['EURJPY', 'EURJPY', 'XAUUSD', 'XAUUSD'],
+          [s.symbol for s in executed])
+    check("كل الرسائل تصل لـ callback الرسائل", len(messages) == 6 and stats['source']['sent'] == 6
+          and stats['source']['drained'], stats['source'])
+    check("قنوات المصدر مؤقتة", client.monitored_channels == [] and not client.pipeline.is_running)
+
+    # ===== 5. عدة حسابات: كل قناة على حساب واحد =====
+    client = make_client([
+        {'id': 1, 'name': 'A', 'status': 'active'},                          # بدون حساب -> الرئيسي
+        {'id': 2, 'name': 'B', 'status': 'active', 'account': 'second'},
+        {'id': 3, 'name': 'C', 'status': 'inactive', 'account': 'second'},
+        {'id': 4, 'name': 'D', 'status': 'active', 'account': 'gone'},       # حساب غير متصل -> الرئيسي
+    ])
+    main_account, second = FakeTelegram(), FakeTelegram()
+    client.client = main_account
+    client.accounts = {'main': main_account, 'second': second}
+    client.is_connected = True
+
+    assignment = client._assign_channels()
+    check("توزيع القنوات النشطة حسب حقل account", assignment == {
+        'main': frozenset({1, 4}), 'second': frozenset({2})}, assignment)
+
+    client._register_message_handler()
+    check("كل حساب يستقبل قنواته فقط",
+          handler_chats(main_account, client.message_handler) == [{-1001, -1, -1004, -4}]
+          and handler_chats(second, client.message_handler) == [{-1002, -2}]
+          and handler_chats(second, client.edit_handler) == [{-1002, -2}],
+          (handler_chats(main_account, client.message_handler), handler_chats(second, client.message_handler)))
+    check("الحذف بدون فلتر على كل حساب", handler_chats(main_account, client.delete_handler) == [None]
+          and handler_chats(second, client.delete_handler) == [None])
+
+    del client.accounts['second']
+    check("قنوات الحساب غير المتصل تنتقل للرئيسي",
+          client._assign_channels() == {'main': frozenset({1, 2, 4})}, client._assign_channels())
+    client.accounts['second'] = second
+
+    # القناة الجديدة تُسجل على أول حساب منضم لها حسب قائمة المحادثات
+    client._dialogs_cache = {'channels': [{'id': 5, 'accounts': ['second', 'main']}]}
+    result = await client.add_channel_by_id(5, 'E')
+    check("حساب القناة الجديدة من قائمة المحادثات", result['success'] and result['channel']['account'] == 'second'
+          and handler_chats(second, client.message_handler) == [{-1002, -2, -1005, -5}],
+          handler_chats(second, client.message_handler))
+
+    # إضافة حساب أثناء الاتصال: قنواته تنتقل إليه
+    third = FakeTelegram()
+
+    async def connect_account(name):
+        client.accounts[name] = third
+        return True
+
+    client._connect_account = connect_account
+    client.monitored_channels.append({'id': 6, 'name': 'F', 'status': 'active', 'account': 'third'})
+    client.save_channels()
+    moved = 6 in client._handler_channel_ids['main']
+    added = await client.add_account('third', '1', 'hash', '+1')
+    check("إضافة حساب أثناء الاتصال", moved and added and handler_chats(third, client.message_handler) == [{-1006, -6}]
+          and 6 not in client._handler_channel_ids['main'], client._handler_channel_ids)
+    check("الاسم main محجوز", not await client.add_account('main', '1', 'hash', '+1'))
+
+    # ===== 6. فلتر chats يتبع القنوات النشطة =====
+    client = make_client([{'id': CHANNEL_ID, 'name': 'Gold VIP', 'status': 'active'},
+                          {'id': 77, 'name': 'FX', 'status': 'inactive'}])
+    account = connect_fake(client)
+    client._register_message_handler()
+    check("فلتر chats للقنوات النشطة فقط", handler_chats(account, client.message_handler) == [{CHAT_ID, -CHANNEL_ID}]
+          and handler_chats(account, client.edit_handler) == [{CHAT_ID, -CHANNEL_ID}],
+          handler_chats(account, client.message_handler))
+
+    client.toggle_channel_status(77)
+    check("تفعيل قناة يعيد تسجيل المعالج بفلتر جديد",
+          handler_chats(account, client.message_handler) == [{CHAT_ID, -CHANNEL_ID, -10077, -77}],
+          handler_chats(account, client.message_handler))
+
+    client.toggle_channel_status(CHANNEL_ID)
+    check("تعطيل قناة يزيلها من الفلتر", handler_chats(account, client.message_handler) == [{-10077, -77}],
+          handler_chats(account, client.message_handler))
+
+    client.toggle_channel_status(77)
+    check("بدون قنوات نشطة لا يُسجل معالج رسائل", handler_chats(account, client.message_handler) == []
+          and handler_chats(account, client.delete_handler) == [], account.handlers)
+
+    # ===== 7. الاسترجاع بعد الاتصال لا يكرر الرسائل الحية =====
+    client = make_client([{'id': CHANNEL_ID, 'name': 'Gold VIP', 'status': 'active', 'last_message_id': 10}])
+    account = connect_fake(client)
+    account.history = [gold(i) for i in range(11, 16)]
+    client.signal_deduplicator.window = 0  # التكرار يظهر في التنفيذ ولا يخفيه منع التكرار
+    executed = []
+    client.set_signal_callback(on_signal)
+    client.pipeline.start()
+
+    # الرسالتان 14 و 15 وصلتا مباشرة قبل انتهاء الاسترجاع
+    await client.message_handler(ReplayEvent(CHAT_ID, account.history[3]))
+    await client.message_handler(ReplayEvent(CHAT_ID, account.history[4]))
+    fetched = await client.catch_up(since={CHANNEL_ID: 10})
+    await client.pipeline.join(5)
+    entries = sorted(s.entry_price for s in executed)
+    check("الاسترجاع يتوقف عند أول رسالة حية", fetched == 3 and client._first_live_ids == {CHANNEL_ID: 14}, fetched)
+    check("كل رسالة تُنفذ مرة واحدة", entries == [3110, 3120, 3130, 3140, 3150], entries)
+    check("آخر رسالة مستلمة بعد الاسترجاع", client._channels_by_id[CHANNEL_ID]['last_message_id'] == 15)
+
+    # ===== 8. الرسائل المسترجعة القديمة تُعرض ولا تُنفذ =====
+    old_date = datetime.now(timezone.utc) - timedelta(seconds=client.catch_up_max_age + 60)
+    account.history = [gold(16, old_date), gold(17)]
+    executed.clear()
+    messages = []
+
+    async def on_catch_up_message(message_data, signal=None):
+        messages.append(message_data)
+
+    client.set_message_callback(on_catch_up_message)
+    client._first_live_ids.clear()
+    await client.catch_up()
+    await client.pipeline.join(5)
+    stale = [m for m in messages if m.get('stale')]
+    check("الرسالة القديمة تصل للواجهة كإشارة قديمة", len(messages) == 2 and len(stale) == 1
+          and stale[0]['parsed'] and stale[0]['catch_up'], messages)
+    check("الرسالة القديمة لا تُنفذ والحديثة تُنفذ", [s.entry_price for s in executed] == [3170],
+          [s.entry_price for s in executed])
+    await client.pipeline.stop()
+
+    # ===== 9. عودة اتصال الحساب تسترجع ما فات منذ الانقطاع =====
+    client = make_client([{'id': CHANNEL_ID, 'name': 'Gold VIP', 'status': 'active', 'last_message_id': 30}])
+    account = connect_fake(client)
+    client.reconnect_check_interval = 0.01
+    client._first_live_ids[CHANNEL_ID] = 25
+    executed = []
+    client.set_signal_callback(on_signal)
+    client.pipeline.start()
+    watcher = asyncio.ensure_future(client._connection_watcher())
+
+    await asyncio.sleep(0.05)
+    account.connected = False
+    await asyncio.sleep(0.05)
+    check("الانقطاع يحفظ نقطة الاسترجاع", client._resume_ids == {'main': {CHANNEL_ID: 30}}
+          and CHANNEL_ID not in client._first_live_ids, client._resume_ids)
+
+    # ما نُشر أثناء الانقطاع، ثم عودة الاتصال
+    account.history = [gold(30), gold(31), gold(32)]
+    account.connected = True
+    for _ in range(100):
+        await asyncio.sleep(0.01)
+        if not client._catch_up_tasks and client._resume_ids == {}:
+            break
+    await client.pipeline.join(5)
+    watcher.cancel()
+    check("عودة الاتصال تسترجع الرسائل الفائتة", sorted(s.entry_price for s in executed) == [3310, 3320]
+          and client._resume_ids == {}, [s.entry_price for s in executed])
+    await client.pipeline.stop()
+
+    return passed, failed
+
+
+def test_telegram_client():
+    print("=" * 70)
+    print("🧪 اختبار عميل Telegram")
+    print("=" * 70)
+    print()
+
+    passed, failed = asyncio.run(run_client_tests())
+
+    print()
+    print("=" * 70)
+    print(f"📊 النتائج: ✅ نجح {passed} | ❌ فشل {failed}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    test_telegram_client()
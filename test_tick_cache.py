@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+اختبار ذاكرة الأسعار اللحظية المشتركة
+"""
+
+import time
+from types import SimpleNamespace
+
+from tick_cache import TickCache
+
+
+def test_tick_cache():
+    print("=" * 70)
+    print("🧪 اختبار ذاكرة الأسعار اللحظية")
+    print("=" * 70)
+    print()
+
+    passed = 0
+    failed = 0
+
+    def check(name, condition, details=''):
+        nonlocal passed, failed
+        if condition:
+            print(f"   ✅ {name}")
+            passed += 1
+        else:
+            print(f"   ❌ {name} {details}")
+            failed += 1
+
+    # دالة جلب تحاكي symbol_info_tick وتحسب عدد الطلبات
+    requests = []
+
+    def fetch(symbol):
+        requests.append(symbol)
+        if symbol == 'UNKNOWN':
+            return None
+        return SimpleNamespace(bid=1.1000 + len(requests) / 10000, ask=1.1002)
+
+    cache = TickCache(fetch, max_age=0.05)
+
+    # ===== 1. التحقق ثم التنفيذ يستخدمان نفس السعر =====
+    first = cache.get('EURUSD')
+    second = cache.get('EURUSD')
+    check("طلب واحد للمنصة لقراءتين متتاليتين", len(requests) == 1 and first is second, requests)
+
+    # ===== 2. السعر الأقدم من max_age يُجلب من جديد =====
+    time.sleep(0.06)
+    third = cache.get('EURUSD')
+    check("السعر المنتهي يُجلب من جديد", len(requests) == 2 and third is not first, requests)
+    check("max_age لكل طلب", cache.get('EURUSD', max_age=0) is not third and len(requests) == 3)
+
+    # ===== 3. فشل الجلب لا يُخزن =====
+    check("فشل الجلب يعيد None", cache.get('UNKNOWN') is None and cache.get('UNKNOWN') is None)
+    check("فشل الجلب لا يُخزن", requests.count('UNKNOWN') == 2, requests)
+
+    # ===== 4. الـ poller يغذي الذاكرة =====
+    count = cache.refresh(['GBPUSD', 'UNKNOWN'])
+    before = len(requests)
+    cache.get('GBPUSD')
+    check("الـ poller يغذي الذاكرة", count == 1 and len(requests) == before, requests)
+
+    cache.invalidate('GBPUSD')
+    cache.get('GBPUSD')
+    check("حذف سعر رمز", len(requests) == before + 1)
+
+    # ===== 5. إحصائيات العمر =====
+    stats = cache.get_stats()
+    check("الإحصائيات",
+          stats['hits'] == 2 and stats['misses'] == 4 and stats['expired'] == 2
+          and stats['fetch_failed'] == 3 and stats['polled'] == 1, stats)
+    check("عمر الأسعار المقدمة لا يتجاوز max_age",
+          stats['max_served_age_ms'] <= stats['max_age_ms'], stats)
+
+    cache.invalidate()
+    check("حذف جميع الأسعار", cache.get_stats()['symbols'] == 0)
+
+    print()
+    print("=" * 70)
+    print(f"📊 النتائج: ✅ نجح {passed} | ❌ فشل {failed}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    test_tick_cache()
@@ -0,0 +1,118 @@
+"""
+ذاكرة مؤقتة للأسعار اللحظية (ticks)
+كل مسارات MT5Manager تقرأ السعر عبرها، فالسعر الأحدث من max_age يُستخدم مباشرة
+بدلاً من طلب جديد للمنصة. يمكن تغذيتها من poller خلفي لرموز الصفقات المفتوحة
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+
+class TickCache:
+    """
+    آخر سعر لكل رمز مع وقت استلامه
+
+    العمر يُحسب من وقت الاستلام محلياً (time.monotonic) وليس من وقت المنصة
+    """
+
+    def __init__(self, fetch: Callable, max_age: float = 0.1):
+        """
+        Args:
+            fetch: دالة جلب السعر من المنصة (مثل mt5.symbol_info_tick)
+            max_age: أقصى عمر للسعر المخزن بالثواني (0 = بدون ذاكرة)
+        """
+        self.fetch = fetch
+        self.max_age = max_age
+        self._ticks: Dict[str, tuple] = {}  # الرمز -> (السعر، وقت الاستلام)
+        self._lock = threading.Lock()
+        self.stats = {
+            'hits': 0,
+            'misses': 0,       # لا يوجد سعر مخزن للرمز
+            'expired': 0,      # السعر المخزن أقدم من max_age
+            'fetch_failed': 0,
+            'polled': 0,       # أسعار جلبها الـ poller
+            'age_ms_total': 0.0,
+            'max_age_ms': 0.0
+        }
+
+    def get(self, symbol: str, max_age: Optional[float] = None):
+        """
+        السعر اللحظي للرمز: من الذاكرة إذا كان حديثاً، وإلا من المنصة
+
+        Args:
+            symbol: اسم الرمز في المنصة
+            max_age: أقصى عمر مقبول لهذا الطلب (الافتراضي self.max_age)
+
+        Returns:
+            كائن السعر (bid/ask) أو None إذا فشل الجلب
+        """
+        max_age = self.max_age if max_age is None else max_age
+        now = time.monotonic()
+
+        with self._lock:
+            cached = self._ticks.get(symbol)
+            if cached is not None:
+                age = now - cached[1]
+                if age <= max_age:
+                    age_ms = age * 1000
+                    self.stats['hits'] += 1
+                    self.stats['age_ms_total'] += age_ms
+                    if age_ms > self.stats['max_age_ms']:
+                        self.stats['max_age_ms'] = age_ms
+                    return cached[0]
+                self.stats['expired'] += 1
+            else:
+                self.stats['misses'] += 1
+
+        return self._fetch(symbol)
+
+    def _fetch(self, symbol: str):
+        tick = self.fetch(symbol)
+        with self._lock:
+            if tick is None:
+                self.stats['fetch_failed'] += 1
+                self._ticks.pop(symbol, None)
+            else:
+                self._ticks[symbol] = (tick, time.monotonic())
+        return tick
+
+    def refresh(self, symbols: Iterable[str]) -> int:
+        """جلب أسعار جديدة لعدة رموز (يستدعيه الـ poller) - يعيد عدد الأسعار المحدثة"""
+        count = 0
+        for symbol in symbols:
+            if self._fetch(symbol) is not None:
+                count += 1
+        with self._lock:
+            self.stats['polled'] += count
+        return count
+
+    def invalidate(self, symbol: Optional[str] = None):
+        """حذف سعر رمز (أو جميع الأسعار)"""
+        with self._lock:
+            if symbol is None:
+                self._ticks.clear()
+            else:
+                self._ticks.pop(symbol, None)
+
+    def get_stats(self) -> Dict:
+        """إحصائيات الذاكرة: نسبة الإصابة وعمر الأسعار المقدمة"""
+        with self._lock:
+            stats = dict(self.stats)
+            now = time.monotonic()
+            ages = [now - received for _, received in self._ticks.values()]
+        hits = stats['hits']
+        requests = hits + stats['misses'] + stats['expired']
+        return {
+            'max_age_ms': round(self.max_age * 1000, 1),
+            'symbols': len(ages),
+            'hits': hits,
+            'misses': stats['misses'],
+            'expired': stats['expired'],
+            'fetch_failed': stats['fetch_failed'],
+            'polled': stats['polled'],
+            'hit_ratio': round(hits / requests, 4) if requests else 0.0,
+            'avg_served_age_ms': round(stats['age_ms_total'] / hits, 3) if hits else 0.0,
+            'max_served_age_ms': round(stats['max_age_ms'], 3),
+            'oldest_cached_ms': round(max(ages) * 1000, 1) if ages else 0.0
+        }